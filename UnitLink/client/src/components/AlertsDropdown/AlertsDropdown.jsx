@@ -5,12 +5,17 @@ import "./AlertsDropdown.scss";
 
 // Розкоментуй визначення компонента та отримання пропсів і даних з контексту
 const AlertsDropdown = ({ setIsOpen }) => {
-  const { alerts, acknowledgeAlert } = useAlerts();
+  const { alerts, acknowledgeAlert, acknowledgeAll } = useAlerts();
 
   return (
     <div className="alerts-dropdown">
       <div className="alerts-header">
         <h4>Active Notifications</h4>
+        {alerts.length > 1 && (
+          <button onClick={acknowledgeAll} className="ack-all-btn">
+            Read all
+          </button>
+        )}
         {/* Розкоментуй та переконайся, що використовується проп setIsOpen */}
         <button onClick={() => setIsOpen(false)} className="close-btn">
           &times;
@@ -22,12 +27,23 @@ const AlertsDropdown = ({ setIsOpen }) => {
             <div key={alert.id} className="alert-item">
               <p>
                 <strong>{alert.device_name}</strong>: {alert.message}
+                {alert.occurrence_count > 1 && (
+                  <span className="occurrence-count">
+                    {" "}
+                    ×{alert.occurrence_count}
+                  </span>
+                )}
               </p>
               {/* Переконуємось, що timestamp існує перед форматуванням */}
               <small>
                 {alert.timestamp
                   ? new Date(alert.timestamp).toLocaleString()
                   : "час невідомий"}
+                {alert.occurrence_count > 1 && alert.last_occurred_at
+                  ? ` — останній: ${new Date(
+                      alert.last_occurred_at
+                    ).toLocaleString()}`
+                  : ""}
               </small>
               <button
                 onClick={() => acknowledgeAlert(alert.id)}
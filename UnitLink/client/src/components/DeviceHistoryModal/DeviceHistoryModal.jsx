@@ -46,8 +46,17 @@ const baseChartOptions = {
   },
 };
 
+// Доступні періоди; роздільну здатність (сирі дані чи агрегати) обирає сервер
+const periodOptions = [
+  { hours: 6, label: "6 год" },
+  { hours: 24, label: "24 год" },
+  { hours: 24 * 7, label: "7 днів" },
+  { hours: 24 * 30, label: "30 днів" },
+];
+
 const DeviceHistoryModal = ({ isOpen, onClose, unit }) => {
   const [history, setHistory] = useState([]);
+  const [hours, setHours] = useState(24);
   const [isLoading, setIsLoading] = useState(false);
   const chartsRef = useRef([]); // Використовуємо масив ref-ів для всіх графіків
 
@@ -57,7 +66,7 @@ const DeviceHistoryModal = ({ isOpen, onClose, unit }) => {
         setIsLoading(true);
         setHistory([]);
         try {
-          const data = await unitService.getUnitHistory(unit.id);
+          const data = await unitService.getUnitHistory(unit.id, hours);
           setHistory(data);
         } catch (error) {
           console.error("Failed to fetch history", error);
@@ -67,7 +76,7 @@ const DeviceHistoryModal = ({ isOpen, onClose, unit }) => {
       };
       fetchHistory();
     }
-  }, [isOpen, unit]);
+  }, [isOpen, unit, hours]);
 
   const handleResetZoom = () => {
     chartsRef.current.forEach((chartInstance) => {
@@ -187,6 +196,18 @@ const DeviceHistoryModal = ({ isOpen, onClose, unit }) => {
         <div className="modal-header">
           <h2>Історія телеметрії: {unit?.name || "..."}</h2>
           <div className="modal-actions-header">
+            <select
+              value={hours}
+              onChange={(e) => setHours(Number(e.target.value))}
+              className="period-select"
+              title="Період"
+            >
+              {periodOptions.map((option) => (
+                <option key={option.hours} value={option.hours}>
+                  {option.label}
+                </option>
+              ))}
+            </select>
             <button
               onClick={handleResetZoom}
               className="btn btn-secondary btn-sm"
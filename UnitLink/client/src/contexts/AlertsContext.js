@@ -1,5 +1,12 @@
 // client/src/contexts/AlertsContext.js
-import React, { createContext, useContext, useState, useEffect } from "react";
+import React, {
+  createContext,
+  useContext,
+  useState,
+  useEffect,
+  useRef,
+  useCallback,
+} from "react";
 import alertService from "../services/alertService";
 import { useSocket } from "./SocketContext";
 
@@ -10,20 +17,37 @@ export const useAlerts = () => useContext(AlertsContext);
 export const AlertsProvider = ({ children }) => {
   const socket = useSocket();
   const [alerts, setAlerts] = useState([]);
+  // Курсор дельта-синхронізації: після перепідключення сокета довантажуємо лише зміни
+  const syncCursorRef = useRef(null);
 
-  // Завантаження початкових сповіщень
-  useEffect(() => {
-    const fetchInitialAlerts = async () => {
-      try {
-        const initialAlerts = await alertService.getUnacknowledged();
-        setAlerts(initialAlerts);
-      } catch (error) {
-        console.error("Could not fetch initial alerts.");
+  const syncAlerts = useCallback(async () => {
+    try {
+      const { alerts: changed, cursor, full } =
+        await alertService.getUnacknowledged(syncCursorRef.current);
+      syncCursorRef.current = cursor;
+      if (full) {
+        setAlerts(changed);
+        return;
       }
-    };
-    fetchInitialAlerts();
+      setAlerts((prevAlerts) => {
+        const changedById = new Map(changed.map((a) => [a.id, a]));
+        const kept = prevAlerts
+          .filter((a) => !changedById.has(a.id))
+          .concat(changed.filter((a) => !a.is_acknowledged));
+        return kept.sort(
+          (a, b) => new Date(b.timestamp) - new Date(a.timestamp)
+        );
+      });
+    } catch (error) {
+      console.error("Could not sync alerts.");
+    }
   }, []);
 
+  // Завантаження початкових сповіщень
+  useEffect(() => {
+    syncAlerts();
+  }, [syncAlerts]);
+
   // Слухаємо нові сповіщення з WebSocket
   useEffect(() => {
     if (!socket) return;
@@ -35,9 +59,40 @@ export const AlertsProvider = ({ children }) => {
       // audio.play();
     };
 
+    // Повтор вже відкритого сповіщення: оновлюємо лічильник і піднімаємо його нагору
+    const handleAlertUpdated = (update) => {
+      setAlerts((prevAlerts) => {
+        const existing = prevAlerts.find((a) => a.id === update.id);
+        if (!existing) return prevAlerts;
+        return [
+          { ...existing, ...update },
+          ...prevAlerts.filter((a) => a.id !== update.id),
+        ];
+      });
+    };
+
+    // Підтвердження іншими операторами
+    const handleAlertsAcknowledged = ({ ids }) => {
+      const acknowledged = new Set(ids);
+      setAlerts((prevAlerts) =>
+        prevAlerts.filter((a) => !acknowledged.has(a.id))
+      );
+    };
+
+    // Події, пропущені поки з'єднання було розірване, - дельтою з сервера
+    const handleReconnect = () => syncAlerts();
+
     socket.on("new_alert", handleNewAlert);
-    return () => socket.off("new_alert", handleNewAlert);
-  }, [socket]);
+    socket.on("alert_updated", handleAlertUpdated);
+    socket.on("alerts_acknowledged", handleAlertsAcknowledged);
+    socket.io.on("reconnect", handleReconnect);
+    return () => {
+      socket.off("new_alert", handleNewAlert);
+      socket.off("alert_updated", handleAlertUpdated);
+      socket.off("alerts_acknowledged", handleAlertsAcknowledged);
+      socket.io.off("reconnect", handleReconnect);
+    };
+  }, [socket, syncAlerts]);
 
   const acknowledgeAlert = async (alertId) => {
     try {
@@ -48,10 +103,26 @@ export const AlertsProvider = ({ children }) => {
     }
   };
 
+  // Всі показані сповіщення - одним запитом
+  const acknowledgeAll = async () => {
+    const ids = alerts.map((a) => a.id);
+    if (ids.length === 0) return;
+    try {
+      await alertService.acknowledgeMany({ ids });
+      const acknowledged = new Set(ids);
+      setAlerts((prevAlerts) =>
+        prevAlerts.filter((a) => !acknowledged.has(a.id))
+      );
+    } catch (error) {
+      console.error("Failed to acknowledge alerts:", error);
+    }
+  };
+
   const value = {
     alerts,
     alertCount: alerts.length,
     acknowledgeAlert,
+    acknowledgeAll,
   };
 
   return (
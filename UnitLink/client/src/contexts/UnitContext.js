@@ -1,5 +1,12 @@
 // src/contexts/UnitContext.js
-import React, { createContext, useContext, useState, useEffect } from "react";
+import React, {
+  createContext,
+  useContext,
+  useState,
+  useEffect,
+  useRef,
+  useCallback,
+} from "react";
 import unitService from "../services/unitService";
 import { useSocket } from "./SocketContext"; // Імпортуємо хук сокета
 
@@ -18,6 +25,31 @@ export const UnitProvider = ({ children }) => {
   const [units, setUnits] = useState([]);
   const [isLoading, setIsLoading] = useState(false);
   const [error, setError] = useState(null);
+  // Версія парку з останньої відповіді сервера - для дельта-синхронізації
+  const versionRef = useRef(null);
+
+  // Застосовує відповідь /api/devices/changes: повний список або лише зміни
+  const syncUnits = useCallback(async () => {
+    const { version, full, devices, deleted } =
+      await unitService.getUnitChanges(versionRef.current);
+    versionRef.current = version;
+    if (full) {
+      setUnits(devices || []);
+      return;
+    }
+    if (devices.length === 0 && deleted.length === 0) return;
+    const changedById = new Map(devices.map((unit) => [unit.id, unit]));
+    const removed = new Set(deleted);
+    setUnits((prevUnits) => {
+      const kept = prevUnits
+        .filter((unit) => !removed.has(unit.id))
+        .map((unit) => changedById.get(unit.id) || unit);
+      const known = new Set(kept.map((unit) => unit.id));
+      return kept
+        .concat(devices.filter((unit) => !known.has(unit.id)))
+        .sort((a, b) => a.name.localeCompare(b.name));
+    });
+  }, []);
 
   // 1. Початкове завантаження даних
   useEffect(() => {
@@ -25,8 +57,7 @@ export const UnitProvider = ({ children }) => {
       setIsLoading(true);
       setError(null);
       try {
-        const fetchedUnits = await unitService.getUnits();
-        setUnits(fetchedUnits || []);
+        await syncUnits();
       } catch (err) {
         setError(err.message || "Failed to fetch units");
       } finally {
@@ -34,7 +65,7 @@ export const UnitProvider = ({ children }) => {
       }
     };
     fetchInitialUnits();
-  }, []);
+  }, [syncUnits]);
 
   // 2. Обробка оновлень через WebSocket
   useEffect(() => {
@@ -53,12 +84,21 @@ export const UnitProvider = ({ children }) => {
       );
     };
 
+    // Після перепідключення - лише зміни, пропущені за час розриву
+    const handleReconnect = () => {
+      syncUnits().catch((err) =>
+        console.error("Failed to sync units after reconnect:", err)
+      );
+    };
+
     socket.on("unit_status_update", handleUnitUpdate);
+    socket.io.on("reconnect", handleReconnect);
 
     return () => {
       socket.off("unit_status_update", handleUnitUpdate);
+      socket.io.off("reconnect", handleReconnect);
     };
-  }, [socket]); // Цей ефект залежить від сокета
+  }, [socket, syncUnits]); // Цей ефект залежить від сокета
 
   const value = { units, isLoading, error };
 
@@ -1,6 +1,7 @@
 // client/src/pages/LogsPage/LogsPage.jsx
 import React, { useState, useEffect } from "react";
 import logService from "../../services/logService";
+import unitService from "../../services/unitService";
 import {
   FaLink,
   FaUnlink,
@@ -10,6 +11,7 @@ import {
   FaExclamationTriangle,
   FaChevronLeft,
   FaChevronRight,
+  FaSearch,
 } from "react-icons/fa"; // Імпортуємо іконки
 import "./LogsPage.scss";
 
@@ -24,10 +26,21 @@ const eventTypeDetails = {
   DEFAULT: { icon: FaExclamationTriangle, text: "Unknown Event" },
 };
 
+const PER_PAGE = 20;
+
+const EMPTY_FILTERS = { eventType: "", deviceId: "", since: "", until: "", q: "" };
+
+// Значення datetime-local (місцевий час) -> ISO в UTC для API
+const toIso = (value) => (value ? new Date(value).toISOString() : "");
+
 const LogsPage = () => {
   const [logs, setLogs] = useState([]);
   const [pagination, setPagination] = useState(null);
-  const [currentPage, setCurrentPage] = useState(1);
+  // Курсор поточної сторінки (null - найновіші події) та її номер для відображення
+  const [page, setPage] = useState({ cursor: null, number: 1 });
+  const [filters, setFilters] = useState(EMPTY_FILTERS);
+  const [searchText, setSearchText] = useState("");
+  const [units, setUnits] = useState([]);
   const [isLoading, setIsLoading] = useState(true);
   const [error, setError] = useState(null);
 
@@ -37,8 +50,9 @@ const LogsPage = () => {
       setError(null);
       try {
         const data = await logService.getLogs({
-          page: currentPage,
-          perPage: 20,
+          cursor: page.cursor,
+          perPage: PER_PAGE,
+          filters: { ...filters, since: toIso(filters.since), until: toIso(filters.until) },
         });
         setLogs(data.logs);
         setPagination(data.pagination);
@@ -50,26 +64,65 @@ const LogsPage = () => {
     };
 
     fetchLogs();
-  }, [currentPage]);
+  }, [page, filters]);
+
+  useEffect(() => {
+    unitService
+      .getUnits()
+      .then(setUnits)
+      .catch(() => setUnits([])); // Без списку підрозділів фільтр просто порожній
+  }, []);
+
+  // Зміна фільтрів повертає на першу сторінку
+  const updateFilters = (changes) => {
+    setFilters((prev) => ({ ...prev, ...changes }));
+    setPage({ cursor: null, number: 1 });
+  };
+
+  const handleSearchSubmit = (e) => {
+    e.preventDefault();
+    updateFilters({ q: searchText.trim() });
+  };
+
+  const handleResetFilters = () => {
+    setSearchText("");
+    updateFilters(EMPTY_FILTERS);
+  };
 
   const handlePrevPage = () => {
     if (pagination?.has_prev) {
-      setCurrentPage((prev) => prev - 1);
+      // На першу сторінку повертаємось без курсора - щоб побачити й нові події
+      setPage((prev) =>
+        prev.number <= 2
+          ? { cursor: null, number: 1 }
+          : { cursor: pagination.prev_cursor, number: prev.number - 1 }
+      );
     }
   };
 
   const handleNextPage = () => {
     if (pagination?.has_next) {
-      setCurrentPage((prev) => prev + 1);
+      setPage((prev) => ({ cursor: pagination.next_cursor, number: prev.number + 1 }));
     }
   };
 
+  const hasFilters = Object.values(filters).some(Boolean);
+
   const renderEmptyState = () => (
     <tr className="empty-row">
       <td colSpan="4">
         <div className="empty-state-content">
-          <h4>Журнал подій порожній</h4>
-          <p>Наразі не зафіксовано жодних значущих подій у системі.</p>
+          {hasFilters ? (
+            <>
+              <h4>Нічого не знайдено</h4>
+              <p>Жодна подія не відповідає обраним фільтрам.</p>
+            </>
+          ) : (
+            <>
+              <h4>Журнал подій порожній</h4>
+              <p>Наразі не зафіксовано жодних значущих подій у системі.</p>
+            </>
+          )}
         </div>
       </td>
     </tr>
@@ -103,9 +156,66 @@ const LogsPage = () => {
     });
   };
 
+  const renderFilters = () => (
+    <form className="logs-filters" onSubmit={handleSearchSubmit}>
+      <select
+        value={filters.eventType}
+        onChange={(e) => updateFilters({ eventType: e.target.value })}
+      >
+        <option value="">Усі типи подій</option>
+        {Object.entries(eventTypeDetails)
+          .filter(([type]) => type !== "DEFAULT")
+          .map(([type, { text }]) => (
+            <option key={type} value={type}>
+              {text}
+            </option>
+          ))}
+      </select>
+      <select
+        value={filters.deviceId}
+        onChange={(e) => updateFilters({ deviceId: e.target.value })}
+      >
+        <option value="">Усі підрозділи</option>
+        {units.map((unit) => (
+          <option key={unit.id} value={unit.id}>
+            {unit.name}
+          </option>
+        ))}
+      </select>
+      <input
+        type="datetime-local"
+        value={filters.since}
+        onChange={(e) => updateFilters({ since: e.target.value })}
+        title="Від"
+      />
+      <input
+        type="datetime-local"
+        value={filters.until}
+        onChange={(e) => updateFilters({ until: e.target.value })}
+        title="До"
+      />
+      <div className="search-box">
+        <input
+          type="search"
+          placeholder="Пошук у повідомленнях..."
+          value={searchText}
+          onChange={(e) => setSearchText(e.target.value)}
+        />
+        <button type="submit" title="Шукати">
+          <FaSearch />
+        </button>
+      </div>
+      <button type="button" className="reset-filters" onClick={handleResetFilters}>
+        Скинути
+      </button>
+    </form>
+  );
+
   if (isLoading) {
     return (
       <div className="logs-container">
+        <h2>Журнал Подій</h2>
+        {renderFilters()}
         <p>Завантаження...</p> {/* TODO: Замінити на гарний спіннер */}
       </div>
     );
@@ -122,6 +232,7 @@ const LogsPage = () => {
   return (
     <div className="logs-container">
       <h2>Журнал Подій</h2>
+      {renderFilters()}
       <div className="logs-table-wrapper">
         <table>
           <thead>
@@ -136,14 +247,15 @@ const LogsPage = () => {
         </table>
       </div>
 
-      {pagination && pagination.total_pages > 1 && (
+      {pagination && (pagination.has_next || pagination.has_prev) && (
         <div className="pagination-controls">
           <button onClick={handlePrevPage} disabled={!pagination.has_prev}>
             <FaChevronLeft />
             <span>Попередня</span>
           </button>
           <span>
-            Сторінка {pagination.current_page} з {pagination.total_pages}
+            Сторінка {page.number} з {pagination.total_is_estimate ? "~" : ""}
+            {Math.max(pagination.total_pages, page.number)}
           </span>
           <button onClick={handleNextPage} disabled={!pagination.has_next}>
             <span>Наступна</span>
@@ -1,10 +1,19 @@
 // src/pages/MapPage/MapPage.jsx
-import React, { useState, useEffect } from "react";
-import { MapContainer, TileLayer, Marker, Popup, GeoJSON } from "react-leaflet";
+import React, { useState, useEffect, useMemo } from "react";
+import {
+  MapContainer,
+  TileLayer,
+  Marker,
+  Popup,
+  GeoJSON,
+  useMap,
+  useMapEvents,
+} from "react-leaflet";
 import axios from "axios";
 import L from "leaflet";
 import ReactDOMServer from "react-dom/server";
 import { useUnits } from "../../contexts/UnitContext"; // <-- Головна зміна: імпорт нашого хука
+import unitService from "../../services/unitService";
 import "./MapPage.scss";
 import DeviceHistoryModal from "../../components/DeviceHistoryModal/DeviceHistoryModal";
 
@@ -47,6 +56,81 @@ const ICON_STROKE_WIDTH = 2;
 const ICON_CONTAINER_SIZE = [32, 32];
 const ICON_ANCHOR = [16, 32];
 const POPUP_ANCHOR = [0, -32];
+// Запас навколо видимої області (частка її розміру), щоб маркери не "вискакували" при зсуві
+const VIEWPORT_PADDING = 0.5;
+
+// До цього масштабу (не включно) карта показує кластери з сервера, далі - окремі підрозділи
+const CLUSTER_ZOOM_THRESHOLD = 10;
+// Затримка перед запитом кластерів: серія зсувів/оновлень статусів - один запит
+const CLUSTER_FETCH_DELAY_MS = 300;
+// Колір кластера - за "найгіршим" статусом серед його підрозділів
+const CLUSTER_STATUS_PRIORITY = ["OFFLINE", "UNSTABLE", "UNKNOWN", "ONLINE"];
+
+// Межі області у форматі параметра bbox API (обрізані до допустимих координат)
+const toBBoxParam = (bounds) => {
+  const clamp = (value, limit) => Math.max(-limit, Math.min(limit, value));
+  return [
+    clamp(bounds.getWest(), 180),
+    clamp(bounds.getSouth(), 90),
+    clamp(bounds.getEast(), 180),
+    clamp(bounds.getNorth(), 90),
+  ].join(",");
+};
+
+// Відстежує видиму область і масштаб карти (оновлюється після кожного зсуву/масштабування)
+const ViewportTracker = ({ onChange }) => {
+  const map = useMapEvents({
+    moveend: () =>
+      onChange({
+        bounds: map.getBounds().pad(VIEWPORT_PADDING),
+        zoom: map.getZoom(),
+      }),
+  });
+  useEffect(() => {
+    onChange({
+      bounds: map.getBounds().pad(VIEWPORT_PADDING),
+      zoom: map.getZoom(),
+    });
+  }, [map, onChange]);
+  return null;
+};
+
+// Маркер кластера: кількість підрозділів; клік наближає карту до кластера
+const ClusterMarker = ({ cluster }) => {
+  const map = useMap();
+  const worstStatus =
+    CLUSTER_STATUS_PRIORITY.find((status) => cluster.statuses[status]) ||
+    "DEFAULT";
+  const icon = L.divIcon({
+    html: `<span>${cluster.count}</span>`,
+    className: "cluster-div-icon",
+    iconSize: [36, 36],
+  });
+  const summary = Object.entries(cluster.statuses)
+    .map(([status, count]) => `${status.toLowerCase()}: ${count}`)
+    .join(", ");
+
+  return (
+    <Marker
+      position={cluster.position}
+      icon={icon}
+      title={summary}
+      eventHandlers={{
+        add: (e) => {
+          e.target.getElement().style.setProperty(
+            "--cluster-color",
+            statusToColor[worstStatus]
+          );
+        },
+        click: () =>
+          map.setView(
+            cluster.position,
+            Math.min(map.getZoom() + 2, CLUSTER_ZOOM_THRESHOLD)
+          ),
+      }}
+    />
+  );
+};
 
 const MapPage = () => {
   const initialPosition = [49.0, 32.0];
@@ -81,6 +165,18 @@ const MapPage = () => {
     fetchBorders();
   }, []);
 
+  // Назви областей з того ж GeoJSON: код (shapeISO) -> назва
+  const regionNames = useMemo(
+    () =>
+      Object.fromEntries(
+        (ukraineBorders?.features || []).map((feature) => [
+          feature.properties.shapeISO,
+          feature.properties.shapeName,
+        ])
+      ),
+    [ukraineBorders]
+  );
+
   const borderStyle = {
     color: "#567a9e",
     weight: 1.5,
@@ -88,6 +184,49 @@ const MapPage = () => {
     fillOpacity: 0.0,
   };
 
+  // Рендеримо лише маркери у видимій області (з запасом): при наближенні до сектора
+  // карта не будує іконки для всього парку
+  const [viewport, setViewport] = useState(null);
+  const showClusters = viewport && viewport.zoom < CLUSTER_ZOOM_THRESHOLD;
+  const visibleUnits = useMemo(() => {
+    if (!viewport) return units;
+    if (showClusters) return [];
+    return units.filter(
+      (unit) =>
+        Array.isArray(unit.position) &&
+        unit.position.length === 2 &&
+        typeof unit.position[0] === "number" &&
+        typeof unit.position[1] === "number" &&
+        viewport.bounds.contains(unit.position)
+    );
+  }, [units, viewport, showClusters]);
+
+  // На дрібному масштабі - готові кластери з сервера; перезапит і при зміні
+  // підрозділів (оновлення статусів через сокет), щоб лічильники були актуальні
+  const [clusters, setClusters] = useState([]);
+  useEffect(() => {
+    if (!showClusters) {
+      setClusters([]);
+      return;
+    }
+    let cancelled = false;
+    const timer = setTimeout(async () => {
+      try {
+        const fetched = await unitService.getUnitClusters(
+          viewport.zoom,
+          toBBoxParam(viewport.bounds)
+        );
+        if (!cancelled) setClusters(fetched);
+      } catch (error) {
+        console.error("Error loading unit clusters:", error);
+      }
+    }, CLUSTER_FETCH_DELAY_MS);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [viewport, showClusters, units]);
+
   const [isHistoryModalOpen, setIsHistoryModalOpen] = useState(false);
   const [selectedUnitForHistory, setSelectedUnitForHistory] = useState(null);
 
@@ -138,8 +277,14 @@ const MapPage = () => {
           <GeoJSON data={ukraineBorders} style={borderStyle} />
         )}
 
-        {/* Рендеримо маркери на основі даних з контексту */}
-        {units.map((unit) => {
+        <ViewportTracker onChange={setViewport} />
+
+        {clusters.map((cluster) => (
+          <ClusterMarker key={cluster.id} cluster={cluster} />
+        ))}
+
+        {/* Рендеримо маркери на основі даних з контексту (лише у видимій області) */}
+        {visibleUnits.map((unit) => {
           // Перевірка валідності координат
           if (
             !Array.isArray(unit.position) ||
@@ -196,6 +341,11 @@ const MapPage = () => {
                     {unit.unit_type.replace("_", " ").toLowerCase()}.
                   </p>
                 )}
+                {unit.region && regionNames[unit.region] && (
+                  <p>
+                    <strong>Область:</strong> {regionNames[unit.region]}.
+                  </p>
+                )}
                 {unit.status && (
                   <p>
                     <strong>Статус зв'язку:</strong>{" "}
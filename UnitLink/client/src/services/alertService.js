@@ -1,10 +1,22 @@
 // client/src/services/alertService.js
 import apiClient from "./api";
 
-const getUnacknowledged = async () => {
+/**
+ * Непідтверджені сповіщення.
+ * @param {string|null} since - cursor з попередньої відповіді: лише зміни після нього
+ *   (включно з підтвердженими - is_acknowledged=true); null - повний список
+ * @returns {Promise<{alerts: object[], cursor: string|null, full: boolean}>}
+ */
+const getUnacknowledged = async (since = null) => {
   try {
-    const response = await apiClient.get("/api/alerts/unacknowledged");
-    return response.data.alerts || [];
+    const response = await apiClient.get("/api/alerts/unacknowledged", {
+      params: { since: since || undefined },
+    });
+    return {
+      alerts: response.data.alerts || [],
+      cursor: response.data.cursor || null,
+      full: response.data.full !== false,
+    };
   } catch (error) {
     console.error("Get Unacknowledged Alerts API error:", error);
     throw error;
@@ -21,9 +33,28 @@ const acknowledge = async (alertId) => {
   }
 };
 
+/**
+ * Масове підтвердження одним запитом.
+ * @param {object} target - { ids: [...] } або { deviceId }
+ * @returns {Promise<string[]>} id фактично підтверджених сповіщень
+ */
+const acknowledgeMany = async ({ ids, deviceId }) => {
+  try {
+    const response = await apiClient.post(
+      "/api/alerts/acknowledge",
+      ids ? { ids } : { device_id: deviceId }
+    );
+    return response.data.acknowledged_ids || [];
+  } catch (error) {
+    console.error("Bulk Acknowledge Alerts API error:", error);
+    throw error;
+  }
+};
+
 const alertService = {
   getUnacknowledged,
   acknowledge,
+  acknowledgeMany,
 };
 
 export default alertService;
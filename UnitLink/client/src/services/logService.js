@@ -2,18 +2,24 @@
 import apiClient from "./api"; // Наш налаштований Axios клієнт
 
 /**
- * Отримує список логів з пагінацією
+ * Отримує сторінку логів (курсорна пагінація)
  * @param {object} params - параметри
- * @param {number} params.page - номер сторінки
+ * @param {string|null} params.cursor - next_cursor / prev_cursor з попередньої відповіді (null - перша сторінка)
  * @param {number} params.perPage - кількість елементів на сторінці
+ * @param {object} params.filters - фільтри: eventType, deviceId, since, until (ISO), q (пошук)
  * @returns {Promise<object>} Об'єкт з логами та метаданими пагінації
  */
-const getLogs = async ({ page = 1, perPage = 20 }) => {
+const getLogs = async ({ cursor = null, perPage = 20, filters = {} }) => {
   try {
     const response = await apiClient.get("/api/logs", {
       params: {
-        page: page,
+        cursor: cursor || undefined,
         per_page: perPage,
+        event_type: filters.eventType || undefined,
+        device_id: filters.deviceId || undefined,
+        since: filters.since || undefined,
+        until: filters.until || undefined,
+        q: filters.q || undefined,
       },
     });
     return response.data;
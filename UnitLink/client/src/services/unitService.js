@@ -6,11 +6,23 @@ const API_URL = "/api/devices"; // Базовий URL для пристроїв/
 /**
  * Отримує список всіх підрозділів з бекенду
  * Потребує JWT токена (додається інтерцептором)
+ * @param {object} [area] - необов'язковий просторовий фільтр
+ * @param {string} [area.bbox] - "min_lon,min_lat,max_lon,max_lat" (як L.LatLngBounds.toBBoxString())
+ * @param {number[]} [area.near] - [lat, lon] центру, разом з area.radiusKm
+ * @param {number} [area.radiusKm] - радіус у км (підрозділи з полем distance_km, від найближчого)
+ * @param {string} [area.region] - код області (напр. "UA-30"), можна поєднувати з bbox/near
  * @returns {Promise<Array>} Масив об'єктів підрозділів
  */
-const getUnits = async () => {
+const getUnits = async ({ bbox, near, radiusKm, region } = {}) => {
   try {
-    const response = await apiClient.get(API_URL);
+    const response = await apiClient.get(API_URL, {
+      params: {
+        bbox: bbox || undefined,
+        near: near ? near.join(",") : undefined,
+        radius_km: near ? radiusKm : undefined,
+        region: region || undefined,
+      },
+    });
     return response.data.devices || [];
   } catch (error) {
     console.error("Get Units API error:", error.response || error.message);
@@ -65,11 +77,13 @@ const deleteUnit = async (unitId) => {
  * Отримує історію телеметрії для підрозділу
  * @param {string} unitId - ID підрозділу
  * @param {number} hours - Період в годинах
+ * @param {string} resolution - raw | 1m | 15m | 1h | auto (сервер обирає сам)
+ * @param {number} maxPoints - Максимум точок на графік (сервер проріджує ряд, зберігаючи піки)
  */
-const getUnitHistory = async (unitId, hours = 24) => {
+const getUnitHistory = async (unitId, hours = 24, resolution = "auto", maxPoints = 1000) => {
   try {
       const response = await apiClient.get(`${API_URL}/${unitId}/history`, {
-          params: { hours }
+          params: { hours, resolution, max_points: maxPoints }
       });
       return response.data.history || [];
   } catch (error) {
@@ -78,12 +92,93 @@ const getUnitHistory = async (unitId, hours = 24) => {
   }
 };
 
+/**
+ * Отримує історію кількох підрозділів одним запитом (стовпці по кожному підрозділу)
+ * @param {{ids?: string[], unitType?: string}} filter - ID підрозділів або тип підрозділу
+ * @param {number} hours - Період в годинах
+ * @param {string} resolution - raw | 1m | 15m | 1h | auto
+ * @param {number} maxPoints - Максимум точок на кожен підрозділ
+ */
+const getFleetHistory = async ({ ids, unitType } = {}, hours = 24, resolution = "auto", maxPoints = 500) => {
+  try {
+      const response = await apiClient.get(`${API_URL}/history`, {
+          params: {
+              ids: ids?.length ? ids.join(",") : undefined,
+              unit_type: unitType,
+              hours, resolution, max_points: maxPoints
+          }
+      });
+      return response.data.devices || {};
+  } catch (error) {
+      console.error("Get Fleet History API error:", error.response || error.message);
+      throw error.response?.data || new Error("Failed to fetch fleet history");
+  }
+};
+
+/**
+ * Зміни списку підрозділів після версії (дельта-синхронізація)
+ * @param {string|null} since - version з попередньої відповіді (null - повний список)
+ * @returns {Promise<{version: string, full: boolean, devices: Array, deleted: string[]}>}
+ *   full=true - devices містить весь список (версія застаріла або since не задано)
+ */
+const getUnitChanges = async (since = null) => {
+  try {
+    const response = await apiClient.get(`${API_URL}/changes`, {
+      params: { since: since || undefined },
+    });
+    return response.data;
+  } catch (error) {
+    console.error("Get Unit Changes API error:", error.response || error.message);
+    throw error.response?.data || new Error("Failed to fetch unit changes");
+  }
+};
+
+/**
+ * Кластери підрозділів для масштабу карти
+ * @param {number} zoom - поточний масштаб карти
+ * @param {string} [bbox] - видима область "min_lon,min_lat,max_lon,max_lat"
+ * @returns {Promise<Array>} [{id, position, count, statuses, unit_types}]
+ */
+const getUnitClusters = async (zoom, bbox) => {
+  try {
+    const response = await apiClient.get(`${API_URL}/clusters`, {
+      params: { zoom, bbox: bbox || undefined },
+    });
+    return response.data.clusters || [];
+  } catch (error) {
+    console.error("Get Unit Clusters API error:", error.response || error.message);
+    throw error.response?.data || new Error("Failed to fetch unit clusters");
+  }
+};
+
+/**
+ * Зведення за областями: кількість підрозділів і розподіл за статусом
+ * @returns {Promise<{regions: Array, unassigned: object}>}
+ *   regions: [{code, name, total, statuses}], unassigned: {total, statuses} - поза областями
+ */
+const getRegionSummary = async () => {
+  try {
+    const response = await apiClient.get(`${API_URL}/regions`);
+    return {
+      regions: response.data.regions || [],
+      unassigned: response.data.unassigned || { total: 0, statuses: {} },
+    };
+  } catch (error) {
+    console.error("Get Region Summary API error:", error.response || error.message);
+    throw error.response?.data || new Error("Failed to fetch region summary");
+  }
+};
+
 const unitService = {
   getUnits,
+  getRegionSummary,
+  getUnitClusters,
+  getUnitChanges,
   addUnit,
   updateUnit,
   deleteUnit,
   getUnitHistory,
+  getFleetHistory,
 };
 
 export default unitService;
@@ -38,6 +38,28 @@ def create_app(config_name='default'):
     # Це важливо зробити тут, щоб моделі були зареєстровані в SQLAlchemy та Flask-Migrate
     from . import models
 
+    # --- Фонові сервіси ---
+    from .services.history_buffer import history_buffer
+    history_buffer.init_app(app)
+    from .services.device_registry import device_registry
+    device_registry.init_app(app)
+    from .services.region_index import region_index
+    region_index.init_app(app)
+    from .services.heartbeat_watchdog import heartbeat_watchdog
+    heartbeat_watchdog.init_app(app)
+    from .services.threshold_rules import threshold_engine
+    threshold_engine.init_app(app)
+    from .services.alert_dedup import alert_dedup
+    alert_dedup.init_app(app)
+    from .services.telemetry_rollups import telemetry_rollups
+    telemetry_rollups.init_app(app)
+    from .services.history_partitions import history_partitions
+    history_partitions.init_app(app)
+    from .services.mqtt_bridge import mqtt_bridge
+    mqtt_bridge.init_app(app)  # Сам міст запускається в run.py, лише в процесі сервера
+    from .services.udp_receiver import udp_receiver
+    udp_receiver.init_app(app)  # Аналогічно - запускається в run.py
+
     # --- Реєстрація блюпринтів ---
     from .routes.auth_routes import auth_bp
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
@@ -1,10 +1,14 @@
 from .user_models import User, UserRole, RegistrationRequest, RegistrationRequestStatus
-from .device_models import Device, DeviceStatus, DeviceStatusHistory, UnitType
+from .device_models import (
+    Device, DeviceStatus, DeviceStatusHistory, UnitType,
+    DeviceTelemetryRollup1m, DeviceTelemetryRollup15m, DeviceTelemetryRollup1h, ROLLUP_RESOLUTIONS
+)
 from .log_models import ConnectionLog, LogEventType, Alert, AlertSeverity
 
 # Можна додати __all__ для контролю імпорту '*'
 __all__ = [
     'User', 'UserRole', 'RegistrationRequest', 'RegistrationRequestStatus',
     'Device', 'DeviceStatus', 'DeviceStatusHistory',
+    'DeviceTelemetryRollup1m', 'DeviceTelemetryRollup15m', 'DeviceTelemetryRollup1h', 'ROLLUP_RESOLUTIONS',
     'ConnectionLog', 'LogEventType', 'Alert', 'AlertSeverity'
 ]
\ No newline at end of file
@@ -1,6 +1,7 @@
 import enum
 import datetime
 from sqlalchemy.sql import func
+from sqlalchemy.orm import declared_attr
 from sqlalchemy.dialects.postgresql import UUID, JSONB  # JSONB краще для індексації JSON в Postgres
 import uuid
 from app import db
@@ -38,6 +39,8 @@ class Device(db.Model):
     # З міркувань безпеки реальні координати можуть не зберігатися або шифруватися
     location_lat = db.Column(db.Float, nullable=True)
     location_lon = db.Column(db.Float, nullable=True)
+    # Область (код ISO 3166-2, напр. 'UA-30'), визначена за координатами - див. app/services/region_index.py
+    region = db.Column(db.String(8), nullable=True, index=True)
     status = db.Column(db.Enum(DeviceStatus), nullable=False, default=DeviceStatus.UNKNOWN)
     last_seen = db.Column(db.DateTime(timezone=True), nullable=True)  # Коли останній раз надходили дані
     created_at = db.Column(db.DateTime(timezone=True), server_default=func.now())
@@ -66,6 +69,7 @@ class Device(db.Model):
             'position': [self.location_lat, self.location_lon],  # Повертаємо як масив [lat, lon]
             'status': self.status.name,  # Статус зв'язку
             'unit_type': self.unit_type.name,  # Тип підрозділу
+            'region': self.region,
             'last_seen': self.last_seen.isoformat() if self.last_seen else None,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'added_by_user_id': str(self.added_by_user_id) if self.added_by_user_id else None
@@ -75,11 +79,18 @@ class Device(db.Model):
 # Модель для зберігання часових рядів параметрів зв'язку
 # Для великих об'ємів даних розгляньте TimescaleDB розширення для PostgreSQL
 class DeviceStatusHistory(db.Model):
+    # На PostgreSQL таблиця секціонована за timestamp (по місяцях), первинний ключ у БД - (id, timestamp).
+    # Секції та ретенцію обслуговує app/services/history_partitions.py
     __tablename__ = 'device_status_history'
+    __table_args__ = (
+        # Основний запит - історія пристрою за період з сортуванням за часом (get_device_history).
+        # На PostgreSQL індекс покриваючий: читання обходиться без звернень до таблиці
+        db.Index('ix_device_status_history_device_id_timestamp', 'device_id', 'timestamp',
+                 postgresql_include=['id', 'signal_rssi', 'latency_ms', 'packet_loss_percent']),
+    )
 
     id = db.Column(db.BigInteger, primary_key=True)  # Використовуємо BigInteger для потенційно великих таблиць
-    device_id = db.Column(UUID(as_uuid=True), db.ForeignKey('devices.id', ondelete='CASCADE'), nullable=False,
-                          index=True)
+    device_id = db.Column(UUID(as_uuid=True), db.ForeignKey('devices.id', ondelete='CASCADE'), nullable=False)
     timestamp = db.Column(db.DateTime(timezone=True), default=func.now(), nullable=False, index=True)
     signal_rssi = db.Column(db.Integer, nullable=True)  # Рівень сигналу
     latency_ms = db.Column(db.Integer, nullable=True)  # Затримка
@@ -98,3 +109,85 @@ class DeviceStatusHistory(db.Model):
 
     def __repr__(self):
         return f'<StatusHistory Device {self.device_id} @ {self.timestamp}>'
+
+
+# --- Агрегати (rollups) історії телеметрії ---
+# Метрики, для яких зберігаються агрегати; для кожної - колонки <метрика>_min/_max/_sum/_count/_p95.
+# Середнє обчислюється при читанні як _sum / _count (так агрегати можна доповнювати пізніми даними).
+ROLLUP_METRICS = ('signal_rssi', 'latency_ms', 'packet_loss_percent')
+ROLLUP_STATS = ('min', 'max', 'sum', 'count', 'p95')
+
+
+def format_rollup(bucket_start, stats):
+    """Перетворює агрегат інтервалу на словник у форматі DeviceStatusHistory.to_dict() + min/max/p95."""
+    data = {'timestamp': bucket_start.isoformat(), 'sample_count': stats['sample_count']}
+    for metric in ROLLUP_METRICS:
+        count = stats[f'{metric}_count']
+        # Середнє - основне значення для графіків
+        data[metric] = round(stats[f'{metric}_sum'] / count, 2) if count else None
+        for stat in ('min', 'max', 'p95'):
+            data[f'{metric}_{stat}'] = stats[f'{metric}_{stat}']
+    return data
+
+
+class TelemetryRollupMixin:
+    """Спільні колонки таблиць агрегатів: один рядок на пристрій і початок інтервалу."""
+
+    # Порядок колонок ключа задано явно (як у міграції): device_id першим, щоб
+    # ключ обслуговував запити історії пристрою (та кількох пристроїв) за період
+    __table_args__ = (db.PrimaryKeyConstraint('device_id', 'bucket_start'),)
+
+    @declared_attr
+    def device_id(cls):
+        return db.Column(UUID(as_uuid=True), db.ForeignKey('devices.id', ondelete='CASCADE'), primary_key=True)
+
+    bucket_start = db.Column(db.DateTime(timezone=True), primary_key=True)
+    sample_count = db.Column(db.Integer, nullable=False, default=0)
+
+    signal_rssi_min = db.Column(db.Integer, nullable=True)
+    signal_rssi_max = db.Column(db.Integer, nullable=True)
+    signal_rssi_sum = db.Column(db.BigInteger, nullable=True)
+    signal_rssi_count = db.Column(db.Integer, nullable=False, default=0)
+    signal_rssi_p95 = db.Column(db.Integer, nullable=True)
+
+    latency_ms_min = db.Column(db.Integer, nullable=True)
+    latency_ms_max = db.Column(db.Integer, nullable=True)
+    latency_ms_sum = db.Column(db.BigInteger, nullable=True)
+    latency_ms_count = db.Column(db.Integer, nullable=False, default=0)
+    latency_ms_p95 = db.Column(db.Integer, nullable=True)
+
+    packet_loss_percent_min = db.Column(db.Float, nullable=True)
+    packet_loss_percent_max = db.Column(db.Float, nullable=True)
+    packet_loss_percent_sum = db.Column(db.Float, nullable=True)
+    packet_loss_percent_count = db.Column(db.Integer, nullable=False, default=0)
+    packet_loss_percent_p95 = db.Column(db.Float, nullable=True)
+
+    def stats(self):
+        stats = {'sample_count': self.sample_count}
+        for metric in ROLLUP_METRICS:
+            for stat in ROLLUP_STATS:
+                stats[f'{metric}_{stat}'] = getattr(self, f'{metric}_{stat}')
+        return stats
+
+    def to_dict(self):
+        return format_rollup(self.bucket_start, self.stats())
+
+
+class DeviceTelemetryRollup1m(TelemetryRollupMixin, db.Model):
+    __tablename__ = 'device_telemetry_rollup_1m'
+
+
+class DeviceTelemetryRollup15m(TelemetryRollupMixin, db.Model):
+    __tablename__ = 'device_telemetry_rollup_15m'
+
+
+class DeviceTelemetryRollup1h(TelemetryRollupMixin, db.Model):
+    __tablename__ = 'device_telemetry_rollup_1h'
+
+
+# Роздільна здатність -> (модель, тривалість інтервалу в секундах), від дрібної до грубої
+ROLLUP_RESOLUTIONS = {
+    '1m': (DeviceTelemetryRollup1m, 60),
+    '15m': (DeviceTelemetryRollup15m, 15 * 60),
+    '1h': (DeviceTelemetryRollup1h, 60 * 60),
+}
@@ -1,5 +1,6 @@
 import enum
 import datetime
+from sqlalchemy import DDL, event
 from sqlalchemy.sql import func
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 import uuid
@@ -15,28 +16,72 @@ class LogEventType(enum.Enum):
     CONFIG_UPDATE = 'config_update' # Зміна конфігурації пристрою
     USER_ACTION = 'user_action' # Дія користувача (логін, зміна налаштувань)
 
+# Документ повнотекстового пошуку по журналу (PostgreSQL): message + details.
+# Конфігурація 'simple' - без стемінгу (вбудованої української немає), лише нижній регістр.
+# Запит пошуку має використовувати саме цей вираз, інакше GIN-індекс не застосується
+LOG_SEARCH_DOCUMENT_SQL = "to_tsvector('simple', coalesce(message, '') || ' ' || coalesce(details::text, ''))"
+
+# SQLite: FTS5-таблиця з копією тексту записів (rowid = id логу), синхронізується тригерами.
+# З details індексуються текстові значення JSON (json_tree повертає їх без \u-екранування)
+LOG_SEARCH_FTS_TABLE = 'connection_logs_fts'
+_SQLITE_DETAILS_TEXT = "(SELECT group_concat(value, ' ') FROM json_tree({row}.details) WHERE type = 'text')"
+LOG_SEARCH_SQLITE_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {LOG_SEARCH_FTS_TABLE} USING fts5(message, details)",
+    f"CREATE TRIGGER IF NOT EXISTS connection_logs_fts_ai AFTER INSERT ON connection_logs BEGIN "
+    f"INSERT INTO {LOG_SEARCH_FTS_TABLE}(rowid, message, details) "
+    f"VALUES (new.id, new.message, {_SQLITE_DETAILS_TEXT.format(row='new')}); END",
+    f"CREATE TRIGGER IF NOT EXISTS connection_logs_fts_ad AFTER DELETE ON connection_logs BEGIN "
+    f"DELETE FROM {LOG_SEARCH_FTS_TABLE} WHERE rowid = old.id; END",
+    f"CREATE TRIGGER IF NOT EXISTS connection_logs_fts_au AFTER UPDATE ON connection_logs BEGIN "
+    f"DELETE FROM {LOG_SEARCH_FTS_TABLE} WHERE rowid = old.id; "
+    f"INSERT INTO {LOG_SEARCH_FTS_TABLE}(rowid, message, details) "
+    f"VALUES (new.id, new.message, {_SQLITE_DETAILS_TEXT.format(row='new')}); END",
+)
+# Тригери зникають разом з connection_logs, а FTS5-таблиця - ні: без неї наступний
+# create_all (IF NOT EXISTS) лишив би стару таблицю з рядками видалених логів
+LOG_SEARCH_SQLITE_DROP_DDL = (
+    f"DROP TABLE IF EXISTS {LOG_SEARCH_FTS_TABLE}",
+)
+
+
 class ConnectionLog(db.Model):
     """Логування значущих подій системи та пристроїв."""
     __tablename__ = 'connection_logs'
+    __table_args__ = (
+        # Курсорна пагінація журналу (get_logs) впорядковує і фільтрує за (timestamp, id)
+        db.Index('ix_connection_logs_timestamp_id', 'timestamp', 'id'),
+        # Фільтри журналу: рівність за полем + той самий порядок (timestamp, id)
+        db.Index('ix_connection_logs_device_id_timestamp_id', 'device_id', 'timestamp', 'id'),
+        db.Index('ix_connection_logs_user_id_timestamp_id', 'user_id', 'timestamp', 'id'),
+        db.Index('ix_connection_logs_event_type_timestamp_id', 'event_type', 'timestamp', 'id'),
+        # Повнотекстовий пошук (лише PostgreSQL; у SQLite - FTS5, див. LOG_SEARCH_SQLITE_DDL)
+        db.Index('ix_connection_logs_search', db.text(LOG_SEARCH_DOCUMENT_SQL),
+                 postgresql_using='gin').ddl_if(dialect='postgresql'),
+    )
 
     id = db.Column(db.BigInteger, primary_key=True)
-    timestamp = db.Column(db.DateTime(timezone=True), server_default=func.now(), index=True)
+    timestamp = db.Column(db.DateTime(timezone=True), server_default=func.now())
     event_type = db.Column(db.Enum(LogEventType), nullable=False)
     message = db.Column(db.Text, nullable=False) # Детальний опис події
 
     # Опціональні зв'язки
     # З пристроєм, до якого відноситься подія
-    device_id = db.Column(UUID(as_uuid=True), db.ForeignKey('devices.id', ondelete='SET NULL'), nullable=True, index=True)
+    device_id = db.Column(UUID(as_uuid=True), db.ForeignKey('devices.id', ondelete='SET NULL'), nullable=True)
     # З користувачем, якщо подія ініційована користувачем
-    user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id', ondelete='SET NULL'), nullable=True, index=True)
+    user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id', ondelete='SET NULL'), nullable=True)
     # Додаткові деталі у форматі JSON
     details = db.Column(JSONB, nullable=True)
 
     # Зв'язок з пристроєм для отримання імені
     # device = db.relationship('Device', backref=db.backref('connection_logs', lazy='dynamic'))
 
-    def to_dict(self):
-        """Перетворює об'єкт логу в словник для JSON-серіалізації."""
+    def to_dict(self, device_name=None):
+        """
+        Перетворює об'єкт логу в словник для JSON-серіалізації.
+        device_name можна передати явно, щоб не завантажувати зв'язок device (див. app/schemas).
+        """
+        if device_name is None:
+            device_name = self.device.name if self.device else "N/A"
         return {
             'id': self.id,
             'timestamp': self.timestamp.isoformat(),
@@ -45,7 +90,7 @@ class ConnectionLog(db.Model):
             'details': self.details,
             'device_id': str(self.device_id) if self.device_id else None,
             # Додаємо ім'я пристрою, якщо він існує
-            'device_name': self.device.name if self.device else "N/A",
+            'device_name': device_name,
             'user_id': str(self.user_id) if self.user_id else None,
             'user_name': self.user.username if self.user else None
         }
@@ -57,6 +102,13 @@ class ConnectionLog(db.Model):
     def __repr__(self):
         return f'<Log {self.timestamp} [{self.event_type.name}]>'
 
+# FTS5-таблиця і тригери створюються і видаляються разом з connection_logs (db.create_all / drop_all на SQLite)
+for _statement in LOG_SEARCH_SQLITE_DDL:
+    event.listen(ConnectionLog.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+for _statement in LOG_SEARCH_SQLITE_DROP_DDL:
+    event.listen(ConnectionLog.__table__, 'before_drop', DDL(_statement).execute_if(dialect='sqlite'))
+
+
 class AlertSeverity(enum.Enum):
     INFO = 'info'
     WARNING = 'warning'
@@ -65,13 +117,30 @@ class AlertSeverity(enum.Enum):
 class Alert(db.Model):
     """Сповіщення про критичні події."""
     __tablename__ = 'alerts'
+    __table_args__ = (
+        # Часткий індекс для непідтверджених сповіщень (get_unacknowledged_alerts, кеш дедуплікації):
+        # підтверджені, яких переважна більшість, у нього не потрапляють
+        db.Index('ix_alerts_unacknowledged_timestamp', 'timestamp',
+                 postgresql_where=db.text('NOT is_acknowledged'), sqlite_where=db.text('is_acknowledged = 0')),
+        # Дельта-синхронізація (get_unacknowledged_alerts?since=...): змінені після курсора
+        db.Index('ix_alerts_updated_at', 'updated_at'),
+    )
 
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     timestamp = db.Column(db.DateTime(timezone=True), server_default=func.now(), index=True)
     severity = db.Column(db.Enum(AlertSeverity), nullable=False, default=AlertSeverity.WARNING)
     message = db.Column(db.Text, nullable=False)
-    is_acknowledged = db.Column(db.Boolean, default=False, nullable=False, index=True)
+    is_acknowledged = db.Column(db.Boolean, default=False, nullable=False)
     acknowledged_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    # Час останньої зміни: створення, повтор (occurrence_count), підтвердження.
+    # onupdate спрацьовує і для пакетних UPDATE (ingest, масове підтвердження), якщо значення не задане явно
+    updated_at = db.Column(db.DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
+
+    # Дедуплікація (див. app/services/alert_dedup.py): повтори з тим самим ключем
+    # згортаються в одне сповіщення з лічильником та часом останнього повтору
+    dedup_key = db.Column(db.String(64), nullable=True)  # Причина: 'offline', 'flapping', 'threshold:<метрика>'
+    occurrence_count = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    last_occurred_at = db.Column(db.DateTime(timezone=True), nullable=True)
 
     # Зв'язки
     device_id = db.Column(UUID(as_uuid=True), db.ForeignKey('devices.id', ondelete='CASCADE'), nullable=True, index=True) # Може бути NULL для системних алертів
@@ -80,16 +149,24 @@ class Alert(db.Model):
     # device = db.relationship('Device', backref=db.backref('alerts', lazy=True)) # Перенесено в Device
     acknowledger = db.relationship('User', backref=db.backref('alerts_acknowledged', lazy=True), foreign_keys=[acknowledged_by_user_id])
 
-    def to_dict(self):
-        """Перетворює об'єкт сповіщення в словник."""
+    def to_dict(self, device_name=None):
+        """
+        Перетворює об'єкт сповіщення в словник.
+        device_name можна передати явно, щоб не завантажувати зв'язок device.
+        """
+        if device_name is None:
+            device_name = self.device.name if self.device else "System Alert"
         return {
             'id': str(self.id),
             'timestamp': self.timestamp.isoformat(),
             'severity': self.severity.name,
             'message': self.message,
             'is_acknowledged': self.is_acknowledged,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'occurrence_count': self.occurrence_count or 1,
+            'last_occurred_at': (self.last_occurred_at or self.timestamp).isoformat(),
             'device_id': str(self.device_id) if self.device_id else None,
-            'device_name': self.device.name if self.device else "System Alert"
+            'device_name': device_name
         }
 
     def __repr__(self):
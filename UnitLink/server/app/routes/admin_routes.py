@@ -1,7 +1,7 @@
 # server/app/routes/admin_routes.py
 import datetime
 import uuid
-from flask import Blueprint, jsonify, request, current_app # Додано current_app
+from flask import Blueprint, jsonify, request, current_app, Response, stream_with_context # Додано current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from itsdangerous import URLSafeTimedSerializer # Залишаємо для генерації токенів
 from app import db # Переконуємось, що db імпортовано
@@ -10,6 +10,8 @@ from app import db # Переконуємось, що db імпортовано
 # from flask_mail import Message
 from app.models import RegistrationRequest, RegistrationRequestStatus, User, UserRole
 from app.decorators import admin_required # Імпортуємо декоратор
+from app.schemas import user_schema, registration_request_schema
+from app.services.history_export import EXPORT_SOURCES, EXPORT_FORMATS, export_filename, iter_export
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -21,22 +23,10 @@ PASSWORD_SETUP_MAX_AGE = 86400 # 24 години в секундах
 @admin_required # Захищаємо маршрут
 def get_registration_requests():
     """Отримує список запитів на реєстрацію зі статусом PENDING."""
-    pending_requests = RegistrationRequest.query.filter_by(
+    pending_requests = registration_request_schema.query().filter_by(
         status=RegistrationRequestStatus.PENDING
     ).order_by(RegistrationRequest.requested_at.asc()).all()
-
-    output = []
-    for req in pending_requests:
-        output.append({
-            "id": str(req.id),
-            "requested_username": req.requested_username,
-            "email": req.email,
-            "full_name": req.full_name,
-            "rank": req.rank,
-            "reason": req.reason,
-            "requested_at": req.requested_at.isoformat() if req.requested_at else None,
-        })
-    return jsonify(requests=output), 200
+    return jsonify(requests=registration_request_schema.dump_many(pending_requests)), 200
 
 @admin_bp.route('/registration_requests/<uuid:request_id>/approve', methods=['POST'])
 @admin_required
@@ -140,8 +130,8 @@ def reject_registration_request(request_id):
 @admin_required
 def get_users():
     """Повертає список всіх користувачів."""
-    users = User.query.order_by(User.created_at.desc()).all()
-    return jsonify(users=[user.to_dict() for user in users]), 200
+    users = user_schema.query().order_by(User.created_at.desc()).all()
+    return jsonify(users=user_schema.dump_many(users)), 200
 
 
 @admin_bp.route('/users/<uuid:user_id>', methods=['PUT'])
@@ -169,7 +159,7 @@ def update_user(user_id):
             return jsonify(message="is_active must be a boolean."), 400
 
     db.session.commit()
-    return jsonify(message="User updated successfully.", user=user_to_update.to_dict()), 200
+    return jsonify(message="User updated successfully.", user=user_schema.dump(user_to_update)), 200
 
 
 @admin_bp.route('/users/<uuid:user_id>', methods=['DELETE'])
@@ -184,4 +174,44 @@ def delete_user(user_id):
     db.session.delete(user_to_delete)
     db.session.commit()
 
-    return jsonify(message="User permanently deleted."), 200
\ No newline at end of file
+    return jsonify(message="User permanently deleted."), 200
+
+
+def _parse_export_time(value):
+    """ISO-дата/час з параметра запиту; без часового поясу - вважається UTC."""
+    moment = datetime.datetime.fromisoformat(value)
+    return moment if moment.tzinfo else moment.replace(tzinfo=datetime.timezone.utc)
+
+
+@admin_bp.route('/export/<source>', methods=['GET'])
+@admin_required
+def export_history(source):
+    """
+    Архів історії (source=history) або логів (source=logs) за період у колонковому форматі.
+    Параметри: since (обов'язковий), until (за замовчуванням - зараз) у форматі ISO,
+    format: parquet (за замовчуванням) | arrow, device_id (можна кілька) - фільтр за пристроями.
+    Файл формується і віддається потоком, по групі рядків.
+    """
+    if source not in EXPORT_SOURCES:
+        return jsonify(message=f"Unknown export source '{source}'. Valid are: {', '.join(EXPORT_SOURCES)}."), 404
+    fmt = request.args.get('format', 'parquet')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify(message=f"Invalid format '{fmt}'. Valid are: {', '.join(EXPORT_FORMATS)}."), 400
+    if not request.args.get('since'):
+        return jsonify(message="Parameter 'since' is required."), 400
+    try:
+        since = _parse_export_time(request.args['since'])
+        until = (_parse_export_time(request.args['until']) if request.args.get('until')
+                 else datetime.datetime.now(datetime.timezone.utc))
+        device_ids = [uuid.UUID(value) for value in request.args.getlist('device_id')]
+    except ValueError:
+        return jsonify(message="Invalid 'since', 'until' or 'device_id' value."), 400
+    if since >= until:
+        return jsonify(message="'since' must be earlier than 'until'."), 400
+
+    current_app.logger.info(f"Admin {get_jwt_identity()} exporting {source} ({fmt}) from {since} to {until}.")
+    chunks = iter_export(source, since, until, fmt, device_ids,
+                         current_app.config.get('EXPORT_CHUNK_ROWS', 50000))
+    mimetype = 'application/vnd.apache.parquet' if fmt == 'parquet' else 'application/vnd.apache.arrow.file'
+    return Response(stream_with_context(chunks), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename="{export_filename(source, since, until, fmt)}"'})
@@ -1,28 +1,156 @@
 # server/app/routes/alert_routes.py
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app import db
+from sqlalchemy import update
+from app import db, socketio
 from app.models import Alert
+from app.schemas import alert_schema
+from app.services.alert_dedup import alert_dedup
+import base64
+import binascii
 import datetime
+import json
+import uuid
 
 alert_bp = Blueprint('alerts', __name__)
 
+
+def _encode_sync_cursor(updated_at):
+    """Непрозорий курсор синхронізації: найпізніший updated_at, який бачив клієнт."""
+    payload = json.dumps({'t': updated_at.isoformat()}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def _decode_sync_cursor(cursor):
+    """:return: datetime; ValueError для пошкодженого курсора."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        updated_at = datetime.datetime.fromisoformat(payload['t'])
+    except (KeyError, TypeError, ValueError, UnicodeDecodeError, binascii.Error) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if updated_at.tzinfo is None:
+        updated_at = updated_at.replace(tzinfo=datetime.timezone.utc)
+    return updated_at
+
+
+def _unacknowledged_query():
+    """Всі непідтверджені сповіщення, від нових (частковий індекс ix_alerts_unacknowledged_timestamp)."""
+    return alert_schema.query().filter_by(is_acknowledged=False).order_by(Alert.timestamp.desc())
+
+
+def _changed_since_query(since):
+    """Сповіщення, змінені після since з перекриттям ALERT_SYNC_OVERLAP_SECONDS (індекс ix_alerts_updated_at)."""
+    overlap = datetime.timedelta(seconds=current_app.config['ALERT_SYNC_OVERLAP_SECONDS'])
+    return alert_schema.query().filter(Alert.updated_at > since - overlap).order_by(Alert.updated_at.asc())
+
+
+def _sync_cursor(alerts, previous=None):
+    """Курсор за найпізнішою зміною серед відданих сповіщень (без змін - попередній курсор)."""
+    latest = max((alert.updated_at for alert in alerts if alert.updated_at is not None), default=None)
+    if latest is None:
+        return previous
+    if latest.tzinfo is None:  # SQLite повертає час без часового поясу
+        latest = latest.replace(tzinfo=datetime.timezone.utc)
+    return _encode_sync_cursor(latest)
+
+
 @alert_bp.route('/unacknowledged', methods=['GET'])
 @jwt_required()
 def get_unacknowledged_alerts():
-    """Повертає список всіх непідтверджених сповіщень."""
-    alerts = Alert.query.filter_by(is_acknowledged=False).order_by(Alert.timestamp.desc()).all()
-    return jsonify(alerts=[alert.to_dict() for alert in alerts]), 200
+    """
+    Без параметрів - всі непідтверджені сповіщення (повтори вже згорнуті в occurrence_count).
+    З ?since=<cursor> - лише сповіщення, створені, повторені або підтверджені після курсора,
+    включно з підтвердженими (is_acknowledged=true), щоб клієнт прибрав їх у себе.
+    Курсор для наступного запиту - у полі cursor; full=true означає повний список.
+
+    Курсор береться з updated_at відданих рядків, а не з годинника сервера, і читається
+    з перекриттям ALERT_SYNC_OVERLAP_SECONDS: зміна, записана транзакцією, що завершилась
+    пізніше за запит клієнта, не загубиться. Повтори в дельті клієнт зливає за id.
+    Курсор, старіший за ALERT_SYNC_MAX_AGE_SECONDS, дає повний список.
+    """
+    cursor = request.args.get('since') or None
+    since = None
+    if cursor is not None:
+        try:
+            since = _decode_sync_cursor(cursor)
+        except ValueError as e:
+            return jsonify(message=str(e)), 400
+        now = datetime.datetime.now(datetime.timezone.utc)
+        if now - since > datetime.timedelta(seconds=current_app.config['ALERT_SYNC_MAX_AGE_SECONDS']):
+            since, cursor = None, None
+
+    if since is None:
+        alerts = _unacknowledged_query().all()
+        return jsonify(alerts=alert_schema.dump_many(alerts), cursor=_sync_cursor(alerts), full=True), 200
+
+    alerts = _changed_since_query(since).all()
+    return jsonify(alerts=alert_schema.dump_many(alerts), cursor=_sync_cursor(alerts, cursor), full=False), 200
+
 
 @alert_bp.route('/<uuid:alert_id>/acknowledge', methods=['POST'])
 @jwt_required()
 def acknowledge_alert(alert_id):
     """Позначає сповіщення як підтверджене."""
     user_id = get_jwt_identity()
-    alert = Alert.query.get_or_404(alert_id)
+    alert = alert_schema.query().get_or_404(alert_id)
     if not alert.is_acknowledged:
+        now = datetime.datetime.now(datetime.timezone.utc)
         alert.is_acknowledged = True
-        alert.acknowledged_at = datetime.datetime.now(datetime.timezone.utc)
+        alert.acknowledged_at = now
         alert.acknowledged_by_user_id = user_id
+        alert.updated_at = now
         db.session.commit()
-    return jsonify(message="Alert acknowledged.", alert=alert.to_dict()), 200
\ No newline at end of file
+        alert_dedup.close([alert.id])
+        socketio.emit('alerts_acknowledged', {'ids': [str(alert.id)]})
+    return jsonify(message="Alert acknowledged.", alert=alert_schema.dump(alert)), 200
+
+
+@alert_bp.route('/acknowledge', methods=['POST'])
+@jwt_required()
+def acknowledge_alerts():
+    """
+    Масове підтвердження одним UPDATE. Тіло: {"ids": [...]} або {"device_id": "..."}
+    (всі непідтверджені сповіщення пристрою). Повертає id фактично підтверджених.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify(message="Request must be JSON"), 400
+    if ('ids' in data) == ('device_id' in data):
+        return jsonify(message="Specify either 'ids' or 'device_id'."), 400
+
+    try:
+        if 'ids' in data:
+            if not isinstance(data['ids'], list):
+                raise ValueError("'ids' must be a list")
+            alert_ids = {uuid.UUID(str(value)) for value in data['ids']}
+            max_ids = current_app.config['ALERT_BULK_ACK_MAX_IDS']
+            if len(alert_ids) > max_ids:
+                return jsonify(message=f"Too many alerts ({len(alert_ids)}), the limit is {max_ids}."), 400
+            condition = Alert.id.in_(alert_ids)
+        else:
+            condition = Alert.device_id == uuid.UUID(str(data['device_id']))
+    except ValueError:
+        return jsonify(message="Invalid alert or device id."), 400
+
+    now = datetime.datetime.now(datetime.timezone.utc)
+    try:
+        result = db.session.execute(
+            update(Alert)
+            .where(condition, Alert.is_acknowledged == False)  # noqa: E712 - як в умові часткового індексу
+            .values(is_acknowledged=True, acknowledged_at=now, acknowledged_by_user_id=uuid.UUID(get_jwt_identity()),
+                    updated_at=now)
+            .returning(Alert.id),
+            execution_options={'synchronize_session': False})
+        acknowledged = [row[0] for row in result]
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error acknowledging alerts: {e}")
+        return jsonify(message="Failed to acknowledge alerts."), 500
+
+    if acknowledged:
+        alert_dedup.close(acknowledged)
+        socketio.emit('alerts_acknowledged', {'ids': [str(alert_id) for alert_id in acknowledged]})
+    current_app.logger.info(f"Acknowledged {len(acknowledged)} alert(s) in bulk.")
+    return jsonify(message=f"{len(acknowledged)} alert(s) acknowledged.",
+                   acknowledged_ids=[str(alert_id) for alert_id in acknowledged]), 200
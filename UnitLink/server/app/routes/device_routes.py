@@ -1,5 +1,6 @@
 # server/app/routes/device_routes.py
 import datetime
+import math
 from app.models import Device, UnitType, DeviceStatus, User, DeviceStatusHistory, ConnectionLog, LogEventType, Alert, AlertSeverity
 from flask import Blueprint, jsonify, request, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
@@ -9,26 +10,217 @@ from app.decorators import device_api_key_required
 
 from app import db, socketio
 # Імпортуємо всі необхідні моделі та Enum'и
-from app.models import Device, UnitType, DeviceStatus, User, DeviceStatusHistory
+from app.models import Device, UnitType, DeviceStatus, User, DeviceStatusHistory, ROLLUP_RESOLUTIONS
+from app.models.device_models import format_rollup, ROLLUP_METRICS
 from app.decorators import admin_required # Імпортуємо декоратор адміна
+from app.services.ingest_service import ingest_status_updates
+from app.services.history_buffer import HistoryBufferFull
+from app.services.device_registry import device_registry
+from app.services.region_index import region_index
+from app.services.heartbeat_watchdog import heartbeat_watchdog
+from app.services.threshold_rules import threshold_engine
+from app.services.alert_dedup import alert_dedup
+from app.services.telemetry_rollups import telemetry_rollups, bucket_floor, merge_stats
+from app.services.downsampling import downsample_rows
+from app.services.json_stream import json_stream_response
+from app.schemas import device_schema
 
 # Створюємо Blueprint
 device_bp = Blueprint('devices', __name__)
 
+# Серіалізований список пристроїв: (ETag списку - device_registry.list_etag(), тіло JSON)
+_device_list_cache = (None, None)
+
+def _parse_coordinates(value, count):
+    """Рядок "a,b,..." з `count` скінченних чисел -> список float; ValueError інакше."""
+    parts = [float(part) for part in value.split(',')]
+    if len(parts) != count or not all(math.isfinite(part) for part in parts):
+        raise ValueError(value)
+    return parts
+
+
+def _bbox_arg():
+    """
+    bbox=<min_lon>,<min_lat>,<max_lon>,<max_lat> (порядок Leaflet toBBoxString).
+    :return: ((min_lat, min_lon, max_lat, max_lon) або None, відповідь з помилкою або None)
+    """
+    bbox = request.args.get('bbox')
+    if not bbox:
+        return None, None
+    try:
+        min_lon, min_lat, max_lon, max_lat = _parse_coordinates(bbox, 4)
+    except ValueError:
+        return None, (jsonify(message="bbox must be 'min_lon,min_lat,max_lon,max_lat'."), 400)
+    if not (-90 <= min_lat <= max_lat <= 90 and -180 <= min_lon <= max_lon <= 180):
+        return None, (jsonify(message="bbox is out of range or min > max."), 400)
+    return (min_lat, min_lon, max_lat, max_lon), None
+
+
+def _spatial_filter_args():
+    """
+    Просторовий фільтр списку пристроїв з параметрів запиту:
+      bbox=<min_lon>,<min_lat>,<max_lon>,<max_lat> - видима область (порядок Leaflet toBBoxString);
+      near=<lat>,<lon>&radius_km=<км> - пристрої в радіусі, від найближчого, з полем distance_km;
+      region=<код області> - за збереженим призначенням (можна поєднувати з bbox / near).
+    :return: (функція без аргументів -> (ETag, стани) або None без фільтра, відповідь з помилкою або None)
+    """
+    bbox, near, region = request.args.get('bbox'), request.args.get('near'), request.args.get('region')
+    if bbox and near:
+        return None, (jsonify(message="Specify either 'bbox' or 'near', not both."), 400)
+    if region:
+        known_regions = region_index.regions()
+        if known_regions and region not in known_regions:
+            return None, (jsonify(message=f"Unknown region '{region}'. Valid regions are: {sorted(known_regions)}"), 400)
+
+    def with_region(find):
+        if not region:
+            return find
+
+        def find_in_region():
+            etag, states = find()
+            return etag, [state for state in states if state.get('region') == region]
+        return find_in_region
+
+    if bbox:
+        bounds, error = _bbox_arg()
+        if error:
+            return None, error
+        return with_region(lambda: device_registry.within_bbox(*bounds)), None
+
+    if near:
+        try:
+            lat, lon = _parse_coordinates(near, 2)
+            radius_km = float(request.args.get('radius_km', ''))
+        except ValueError:
+            return None, (jsonify(message="near must be 'lat,lon' and radius_km a number."), 400)
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180) or not 0 < radius_km <= 20000:
+            return None, (jsonify(message="near is out of range or radius_km is not in (0, 20000]."), 400)
+
+        def find_near():
+            etag, found = device_registry.within_radius(lat, lon, radius_km)
+            return etag, [dict(state, distance_km=round(distance, 3)) for state, distance in found]
+        return with_region(find_near), None
+
+    if region:
+        return lambda: device_registry.in_region(region), None
+    return None, None
+
+
 @device_bp.route('/', methods=['GET'])
 @jwt_required() # Захищено для будь-якого авторизованого користувача
 def get_all_devices():
-    """Повертає список всіх підрозділів/пристроїв."""
+    """
+    Повертає список всіх підрозділів/пристроїв (або лише в області - див. _spatial_filter_args).
+    Список береться з реєстру і серіалізується один раз на ETag списку - версію парку разом
+    з лічильником оновлень last_seen, тож last_seen у відповіді завжди поточний, а повторний
+    запит з If-None-Match без змін між запитами отримує 304 без звернень до БД і серіалізації.
+    Поле version у тілі - версія парку, яку приймає /api/devices/changes.
+    Відфільтровані списки серіалізуються на кожен запит (відбір - за сітковим індексом реєстру).
+    """
+    global _device_list_cache
     current_user_id = get_jwt_identity()
     current_app.logger.info(f"User {current_user_id} requesting device list.")
+    spatial_filter, error = _spatial_filter_args()
+    if error:
+        return error
     try:
-        devices = Device.query.order_by(Device.name).all()
-        # Використовуємо to_dict() для перетворення об'єктів у словники
-        return jsonify(devices=[device.to_dict() for device in devices]), 200
+        # ETag читається до знімка: знімок не старіший за ETag, під яким його віддано
+        list_etag = device_registry.list_etag()
+        if request.if_none_match.contains(list_etag):
+            response = current_app.response_class(status=304)
+        elif spatial_filter is not None:
+            etag, devices_data = spatial_filter()
+            if not request.args.get('near'):
+                devices_data.sort(key=lambda device: device['name'])
+            body = current_app.json.dumps({'version': etag, 'devices': devices_data})
+            response = current_app.response_class(body, status=200, mimetype='application/json')
+        else:
+            cached_etag, body = _device_list_cache
+            if cached_etag != list_etag:
+                etag, devices_data = device_registry.versioned_snapshot()
+                devices_data.sort(key=lambda device: device['name'])
+                body = current_app.json.dumps({'version': etag, 'devices': devices_data})
+                _device_list_cache = (list_etag, body)
+            response = current_app.response_class(body, status=200, mimetype='application/json')
+        response.set_etag(list_etag)
+        # Кешувати можна, але перед використанням - перевірити версію
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
     except Exception as e:
         current_app.logger.error(f"Error fetching devices: {e}")
         return jsonify(message="Error fetching device list."), 500
 
+@device_bp.route('/changes', methods=['GET'])
+@jwt_required()
+def get_device_changes():
+    """
+    Зміни списку пристроїв після версії ?since=<version> (поле version попередньої відповіді
+    цього ендпоінта або /api/devices): змінені та додані пристрої - у devices, видалені - в deleted.
+    Без since або для версії, старішої за журнал змін реєстру, - повний список (full=true).
+    Відповідь не звертається до БД: все береться з реєстру пристроїв.
+    """
+    since = request.args.get('since') or None
+    version, devices_data, deleted = device_registry.changes_since(since)
+    full = devices_data is None
+    if full:
+        version, devices_data = device_registry.versioned_snapshot()
+        deleted = []
+    devices_data.sort(key=lambda device: device['name'])
+    return jsonify(version=version, full=full, devices=devices_data,
+                   deleted=[str(device_id) for device_id in deleted]), 200
+
+@device_bp.route('/regions', methods=['GET'])
+@jwt_required()
+def get_region_summary():
+    """
+    Зведення за областями: кількість підрозділів і розподіл за статусом для кожної відомої
+    області (також порожніх) та окремо - для підрозділів поза областями. Рахується за
+    збереженим призначенням (devices.region) у реєстрі, без геометрії; ETag - версія парку.
+    """
+    etag = device_registry.etag()
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        etag, summary, unassigned = device_registry.region_summary()
+        names = region_index.regions()
+        empty = {'total': 0, 'statuses': {}}
+        regions = [dict(summary.get(code, empty), code=code, name=names.get(code, code))
+                   for code in sorted(set(names) | set(summary))]
+        response = jsonify(version=etag, regions=regions, unassigned=unassigned)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+@device_bp.route('/clusters', methods=['GET'])
+@jwt_required()
+def get_device_clusters():
+    """
+    Кластери підрозділів для масштабу карти ?zoom=<0..> у видимій області ?bbox=... (необов'язково).
+    Кожен кластер: центр (середнє позицій), кількість, розподіл за статусом і типом.
+    Агрегати підтримуються реєстром інкрементно (app/services/cluster_index.py) - запит лише
+    читає готові комірки; ETag - версія парку, як у списку пристроїв.
+    """
+    try:
+        zoom = int(request.args.get('zoom', ''))
+        if zoom < 0:
+            raise ValueError(zoom)
+    except ValueError:
+        return jsonify(message="zoom must be an integer >= 0."), 400
+    bounds, error = _bbox_arg()
+    if error:
+        return error
+
+    etag = device_registry.etag()
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        etag, clusters = device_registry.clusters(zoom, *(bounds or ()))
+        response = jsonify(version=etag, zoom=zoom, max_zoom=current_app.config['CLUSTER_MAX_ZOOM'],
+                           clusters=clusters)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
 @device_bp.route('/<uuid:device_id>', methods=['GET'])
 @jwt_required()
 def get_device_details(device_id):
@@ -37,8 +229,12 @@ def get_device_details(device_id):
     current_app.logger.info(f"User {current_user_id} requesting details for device {device_id}.")
     try:
         # Використовуємо get_or_404 для автоматичної відповіді 404, якщо ID не знайдено
-        device = Device.query.get_or_404(device_id)
-        return jsonify(device=device.to_dict()), 200
+        device = device_schema.query().get_or_404(device_id)
+        device_data = device_schema.dump(device)
+        pending = device_registry.pending_last_seen([device.id])
+        if pending:
+            device_data['last_seen'] = pending[device.id].isoformat()
+        return jsonify(device=device_data), 200
     except Exception as e:
         # Логуємо помилку, якщо вона не 404 (get_or_404 обробляє 404)
         current_app.logger.error(f"Error fetching device {device_id}: {e}")
@@ -46,29 +242,222 @@ def get_device_details(device_id):
         return jsonify(message="Error fetching device details."), 500
 
 
+def _auto_history_resolution(hours):
+    """Найдрібніша роздільна здатність, за якої період дає не більше HISTORY_AUTO_MAX_POINTS точок."""
+    max_points = current_app.config.get('HISTORY_AUTO_MAX_POINTS', 1500)
+    span = hours * 3600
+    if span / current_app.config.get('HISTORY_RAW_INTERVAL_SECONDS', 15) <= max_points:
+        return 'raw'
+    for resolution, (_, seconds) in ROLLUP_RESOLUTIONS.items():
+        if span / seconds <= max_points:
+            return resolution
+    return list(ROLLUP_RESOLUTIONS)[-1]
+
+
+def _history_window_args():
+    """
+    Розбирає спільні параметри запитів історії: hours, resolution, max_points.
+    :return: (start_time, resolution, max_points, None) або (None, None, None, (відповідь з помилкою, код))
+    """
+    # Отримуємо параметр `hours` з запиту, за замовчуванням - 24 години
+    hours_ago = request.args.get('hours', 24, type=int)
+    start_time = datetime.datetime.now(datetime.timezone.utc) - timedelta(hours=hours_ago)
+
+    max_points = request.args.get('max_points', type=int)
+    if max_points is not None and max_points < 10:
+        return None, None, None, (jsonify(message="max_points must be an integer >= 10."), 400)
+
+    resolution = request.args.get('resolution', 'auto')
+    if resolution == 'auto':
+        resolution = _auto_history_resolution(hours_ago)
+    elif resolution != 'raw' and resolution not in ROLLUP_RESOLUTIONS:
+        return None, None, None, (jsonify(message=f"Invalid resolution '{resolution}'. "
+                                                  f"Valid are: raw, auto, {', '.join(ROLLUP_RESOLUTIONS)}."), 400)
+    return start_time, resolution, max_points, None
+
+
+def _rollup_history(device_ids, resolution, start_time):
+    """
+    Агрегати з таблиці роздільної здатності (один запит для всіх пристроїв)
+    + ще не записані інтервали з пам'яті. Повертає {device_id: [рядки за часом]}.
+    """
+    model, seconds = ROLLUP_RESOLUTIONS[resolution]
+    since = bucket_floor(start_time, seconds)
+    rows = _rollup_history_query(model, device_ids, since).all()
+
+    buckets = {device_id: {} for device_id in device_ids}
+    for row in rows:
+        bucket_start = row.bucket_start
+        if bucket_start.tzinfo is None:
+            bucket_start = bucket_start.replace(tzinfo=datetime.timezone.utc)
+        buckets[row.device_id][bucket_start] = row.stats()
+    for (device_id, bucket_start), stats in telemetry_rollups.open_rollups(device_ids, resolution, since).items():
+        device_buckets = buckets[device_id]
+        device_buckets[bucket_start] = (merge_stats(device_buckets[bucket_start], stats)
+                                        if bucket_start in device_buckets else stats)
+    return {device_id: [format_rollup(bucket_start, device_buckets[bucket_start])
+                        for bucket_start in sorted(device_buckets)]
+            for device_id, device_buckets in buckets.items()}
+
+
+def _rollup_history_query(model, device_ids, since):
+    """Запит агрегатів пристроїв з інтервалу since (індекс (device_id, bucket_start), без сортування)."""
+    return model.query.filter(
+        model.device_id.in_(device_ids),
+        model.bucket_start >= since
+    ).order_by(model.device_id, model.bucket_start.asc())
+
+
+def _raw_history_query(device_id, start_time):
+    """Запит сирої історії пристрою (індекс (device_id, timestamp), без сортування)."""
+    return db.select(DeviceStatusHistory.id, DeviceStatusHistory.timestamp, DeviceStatusHistory.signal_rssi,
+                     DeviceStatusHistory.latency_ms, DeviceStatusHistory.packet_loss_percent).where(
+        DeviceStatusHistory.device_id == device_id,
+        DeviceStatusHistory.timestamp >= start_time
+    ).order_by(DeviceStatusHistory.timestamp.asc())
+
+
+def _raw_history_rows(device_id, start_time):
+    """
+    Сира історія пристрою у форматі DeviceStatusHistory.to_dict(). Читається пакетами
+    (серверний курсор) без створення ORM-об'єктів; запит виконується одразу, рядки - ліниво.
+    """
+    rows = db.session.execute(
+        _raw_history_query(device_id, start_time),
+        execution_options={'yield_per': current_app.config.get('HISTORY_STREAM_BATCH_SIZE', 2000)}
+    )
+    return ({'id': row.id, 'timestamp': row.timestamp.isoformat(), 'signal_rssi': row.signal_rssi,
+             'latency_ms': row.latency_ms, 'packet_loss_percent': row.packet_loss_percent} for row in rows)
+
+
 @device_bp.route('/<uuid:device_id>/history', methods=['GET', 'OPTIONS'])
 @jwt_required()
 def get_device_history(device_id):
-    """Повертає історію телеметрії для пристрою за вказаний період."""
+    """
+    Повертає історію телеметрії для пристрою за вказаний період.
+    Параметри: hours (за замовчуванням 24), resolution: raw | 1m | 15m | 1h | auto (за замовчуванням)
+    та max_points - верхня межа кількості точок (LTTB для кожної метрики, піки зберігаються).
+    Для агрегатів signal_rssi/latency_ms/packet_loss_percent - середні за інтервал,
+    додатково передаються <метрика>_min/_max/_p95 та sample_count.
+    """
     try:
         # Перевіряємо, чи існує пристрій
         device = Device.query.get_or_404(device_id)
 
-        # Отримуємо параметр `hours` з запиту, за замовчуванням - 24 години
-        hours_ago = request.args.get('hours', 24, type=int)
-        start_time = datetime.datetime.now(datetime.timezone.utc) - timedelta(hours=hours_ago)
+        start_time, resolution, max_points, error = _history_window_args()
+        if error:
+            return error
 
-        history_records = DeviceStatusHistory.query.filter(
-            DeviceStatusHistory.device_id == device_id,
-            DeviceStatusHistory.timestamp >= start_time
-        ).order_by(DeviceStatusHistory.timestamp.asc()).all()
+        if resolution != 'raw':
+            history = _rollup_history({device_id}, resolution, start_time)[device_id]
+        else:
+            history = _raw_history_rows(device_id, start_time)
+            if max_points is None:
+                # Без проріджування - віддаємо потоком, не тримаючи весь результат у пам'яті
+                return json_stream_response({'resolution': resolution}, 'history', history)
+            history = list(history)
 
-        return jsonify(history=[record.to_dict() for record in history_records]), 200
+        return jsonify(history=downsample_rows(history, ROLLUP_METRICS, max_points), resolution=resolution), 200
 
     except Exception as e:
         current_app.logger.error(f"Error fetching history for device {device_id}: {e}")
         return jsonify(message="An internal error occurred."), 500
 
+
+def _raw_fleet_history_query(device_ids, start_time):
+    """Запит сирої історії кількох пристроїв (індекс (device_id, timestamp), без сортування)."""
+    columns = [DeviceStatusHistory.device_id, DeviceStatusHistory.timestamp] + \
+              [getattr(DeviceStatusHistory, metric) for metric in ROLLUP_METRICS]
+    return db.select(*columns).where(
+        DeviceStatusHistory.device_id.in_(device_ids),
+        DeviceStatusHistory.timestamp >= start_time
+    ).order_by(DeviceStatusHistory.device_id, DeviceStatusHistory.timestamp.asc())
+
+
+def _raw_fleet_history(device_ids, start_time):
+    """Сира історія кількох пристроїв одним запитом: {device_id: [рядки]}."""
+    rows = db.session.execute(
+        _raw_fleet_history_query(device_ids, start_time),
+        execution_options={'yield_per': current_app.config.get('HISTORY_STREAM_BATCH_SIZE', 2000)}
+    )
+    history = {device_id: [] for device_id in device_ids}
+    for row in rows:
+        record = row._asdict()
+        device_id = record.pop('device_id')
+        record['timestamp'] = record['timestamp'].isoformat()
+        history[device_id].append(record)
+    return history
+
+
+def _to_columns(rows):
+    """Рядки історії -> стовпці {поле: [значення, ...]} (компактніше для графіків кількох пристроїв)."""
+    if not rows:
+        return {'timestamp': [], **{metric: [] for metric in ROLLUP_METRICS}}
+    return {key: [row[key] for row in rows] for key in rows[0]}
+
+
+@device_bp.route('/history', methods=['GET', 'OPTIONS'])
+@jwt_required()
+def get_fleet_history():
+    """
+    Історія телеметрії кількох пристроїв за один запит до БД.
+    Параметри: ids (кілька параметрів або через кому) або unit_type, а також
+    hours, resolution та max_points - як у /<device_id>/history (max_points - для кожного пристрою).
+    Відповідь - стовпці по кожному пристрою: {devices: {id: {name, unit_type, timestamp: [...], signal_rssi: [...], ...}}}.
+    """
+    raw_ids = [part.strip() for value in request.args.getlist('ids') for part in value.split(',') if part.strip()]
+    unit_type_str = request.args.get('unit_type')
+    if bool(raw_ids) == bool(unit_type_str):
+        return jsonify(message="Specify either 'ids' or 'unit_type'."), 400
+
+    if raw_ids:
+        try:
+            device_ids = {uuid.UUID(value) for value in raw_ids}
+        except ValueError:
+            return jsonify(message="Invalid device id in 'ids'."), 400
+        states = device_registry.get_many(device_ids)
+        missing = sorted(str(device_id) for device_id in device_ids if device_id not in states)
+        if missing:
+            return jsonify(message=f"Devices not found: {', '.join(missing)}"), 404
+    else:
+        try:
+            unit_type = UnitType[unit_type_str.upper()]
+        except KeyError:
+            valid_types = [t.name for t in UnitType]
+            return jsonify(message=f"Invalid unit_type '{unit_type_str}'. Valid types are: {valid_types}"), 400
+        states = {uuid.UUID(state['id']): state for state in device_registry.snapshot()
+                  if state['unit_type'] == unit_type.name}
+        device_ids = set(states)
+
+    max_devices = current_app.config.get('FLEET_HISTORY_MAX_DEVICES', 200)
+    if len(device_ids) > max_devices:
+        return jsonify(message=f"Too many devices requested ({len(device_ids)}), the limit is {max_devices}."), 400
+
+    start_time, resolution, max_points, error = _history_window_args()
+    if error:
+        return error
+    if not device_ids:
+        return jsonify(devices={}, resolution=resolution), 200
+
+    try:
+        if resolution != 'raw':
+            history = _rollup_history(device_ids, resolution, start_time)
+        else:
+            history = _raw_fleet_history(device_ids, start_time)
+
+        devices = {}
+        for device_id, rows in history.items():
+            state = states[device_id]
+            devices[str(device_id)] = {
+                'name': state['name'], 'unit_type': state['unit_type'],
+                **_to_columns(downsample_rows(rows, ROLLUP_METRICS, max_points))
+            }
+        return jsonify(devices=devices, resolution=resolution), 200
+
+    except Exception as e:
+        current_app.logger.error(f"Error fetching fleet history: {e}")
+        return jsonify(message="An internal error occurred."), 500
+
 @device_bp.route('/', methods=['POST'])
 @admin_required # Тільки адмін може додавати
 def add_device():
@@ -116,15 +505,17 @@ def add_device():
         location_lon=lon,
         unit_type=unit_type_enum,
         status=DeviceStatus.UNKNOWN, # Встановлюємо початковий статус зв'язку
-        added_by_user_id=admin_user_id # Зберігаємо ID адміна, що додав
+        added_by_user_id=admin_user_id, # Зберігаємо ID адміна, що додав
+        region=region_index.locate(lat, lon)
     )
 
     db.session.add(new_device)
     try:
         db.session.commit()
+        device_registry.upsert(new_device)
         current_app.logger.info(f"Admin {admin_user_id} successfully added device {new_device.id} ('{new_device.name}').")
         # Повертаємо створений об'єкт
-        return jsonify(message="Device added successfully.", device=new_device.to_dict()), 201 # Created
+        return jsonify(message="Device added successfully.", device=device_schema.dump(new_device)), 201 # Created
     except Exception as e:
         db.session.rollback()
         current_app.logger.error(f"Error adding device by admin {admin_user_id}: {e}")
@@ -190,19 +581,27 @@ def update_device(device_id):
             valid_types = [t.name for t in UnitType]
             return jsonify(message=f"Invalid unit_type '{unit_type_str}'. Valid types are: {valid_types}"), 400
 
+    # Область перераховується лише при зміні координат
+    if new_lat is not None or new_lon is not None:
+        region = region_index.locate(device.location_lat, device.location_lon)
+        if device.region != region:
+            device.region = region
+            updated = True
+
     # Якщо були зміни, зберігаємо і повертаємо оновлений об'єкт
     if updated:
         try:
             db.session.commit()
+            device_registry.upsert(device)
             current_app.logger.info(f"Admin {admin_user_id} successfully updated device {device_id}.")
-            return jsonify(message="Device updated successfully.", device=device.to_dict()), 200
+            return jsonify(message="Device updated successfully.", device=device_schema.dump(device)), 200
         except Exception as e:
             db.session.rollback()
             current_app.logger.error(f"Error updating device {device_id} by admin {admin_user_id}: {e}")
             return jsonify(message="Internal server error. Failed to update device."), 500
     else:
         # Якщо змін не було передано або вони не відрізняються
-        return jsonify(message="No changes detected or provided.", device=device.to_dict()), 200
+        return jsonify(message="No changes detected or provided.", device=device_schema.dump(device)), 200
 
 
 @device_bp.route('/<uuid:device_id>', methods=['DELETE'])
@@ -216,6 +615,11 @@ def delete_device(device_id):
     try:
         db.session.delete(device)
         db.session.commit()
+        device_registry.remove(device_id)
+        heartbeat_watchdog.forget([device_id])
+        threshold_engine.forget(device_id)
+        alert_dedup.forget_device(device_id)
+        telemetry_rollups.forget(device_id)
         current_app.logger.info(f"Admin {admin_user_id} successfully deleted device {device_id} ('{device.name}').")
         # Повертаємо 204 No Content або 200 OK з повідомленням
         # return '', 204
@@ -235,140 +639,69 @@ def delete_device(device_id):
 # TODO: Реалізувати безпечний механізм автентифікації для цього ендпоінта (напр., API ключі)
 def update_device_status(device_id):
     """Оновлює статус зв'язку, параметри пристрою та надсилає сповіщення через WebSocket."""
-    device = Device.query.get_or_404(device_id)
-    data = request.get_json()
+    data = request.get_json(silent=True)
 
     if not data:
         current_app.logger.warning(f"Update status for device {device_id} failed: No JSON data received.")
         return jsonify(message="Request must be JSON"), 400
 
-    current_time = datetime.datetime.now(datetime.timezone.utc)
-    updated_fields = [] # Список оновлених полів для логування
-
-    # Оновлюємо статус зв'язку
-    new_status_str = data.get('status')
-    new_alert = None  # змінна для нового алерту
-
-    if new_status_str:
-        try:
-            new_status_enum = DeviceStatus[new_status_str.upper()]
-            # Зберігаємо старий статус перед зміною
-            old_status = device.status
-            if old_status != new_status_enum:
-                device.status = new_status_enum
-                updated_fields.append(f"status changed from {old_status.name} to {new_status_enum.name}")
-
-                # --- ЛОГІКА ЗАПИСУ В ConnectionLog ---
-                log_message = ""
-                log_event_type = None
-
-                # Подія: втрата зв'язку (був онлайн -> став офлайн)
-                if old_status == DeviceStatus.ONLINE and new_status_enum == DeviceStatus.OFFLINE:
-                    log_event_type = LogEventType.DISCONNECTED
-                    log_message = f"Device '{device.name}' lost connection."
-
-                # Подія: відновлення зв'язку (був офлайн -> став онлайн)
-                elif old_status == DeviceStatus.OFFLINE and new_status_enum == DeviceStatus.ONLINE:
-                    log_event_type = LogEventType.CONNECTED
-                    log_message = f"Device '{device.name}' connection restored."
-
-                # Подія: загальна зміна статусу (напр., на UNSTABLE)
-                elif old_status != new_status_enum:
-                    log_event_type = LogEventType.STATUS_CHANGE
-                    log_message = f"Device '{device.name}' status changed to {new_status_enum.name}."
-
-                if log_event_type:
-                    log_entry = ConnectionLog(
-                        device_id=device.id,
-                        event_type=log_event_type,
-                        message=log_message,
-                        details={  # Зберігаємо трохи контексту
-                            'from_status': old_status.name,
-                            'to_status': new_status_enum.name
-                        }
-                    )
-                    db.session.add(log_entry)
-                # -----------------------------------
-                # --- ЛОГІКУ СТВОРЕННЯ АЛЕРТУ ---
-                if new_status_enum == DeviceStatus.OFFLINE:
-                    alert_message = f"Пристрій '{device.name}' втратив зв'язок (OFFLINE)."
-                    new_alert = Alert(
-                        device_id=device.id,
-                        severity=AlertSeverity.CRITICAL,
-                        message=alert_message
-                    )
-                    db.session.add(new_alert)
-
-        except KeyError:
-            current_app.logger.warning(
-                f"Update status for device {device_id} failed: Invalid status value '{new_status_str}'.")
-            return jsonify(
-                message=f"Invalid status '{new_status_str}'. Valid are: {[s.name for s in DeviceStatus]}"), 400
-
-    # Оновлюємо час останнього контакту
-    device.last_seen = current_time
-    updated_fields.append(f"last_seen to {current_time.isoformat()}")
+    try:
+        result = ingest_status_updates([(device_id, data)])[0]
+    except HistoryBufferFull as e:
+        current_app.logger.warning(f"Update status for device {device_id} rejected: {e}")
+        return jsonify(message="Server is busy, retry later."), 503, {'Retry-After': '1'}
+    except Exception as e:
+        current_app.logger.error(f"Error committing status update for device {device_id}: {e}")
+        import traceback
+        current_app.logger.error(traceback.format_exc())
+        return jsonify(message="Internal server error updating status."), 500
 
+    if result['code'] != 200:
+        current_app.logger.warning(f"Update status for device {device_id} failed: {result['message']}")
+    return jsonify(message=result['message']), result['code']
 
-    # Отримуємо та зберігаємо параметри в історію
-    signal_rssi = data.get('signal_rssi')
-    latency_ms = data.get('latency_ms')
-    packet_loss_percent = data.get('packet_loss_percent')
 
-    # Конвертуємо у відповідні типи, обробляючи None
-    try:
-        signal_rssi_val = int(signal_rssi) if signal_rssi is not None else None
-        latency_ms_val = int(latency_ms) if latency_ms is not None else None
-        packet_loss_percent_val = float(packet_loss_percent) if packet_loss_percent is not None else None
-    except ValueError:
-        current_app.logger.warning(f"Update status for device {device_id} failed: Invalid parameter format.")
-        return jsonify(message="Invalid parameter format. RSSI and Latency must be integers, Packet Loss must be a number."), 400
-
-
-    # Створюємо запис в історії, якщо хоча б один параметр передано
-    if any(p is not None for p in [signal_rssi_val, latency_ms_val, packet_loss_percent_val]):
-        history_entry = DeviceStatusHistory(
-            device_id=device.id,
-            timestamp=current_time,
-            signal_rssi=signal_rssi_val,
-            latency_ms=latency_ms_val,
-            packet_loss_percent=packet_loss_percent_val
-        )
-        db.session.add(history_entry)
-        updated_fields.append(f"history_entry (RSSI:{signal_rssi_val}, Latency:{latency_ms_val}, Loss:{packet_loss_percent_val})")
+@device_bp.route('/status/batch', methods=['POST'])
+@device_api_key_required
+def update_device_status_batch():
+    """
+    Пакетне оновлення статусу/телеметрії для багатьох пристроїв (напр., від вузлів зв'язку).
+    Приймає масив записів (або {"updates": [...]}) у форматі одиночного ендпоінта
+    з додатковим полем device_id. Повертає результат для кожного запису.
+    """
+    data = request.get_json(silent=True)
+    items = data.get('updates') if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return jsonify(message="Request must be a non-empty JSON array of status records."), 400
+
+    max_size = current_app.config.get('STATUS_BATCH_MAX_SIZE', 500)
+    if len(items) > max_size:
+        return jsonify(message=f"Batch too large. Maximum is {max_size} records."), 413
+
+    updates = []
+    results = [None] * len(items)
+    positions = []  # індекси записів, переданих у конвеєр
+    for index, item in enumerate(items):
+        raw_id = item.get('device_id') if isinstance(item, dict) else None
+        try:
+            device_id = uuid.UUID(str(raw_id))
+        except (ValueError, TypeError):
+            results[index] = {'device_id': raw_id, 'code': 400, 'message': "Invalid or missing device_id."}
+            continue
+        updates.append((device_id, item))
+        positions.append(index)
 
     try:
-        db.session.commit()
-        current_app.logger.info(f"Device {device_id} status updated: {', '.join(updated_fields)}.")
-
-        # ---> НАДСИЛАЄМО ПОДІЮ WEBSOCKET <---
-        # Перетворюємо оновлений об'єкт device на словник для передачі
-        updated_device_data = device.to_dict()
-        # Додаємо актуальні параметри, якщо вони щойно надійшли (в to_dict їх немає)
-        # to_dict() повертає загальний стан пристрою, а не останній запис історії
-        # Для фронтенду може бути корисно мати останні дані телеметрії разом з оновленням
-        updated_device_data['latest_telemetry'] = {
-            'signal_rssi': signal_rssi_val,
-            'latency_ms': latency_ms_val,
-            'packet_loss_percent': packet_loss_percent_val,
-            'timestamp': current_time.isoformat()
-        }
-
-        if new_alert:
-            socketio.emit('new_alert', new_alert.to_dict())
-            current_app.logger.info(f"Emitted 'new_alert' for device {device_id}.")
-        # --------------------------------------
-
-        # `room=None` означає, що повідомлення буде надіслано всім підключеним клієнтам
-        # У майбутньому можна використовувати кімнати для більш таргетованих оновлень
-        socketio.emit('unit_status_update', updated_device_data, room=None)
-        current_app.logger.info(f"Emitted 'unit_status_update' for device {device_id}.")
-        # --------------------------------------
-
-        return jsonify(message="Device status updated successfully."), 200
+        for index, result in zip(positions, ingest_status_updates(updates)):
+            results[index] = result
+    except HistoryBufferFull as e:
+        current_app.logger.warning(f"Batch status update ({len(updates)} records) rejected: {e}")
+        return jsonify(message="Server is busy, retry later."), 503, {'Retry-After': '1'}
     except Exception as e:
-        db.session.rollback()
-        current_app.logger.error(f"Error committing status update for device {device_id}: {e}")
+        current_app.logger.error(f"Error committing batch status update ({len(updates)} records): {e}")
         import traceback
         current_app.logger.error(traceback.format_exc())
         return jsonify(message="Internal server error updating status."), 500
+
+    accepted = sum(1 for r in results if r['code'] == 200)
+    return jsonify(results=results, accepted=accepted, rejected=len(results) - accepted), 200
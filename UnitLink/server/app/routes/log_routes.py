@@ -1,48 +1,229 @@
 # server/app/routes/log_routes.py
 
+import base64
+import binascii
+import datetime
+import json
+import math
+import time
+import uuid
+
 from flask import Blueprint, jsonify, request, current_app
 from flask_jwt_extended import jwt_required
+from sqlalchemy import func, text, tuple_
 
-from app.models import ConnectionLog
+from app import db
+from app.models import ConnectionLog, LogEventType
+from app.schemas import connection_log_schema
+from app.services.log_search import log_search_condition
+from app.services.json_stream import json_stream_response
 
 # Створюємо Blueprint
 log_bp = Blueprint('logs', __name__)
 
 
+# Кеш загальної кількості логів: (значення, чи це оцінка, момент закінчення дії)
+_total_cache = (None, False, 0.0)
+
+
+def _logs_total():
+    """
+    Загальна кількість логів для відображення "сторінка X з Y". Рахується не частіше
+    ніж раз на LOGS_TOTAL_CACHE_SECONDS; на PostgreSQL для великої таблиці (від
+    LOGS_EXACT_COUNT_LIMIT рядків за статистикою) береться оцінка з pg_class без COUNT(*).
+    :return: (кількість, чи є вона оцінкою)
+    """
+    global _total_cache
+    total, is_estimate, expires_at = _total_cache
+    now = time.monotonic()
+    if total is not None and now < expires_at:
+        return total, is_estimate
+
+    total, is_estimate = None, False
+    if db.engine.dialect.name == 'postgresql':
+        estimate = db.session.execute(text(
+            "SELECT reltuples::bigint FROM pg_class WHERE relname = :name"),
+            {'name': ConnectionLog.__tablename__}).scalar()
+        if estimate is not None and estimate >= current_app.config.get('LOGS_EXACT_COUNT_LIMIT', 1000000):
+            total, is_estimate = int(estimate), True
+    if total is None:
+        total = db.session.query(func.count(ConnectionLog.id)).scalar()
+    _total_cache = (total, is_estimate, now + current_app.config.get('LOGS_TOTAL_CACHE_SECONDS', 30))
+    return total, is_estimate
+
+
+def _encode_cursor(log, direction):
+    """Непрозорий курсор: позиція (timestamp, id) запису та напрямок ('next' - старіші, 'prev' - новіші)."""
+    payload = json.dumps({'t': log.timestamp.isoformat(), 'id': log.id, 'd': direction}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def _decode_cursor(cursor):
+    """:return: (timestamp, id, direction); ValueError для пошкодженого курсора."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        direction = payload['d']
+        if direction not in ('next', 'prev'):
+            raise ValueError(direction)
+        return datetime.datetime.fromisoformat(payload['t']), int(payload['id']), direction
+    except (KeyError, TypeError, ValueError, UnicodeDecodeError, binascii.Error) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+
+
+def _log_filters():
+    """
+    Умови фільтрів журналу з параметрів запиту: event_type, device_id, user_id,
+    since/until (ISO, без поясу - UTC) та q (повнотекстовий пошук).
+    Для кожного фільтра-рівності є індекс (<поле>, timestamp, id). ValueError - некоректний параметр.
+    """
+    args = request.args
+    filters = []
+    if args.get('event_type'):
+        try:
+            filters.append(ConnectionLog.event_type == LogEventType[args['event_type'].upper()])
+        except KeyError:
+            raise ValueError(f"Invalid event_type '{args['event_type']}'. "
+                             f"Valid types are: {[t.name for t in LogEventType]}")
+    for name, column in (('device_id', ConnectionLog.device_id), ('user_id', ConnectionLog.user_id)):
+        if args.get(name):
+            try:
+                filters.append(column == uuid.UUID(args[name]))
+            except ValueError:
+                raise ValueError(f"Invalid {name}.")
+    for name, compare in (('since', ConnectionLog.timestamp.__ge__), ('until', ConnectionLog.timestamp.__lt__)):
+        if args.get(name):
+            try:
+                moment = datetime.datetime.fromisoformat(args[name])
+            except ValueError:
+                raise ValueError(f"Invalid '{name}', expected ISO date/time.")
+            filters.append(compare(moment if moment.tzinfo else moment.replace(tzinfo=datetime.timezone.utc)))
+    query_text = args.get('q', '').strip()
+    if query_text:
+        if len(query_text) > 200:
+            raise ValueError("Search query is too long (max 200 characters).")
+        filters.append(log_search_condition(query_text))
+    return filters
+
+
+def _matching_ids_query(filters, limit):
+    """Id записів за фільтрами, не більше limit (відбір за індексом фільтра, без сортування)."""
+    return db.session.query(ConnectionLog.id).filter(*filters).limit(limit)
+
+
+def _filtered_total(filters):
+    """Кількість записів за фільтрами, але не більше LOGS_FILTERED_COUNT_LIMIT: (кількість, чи обрізана)."""
+    limit = current_app.config.get('LOGS_FILTERED_COUNT_LIMIT', 10000)
+    matching = _matching_ids_query(filters, limit + 1).subquery()
+    total = db.session.query(func.count()).select_from(matching).scalar()
+    return min(total, limit), total > limit
+
+
+def _keyset_query(query, cursor, per_page):
+    """
+    Запит сторінки журналу за курсором: per_page + 1 рядків індексу (timestamp, id) - або
+    (<фільтр>, timestamp, id) - від позиції курсора, тому вартість не залежить від глибини сторінки.
+    :return: (запит, напрямок 'next' | 'prev'); ValueError для пошкодженого курсора
+    """
+    position = tuple_(ConnectionLog.timestamp, ConnectionLog.id)
+    if cursor is None:
+        direction = 'next'
+    else:
+        timestamp, log_id, direction = _decode_cursor(cursor)
+        query = query.filter(position < tuple_(timestamp, log_id) if direction == 'next'
+                             else position > tuple_(timestamp, log_id))
+
+    if direction == 'next':
+        query = query.order_by(ConnectionLog.timestamp.desc(), ConnectionLog.id.desc())
+    else:
+        query = query.order_by(ConnectionLog.timestamp.asc(), ConnectionLog.id.asc())
+    return query.limit(per_page + 1), direction
+
+
+def _keyset_page(query, cursor, per_page):
+    """
+    Сторінка журналу за курсором (від нових до старих за (timestamp, id)).
+    :return: (логи сторінки, has_next, has_prev)
+    """
+    query, direction = _keyset_query(query, cursor, per_page)
+    logs = query.all()
+    has_more = len(logs) > per_page
+    logs = logs[:per_page]
+
+    if direction == 'next':
+        return logs, has_more, cursor is not None
+    # Назад читали у зворотному порядку
+    logs.reverse()
+    return logs, True, has_more
+
+
 @log_bp.route('/', methods=['GET'])
 @jwt_required()  # Захищаємо ендпоінт, доступний для всіх авторизованих
 def get_logs():
-    """Повертає список логів подій з пагінацією."""
+    """
+    Повертає список логів подій з пагінацією.
+
+    Курсорна пагінація (за замовчуванням): cursor - значення next_cursor/prev_cursor
+    з попередньої відповіді (без нього - перша сторінка), per_page. total_items
+    кешується і на великих таблицях може бути оцінкою (total_is_estimate).
+    Фільтри: event_type, device_id, user_id, since, until, q (пошук по message та details);
+    з фільтрами total_items рахується до LOGS_FILTERED_COUNT_LIMIT (далі - total_is_estimate).
+    Параметр page вмикає старий режим LIMIT/OFFSET (для сумісності; глибокі сторінки повільні).
+    """
     try:
         # Отримуємо параметри пагінації з запиту, з адекватними значеннями за замовчуванням
-        page = request.args.get('page', 1, type=int)
+        # (некоректні значення виправляються так само, як у .paginate(error_out=False))
         per_page = request.args.get('per_page', 20, type=int)
+        if per_page < 1:
+            per_page = 20
+        try:
+            filters = _log_filters()
+        except ValueError as e:
+            return jsonify(message=str(e)), 400
+        total, total_is_estimate = _filtered_total(filters) if filters else _logs_total()
+        total_pages = math.ceil(total / per_page)
+        query = connection_log_schema.query().filter(*filters)
+
+        if 'page' in request.args and 'cursor' not in request.args:
+            page = max(request.args.get('page', 1, type=int), 1)
+            # Сторінка читається з БД пакетами і віддається потоком: великий per_page
+            # не змушує тримати всі об'єкти логів у пам'яті (див. app/services/json_stream.py)
+            page_logs = query.order_by(
+                ConnectionLog.timestamp.desc(), ConnectionLog.id.desc()
+            ).limit(per_page).offset((page - 1) * per_page).yield_per(
+                current_app.config.get('HISTORY_STREAM_BATCH_SIZE', 2000))
 
-        # Використовуємо потужний метод .paginate() від SQLAlchemy
-        # Він ефективно робить запити з LIMIT та OFFSET
-        paginated_logs = ConnectionLog.query.order_by(ConnectionLog.timestamp.desc()).paginate(
-            page=page,
-            per_page=per_page,
-            error_out=False  # Не видавати помилку 404, якщо сторінка порожня
-        )
+            return json_stream_response({
+                'pagination': {
+                    'current_page': page,
+                    'per_page': per_page,
+                    'total_pages': total_pages,
+                    'total_items': total,
+                    'total_is_estimate': total_is_estimate,
+                    'has_next': page < total_pages,
+                    'has_prev': page > 1
+                }
+            }, 'logs', (connection_log_schema.dump(log) for log in page_logs))
 
-        # Перетворюємо отримані об'єкти логів у словники
-        logs_data = [log.to_dict() for log in paginated_logs.items]
+        try:
+            logs, has_next, has_prev = _keyset_page(query, request.args.get('cursor') or None, per_page)
+        except ValueError as e:
+            return jsonify(message=str(e)), 400
 
         # Формуємо відповідь, яка включає метадані пагінації
-        # Це найкраща практика для API з пагінацією
         return jsonify({
-            'logs': logs_data,
+            'logs': connection_log_schema.dump_many(logs),
             'pagination': {
-                'current_page': paginated_logs.page,
-                'per_page': paginated_logs.per_page,
-                'total_pages': paginated_logs.pages,
-                'total_items': paginated_logs.total,
-                'has_next': paginated_logs.has_next,
-                'has_prev': paginated_logs.has_prev
+                'per_page': per_page,
+                'next_cursor': _encode_cursor(logs[-1], 'next') if logs and has_next else None,
+                'prev_cursor': _encode_cursor(logs[0], 'prev') if logs and has_prev else None,
+                'has_next': has_next,
+                'has_prev': has_prev,
+                'total_pages': total_pages,
+                'total_items': total,
+                'total_is_estimate': total_is_estimate
             }
         }), 200
 
     except Exception as e:
         current_app.logger.error(f"Error fetching logs: {e}")
-        return jsonify(message="An internal error occurred while fetching logs."), 500
\ No newline at end of file
+        return jsonify(message="An internal error occurred while fetching logs."), 500
@@ -0,0 +1,11 @@
+from .base import Schema
+from .user_schemas import user_schema, registration_request_schema
+from .device_schemas import device_schema
+from .log_schemas import connection_log_schema, alert_schema
+
+__all__ = [
+    'Schema',
+    'user_schema', 'registration_request_schema',
+    'device_schema',
+    'connection_log_schema', 'alert_schema'
+]
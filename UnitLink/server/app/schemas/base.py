@@ -0,0 +1,32 @@
+# server/app/schemas/base.py
+from sqlalchemy.orm import raiseload
+
+
+class Schema:
+    """
+    Серіалізатор моделі для маршрутів.
+
+    Кожна схема явно оголошує зв'язки, які читає dump() (relationships() - loader
+    options: joinedload / selectinload), а всі інші зв'язки завантажуються з
+    raiseload: звернення до неоголошеного зв'язку під час серіалізації падає
+    з помилкою замість тихого запиту на кожен рядок (N+1).
+    Імена пристроїв беруться з реєстру пристроїв (пошук id -> ім'я в пам'яті).
+    """
+    model = None
+
+    def relationships(self):
+        """Loader options для зв'язків, які використовує dump()."""
+        return ()
+
+    def options(self):
+        return (*self.relationships(), raiseload('*'))
+
+    def query(self):
+        """Запит моделі з завантаженням лише оголошених зв'язків."""
+        return self.model.query.options(*self.options())
+
+    def dump(self, obj):
+        return obj.to_dict()
+
+    def dump_many(self, objs):
+        return [self.dump(obj) for obj in objs]
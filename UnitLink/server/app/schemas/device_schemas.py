@@ -0,0 +1,11 @@
+# server/app/schemas/device_schemas.py
+from app.models import Device
+from .base import Schema
+
+
+class DeviceSchema(Schema):
+    """Пристрій: to_dict() не читає зв'язків."""
+    model = Device
+
+
+device_schema = DeviceSchema()
@@ -0,0 +1,31 @@
+# server/app/schemas/log_schemas.py
+from sqlalchemy.orm import joinedload
+
+from app.models import ConnectionLog, Alert, User
+from app.services.device_registry import device_registry
+from .base import Schema
+
+
+class ConnectionLogSchema(Schema):
+    """Лог події: ім'я пристрою - з реєстру, ім'я користувача - тим самим запитом (JOIN)."""
+    model = ConnectionLog
+
+    def relationships(self):
+        return (joinedload(ConnectionLog.user).load_only(User.username),)
+
+    def dump(self, log):
+        device_name = device_registry.name_of(log.device_id) if log.device_id else None
+        return log.to_dict(device_name=device_name or "N/A")
+
+
+class AlertSchema(Schema):
+    """Сповіщення: ім'я пристрою - з реєстру, без зв'язку device."""
+    model = Alert
+
+    def dump(self, alert):
+        device_name = device_registry.name_of(alert.device_id) if alert.device_id else None
+        return alert.to_dict(device_name=device_name or "System Alert")
+
+
+connection_log_schema = ConnectionLogSchema()
+alert_schema = AlertSchema()
@@ -0,0 +1,26 @@
+# server/app/schemas/user_schemas.py
+from app.models import User, RegistrationRequest
+from .base import Schema
+
+
+class UserSchema(Schema):
+    model = User
+
+
+class RegistrationRequestSchema(Schema):
+    model = RegistrationRequest
+
+    def dump(self, req):
+        return {
+            "id": str(req.id),
+            "requested_username": req.requested_username,
+            "email": req.email,
+            "full_name": req.full_name,
+            "rank": req.rank,
+            "reason": req.reason,
+            "requested_at": req.requested_at.isoformat() if req.requested_at else None,
+        }
+
+
+user_schema = UserSchema()
+registration_request_schema = RegistrationRequestSchema()
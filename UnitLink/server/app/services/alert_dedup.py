@@ -0,0 +1,152 @@
+# server/app/services/alert_dedup.py
+"""
+Дедуплікація сповіщень та виявлення "флапінгу" пристроїв.
+
+Повтори сповіщення з тим самим ключем (пристрій, важливість, причина) у межах
+ALERT_DEDUP_WINDOW_SECONDS не створюють нового рядка в alerts: у відкритого
+(непідтвердженого) сповіщення збільшується occurrence_count і оновлюється
+last_occurred_at, а клієнтам надсилається легка подія alert_updated замість new_alert.
+
+Пристрій, що змінив статус ALERT_FLAP_THRESHOLD разів за ALERT_FLAP_WINDOW_SECONDS,
+вважається нестабільним ("флапінг"): створюється одне WARNING-сповіщення, а поки
+флапінг триває, повтори згортаються незалежно від вікна дедуплікації.
+
+Відкриті сповіщення тримаються в пам'яті (ліниво завантажуються з БД), тому
+рішення "нове чи повтор" не потребує запиту до alerts.
+"""
+import collections
+import datetime
+import threading
+import uuid
+
+from app.models import Alert
+
+FLAPPING_KEY = 'flapping'
+
+
+class AlertDeduplicator:
+
+    def __init__(self):
+        self._open = None  # (device_id, severity, dedup_key) -> {'id', 'occurrence_count', 'last_occurred_at'}
+        self._transitions = collections.defaultdict(collections.deque)  # device_id -> час змін статусу
+        self._flapping = set()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.window = datetime.timedelta(seconds=app.config.get('ALERT_DEDUP_WINDOW_SECONDS', 600))
+        self.flap_window = datetime.timedelta(seconds=app.config.get('ALERT_FLAP_WINDOW_SECONDS', 600))
+        self.flap_threshold = app.config.get('ALERT_FLAP_THRESHOLD', 6)
+
+    def _ensure_loaded(self):
+        """Завантажує відкриті сповіщення пристроїв з БД (одноразово)."""
+        if self._open is not None:
+            return
+        with self._lock:
+            if self._open is not None:
+                return
+            open_alerts = {}
+            rows = (Alert.query
+                    .with_entities(Alert.id, Alert.device_id, Alert.severity, Alert.dedup_key,
+                                   Alert.occurrence_count, Alert.timestamp, Alert.last_occurred_at)
+                    # "= false", а не "IS false": так умова збігається з частковим індексом
+                    .filter_by(is_acknowledged=False)
+                    .filter(Alert.device_id.isnot(None), Alert.dedup_key.isnot(None))
+                    .order_by(Alert.timestamp)
+                    .all())
+            for alert_id, device_id, severity, dedup_key, count, timestamp, last_occurred_at in rows:
+                last = last_occurred_at or timestamp
+                if last.tzinfo is None:
+                    last = last.replace(tzinfo=datetime.timezone.utc)
+                open_alerts[(device_id, severity, dedup_key)] = {
+                    'id': alert_id, 'occurrence_count': count, 'last_occurred_at': last}
+            self._open = open_alerts
+
+    def record_transitions(self, device_ids, now):
+        """
+        Рахує зміни статусу пристроїв, не змінюючи стан: він застосовується в commit()
+        після успішного запису в БД, тож відкочений пакет не впливає на виявлення флапінгу.
+        Флапінг знімається, коли кількість змін у вікні падає нижче половини порогу.
+
+        :return: (started: {device_id: кількість змін у вікні} для пристроїв, що щойно почали
+                 "флапати", changes: {device_id: {'times', 'flapping'}}) - changes передаються
+                 в resolve() і commit()
+        """
+        started = {}
+        changes = {}
+        horizon = now - self.flap_window
+        with self._lock:
+            for device_id in device_ids:
+                current = changes.get(device_id)
+                if current is None:
+                    current = {'times': list(self._transitions.get(device_id, ())),
+                               'flapping': device_id in self._flapping}
+                times = [moment for moment in current['times'] if moment >= horizon] + [now]
+                flapping = current['flapping']
+                if flapping:
+                    if len(times) < self.flap_threshold // 2:
+                        flapping = False
+                elif len(times) >= self.flap_threshold:
+                    flapping = True
+                    started[device_id] = len(times)
+                changes[device_id] = {'times': times, 'flapping': flapping}
+        return started, changes
+
+    def resolve(self, candidates, now, transitions=None):
+        """
+        Розділяє кандидатів у сповіщення на нові та повтори відкритих.
+
+        :param candidates: список (device_id, severity: AlertSeverity, dedup_key, message)
+        :param transitions: changes з record_transitions() цього ж пакета
+        :return: (new_alerts: [Alert], bumps: {alert_id: кількість повторів}, changes) -
+                 changes ({ключ: стан відкритого сповіщення}) передаються в commit()
+                 після успішного запису в БД
+        """
+        self._ensure_loaded()
+        new_alerts = []
+        bumps = collections.Counter()
+        changes = {}
+        transitions = transitions or {}
+        for device_id, severity, dedup_key, message in candidates:
+            key = (device_id, severity, dedup_key)
+            current = changes.get(key) or self._open.get(key)
+            flapping = transitions[device_id]['flapping'] if device_id in transitions else device_id in self._flapping
+            if current and (now - current['last_occurred_at'] <= self.window or flapping):
+                bumps[current['id']] += 1
+                changes[key] = {'id': current['id'], 'occurrence_count': current['occurrence_count'] + 1,
+                                'last_occurred_at': now}
+                continue
+            alert = Alert(id=uuid.uuid4(), timestamp=now, last_occurred_at=now, updated_at=now, occurrence_count=1,
+                          device_id=device_id, severity=severity, dedup_key=dedup_key, message=message)
+            new_alerts.append(alert)
+            changes[key] = {'id': alert.id, 'occurrence_count': 1, 'last_occurred_at': now}
+        return new_alerts, dict(bumps), changes
+
+    def commit(self, changes, transitions=None):
+        """Застосовує зміни resolve() і record_transitions() після успішного commit у БД."""
+        with self._lock:
+            if changes:
+                self._open.update(changes)
+            for device_id, state in (transitions or {}).items():
+                self._transitions[device_id] = collections.deque(state['times'])
+                if state['flapping']:
+                    self._flapping.add(device_id)
+                else:
+                    self._flapping.discard(device_id)
+
+    def close(self, alert_ids):
+        """Прибирає підтверджені сповіщення: наступний повтор створить нове."""
+        if self._open is None:
+            return
+        alert_ids = set(alert_ids)
+        with self._lock:
+            self._open = {key: value for key, value in self._open.items() if value['id'] not in alert_ids}
+
+    def forget_device(self, device_id):
+        with self._lock:
+            self._transitions.pop(device_id, None)
+            self._flapping.discard(device_id)
+            if self._open is not None:
+                self._open = {key: value for key, value in self._open.items() if key[0] != device_id}
+
+
+alert_dedup = AlertDeduplicator()
@@ -0,0 +1,55 @@
+# server/app/services/background.py
+"""Допоміжні засоби для фонових потоків сервісів."""
+import atexit
+import threading
+
+
+class PeriodicTask:
+    """
+    Викликає func() в контексті додатку кожні `interval` секунд у фоновому потоці.
+    Потік стартує ліниво (start() можна викликати багато разів), а при завершенні
+    процесу func() виконується ще раз, щоб скинути накопичені дані.
+    """
+
+    def __init__(self, name, func):
+        self.name = name
+        self.func = func
+        self.app = None
+        self.interval = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self, app, interval):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self.app = app
+            self.interval = interval
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def stop(self):
+        """Зупиняє потік і виконує завершальний виклик func()."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._stop.set()
+        thread.join()
+        self._call()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._call()
+
+    def _call(self):
+        try:
+            with self.app.app_context():
+                self.func()
+        except Exception as e:
+            self.app.logger.error(f"Background task '{self.name}' failed: {e}")
@@ -0,0 +1,127 @@
+# server/app/services/cluster_index.py
+"""
+Ієрархічна сітка кластерів пристроїв для карти.
+
+Кластер масштабу карти zoom - комірка сітки тайлів Web Mercator рівня
+zoom + CLUSTER_CELL_ZOOM_OFFSET (при зсуві 2 тайл 256 px ділиться на 4x4 комірки
+по 64 px). Рівні вкладені: комірка (x, y) рівня L належить комірці (x >> 1, y >> 1)
+рівня L - 1, тож для точки достатньо координат найдрібнішого рівня.
+
+Кожна комірка кожного рівня зберігає агрегати: кількість, суми координат (центр
+кластера - середнє), кількість за статусом і типом підрозділу. Додавання,
+видалення, переміщення чи зміна статусу пристрою змінює по одній комірці на
+рівень - O(кількість рівнів), без перебудови. Запит кластерів для області лише
+читає готові комірки.
+
+Не потокобезпечна сама по собі: нею володіє DeviceRegistry.
+"""
+import collections
+import math
+
+# Межа широти проєкції Web Mercator
+_MAX_MERCATOR_LAT = 85.05112878
+
+
+class _Cell:
+    __slots__ = ('count', 'lat_sum', 'lon_sum', 'statuses', 'unit_types')
+
+    def __init__(self):
+        self.count = 0
+        self.lat_sum = 0.0
+        self.lon_sum = 0.0
+        self.statuses = collections.Counter()
+        self.unit_types = collections.Counter()
+
+
+def tile_xy(lat, lon, level):
+    """Координати тайла Web Mercator рівня level, що містить точку."""
+    lat = max(-_MAX_MERCATOR_LAT, min(_MAX_MERCATOR_LAT, lat))
+    n = 1 << level
+    x = int((lon + 180.0) / 360.0 * n)
+    lat_rad = math.radians(lat)
+    y = int((1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+class ClusterGrid:
+    """Агрегати пристроїв по комірках рівнів 0..max_level."""
+
+    def __init__(self, max_zoom=14, cell_zoom_offset=2):
+        self.max_zoom = max_zoom
+        self.cell_zoom_offset = cell_zoom_offset
+        self.max_level = max_zoom + cell_zoom_offset
+        self._levels = [{} for _ in range(self.max_level + 1)]  # рівень -> {(x, y): _Cell}
+        self._points = {}  # ключ -> (x, y найдрібнішого рівня, lat, lon, статус, тип)
+
+    def clear(self):
+        self._levels = [{} for _ in range(self.max_level + 1)]
+        self._points.clear()
+
+    def update(self, key, lat, lon, status, unit_type):
+        """Додає пристрій або враховує його переміщення / зміну статусу чи типу."""
+        if lat is None or lon is None:
+            self.remove(key)
+            return
+        x, y = tile_xy(lat, lon, self.max_level)
+        point = (x, y, lat, lon, status, unit_type)
+        previous = self._points.get(key)
+        if previous == point:
+            return
+        if previous is not None:
+            self._apply(previous, -1)
+        self._points[key] = point
+        self._apply(point, 1)
+
+    def remove(self, key):
+        previous = self._points.pop(key, None)
+        if previous is not None:
+            self._apply(previous, -1)
+
+    def _apply(self, point, sign):
+        x, y, lat, lon, status, unit_type = point
+        for level in range(self.max_level, -1, -1):
+            shift = self.max_level - level
+            cells = self._levels[level]
+            cell_key = (x >> shift, y >> shift)
+            cell = cells.get(cell_key)
+            if cell is None:
+                cell = cells[cell_key] = _Cell()
+            cell.count += sign
+            cell.lat_sum += sign * lat
+            cell.lon_sum += sign * lon
+            cell.statuses[status] += sign
+            cell.unit_types[unit_type] += sign
+            if cell.count <= 0:
+                del cells[cell_key]
+            else:
+                if cell.statuses[status] <= 0:
+                    del cell.statuses[status]
+                if cell.unit_types[unit_type] <= 0:
+                    del cell.unit_types[unit_type]
+
+    def clusters(self, zoom, min_lat=-90.0, min_lon=-180.0, max_lat=90.0, max_lon=180.0):
+        """
+        Кластери масштабу zoom, комірки яких перетинають прямокутник.
+        :return: [{'id': 'рівень/x/y', 'position': [lat, lon], 'count', 'statuses', 'unit_types'}]
+        """
+        level = min(max(int(zoom), 0) + self.cell_zoom_offset, self.max_level)
+        cells = self._levels[level]
+        # y тайлів зростає на південь
+        min_x, min_y = tile_xy(max_lat, min_lon, level)
+        max_x, max_y = tile_xy(min_lat, max_lon, level)
+        if (max_x - min_x + 1) * (max_y - min_y + 1) > len(cells):
+            keys = [key for key in cells if min_x <= key[0] <= max_x and min_y <= key[1] <= max_y]
+        else:
+            keys = [(x, y) for x in range(min_x, max_x + 1) for y in range(min_y, max_y + 1) if (x, y) in cells]
+
+        result = []
+        for x, y in keys:
+            cell = cells[(x, y)]
+            result.append({
+                'id': f"{level}/{x}/{y}",
+                'position': [cell.lat_sum / cell.count, cell.lon_sum / cell.count],
+                'count': cell.count,
+                'statuses': dict(cell.statuses),
+                'unit_types': dict(cell.unit_types),
+            })
+        return result
@@ -0,0 +1,373 @@
+# server/app/services/device_registry.py
+"""
+Реєстр стану пристроїв у пам'яті процесу.
+
+Дозволяє конвеєру телеметрії відповісти на питання "чи існує пристрій і який
+у нього поточний статус" без запиту до БД. Реєстр завантажується з БД при
+першому зверненні (а не в create_app, щоб `flask db upgrade` працював на
+порожній БД) і підтримується в актуальному стані адмінськими ендпоінтами
+add_device/update_device/delete_device.
+
+Версія парку (version) зростає лише при зміні статусу пристрою та адмінських змінах
+(додавання, редагування, видалення). last_seen з heartbeat-ів версію не змінює - ні
+в пам'яті, ні при збереженні в БД: інакше парк, що надсилає heartbeat-и, скидав би
+щокілька секунд ETag зведень і кластерів та журнал змін. Оновлення last_seen рахує
+окремий лічильник; ETag списку пристроїв (list_etag) складається з обох, тож список
+кешується вже серіалізованим (див. device_routes.get_all_devices), але ніколи не
+віддається із застарілим last_seen.
+
+Журнал змін - обмежена (DEVICE_CHANGES_JOURNAL_SIZE) черга пар (версія, device_id),
+записи в нього додаються разом зі зміною версії. За ним клієнт після перепідключення
+отримує лише пристрої, змінені або видалені після відомої йому версії (changes_since);
+якщо версія старіша за журнал або з іншого екземпляра процесу - повний список.
+Оновлення лише last_seen (heartbeat-и та їх збереження) в журнал не потрапляють:
+інакше кожен інтервал збереження витісняв би з журналу записи про реальні зміни.
+
+Позиції пристроїв індексуються сіткою (app/services/spatial_index.py) для відбору
+за видимою областю карти або радіусом (within_bbox / within_radius), а також
+ієрархічною сіткою кластерів (app/services/cluster_index.py) з лічильниками за
+статусом і типом - вона оновлюється разом зі станом пристрою (clusters).
+Область пристрою (devices.region) індексується словником область -> пристрої
+для фільтра region= і зведень за областями (in_region / region_summary).
+
+Реєстр також накопичує last_seen пристроїв, від яких надходили heartbeat-и,
+і періодично зберігає їх одним UPDATE замість запису в таблицю devices на кожен
+heartbeat.
+
+Реєстр локальний для процесу: сервер запускається одним процесом (socketio.run).
+"""
+import collections
+import datetime
+import threading
+import uuid
+
+from sqlalchemy import case, update
+
+from app import db
+from app.models import Device, DeviceStatus
+from app.services.background import PeriodicTask
+from app.services.cluster_index import ClusterGrid
+from app.services.spatial_index import GridIndex
+
+# Скільки пристроїв оновлювати одним UPDATE ... CASE
+_LAST_SEEN_CHUNK_SIZE = 500
+
+
+def _is_newer(last_seen, than):
+    """Чи last_seen (ISO-рядок) пізніший за than; None - відсутнє значення."""
+    if last_seen is None:
+        return False
+    if than is None:
+        return True
+    return _as_utc(last_seen) > _as_utc(than)
+
+
+def _as_utc(value):
+    moment = datetime.datetime.fromisoformat(value)
+    # SQLite повертає час без часового поясу
+    return moment if moment.tzinfo is not None else moment.replace(tzinfo=datetime.timezone.utc)
+
+
+class DeviceRegistry:
+    """Потокобезпечний словник device_id -> серіалізований стан пристрою (як Device.to_dict())."""
+
+    def __init__(self):
+        self.app = None
+        self._devices = {}
+        self._dirty_last_seen = {}  # device_id -> datetime, ще не збережені в БД
+        self._loaded = False
+        self._version = 0
+        self._seen_version = 0  # Лічильник оновлень last_seen (лише для list_etag)
+        self._journal = collections.deque()  # (версія, device_id) у порядку зростання версії
+        self._journal_floor = 0  # Зміни після цієї версії журнал містить повністю
+        self._journal_size = 50000
+        self._spatial = GridIndex()
+        self._clusters = ClusterGrid()
+        self._by_region = collections.defaultdict(set)  # код області -> device_id
+        self._region_of = {}  # device_id -> код області
+        # Версія рахується з нуля в кожному процесі: ідентифікатор екземпляра в ETag
+        # не дає старому ETag збігтися з новою версією після перезапуску
+        self._instance_id = uuid.uuid4().hex[:12]
+        self._lock = threading.RLock()
+        self._flusher = PeriodicTask('last-seen-flusher', self.flush_last_seen)
+
+    def init_app(self, app):
+        self.app = app
+        self.flush_interval = app.config.get('LAST_SEEN_FLUSH_INTERVAL_SECONDS', 10.0)
+        self._journal_size = app.config.get('DEVICE_CHANGES_JOURNAL_SIZE', 50000)
+        self._spatial = GridIndex(app.config.get('DEVICE_GRID_CELL_DEGREES', 0.25))
+        self._clusters = ClusterGrid(app.config.get('CLUSTER_MAX_ZOOM', 14),
+                                     app.config.get('CLUSTER_CELL_ZOOM_OFFSET', 2))
+
+    def load(self):
+        """(Пере)завантажує реєстр з БД одним запитом."""
+        devices = Device.query.all()
+        with self._lock:
+            self._devices = {device.id: device.to_dict() for device in devices}
+            self._spatial.clear()
+            self._clusters.clear()
+            self._by_region.clear()
+            self._region_of.clear()
+            for device_id, state in self._devices.items():
+                self._index(device_id, state)
+            self._loaded = True
+            self._version += 1
+            # Після перезавантаження невідомо, що змінилось: старішим версіям - повний список
+            self._journal.clear()
+            self._journal_floor = self._version
+        if self.app:
+            self.app.logger.info(f"Device registry loaded with {len(devices)} device(s).")
+
+    def _bump(self, device_ids):
+        """
+        Нова версія парку зі зміною пристроїв device_ids (викликається під self._lock).
+        Лише для змін статусу та адмінських змін - не для last_seen (див. опис модуля).
+        """
+        self._version += 1
+        for device_id in device_ids:
+            self._journal.append((self._version, device_id))
+        while len(self._journal) > self._journal_size:
+            self._journal_floor = self._journal.popleft()[0]
+
+    def _index(self, device_id, state):
+        """Оновлює просторові індекси за станом пристрою (викликається під self._lock)."""
+        lat, lon = state['position']
+        self._spatial.insert(device_id, lat, lon)
+        self._clusters.update(device_id, lat, lon, state['status'], state['unit_type'])
+        self._set_region(device_id, state.get('region'))
+
+    def _set_region(self, device_id, region):
+        previous = self._region_of.get(device_id)
+        if previous == region:
+            return
+        if previous is not None:
+            self._by_region[previous].discard(device_id)
+            if not self._by_region[previous]:
+                del self._by_region[previous]
+            del self._region_of[device_id]
+        if region is not None:
+            self._by_region[region].add(device_id)
+            self._region_of[device_id] = region
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self.load()
+
+    def get(self, device_id):
+        """Повертає копію стану пристрою або None, якщо його немає в реєстрі."""
+        self._ensure_loaded()
+        with self._lock:
+            state = self._devices.get(device_id)
+            return dict(state) if state is not None else None
+
+    def get_many(self, device_ids):
+        """Повертає {device_id: копія стану} для відомих реєстру пристроїв."""
+        self._ensure_loaded()
+        with self._lock:
+            return {device_id: dict(self._devices[device_id])
+                    for device_id in device_ids if device_id in self._devices}
+
+    def snapshot(self):
+        """Копії станів усіх пристроїв."""
+        self._ensure_loaded()
+        with self._lock:
+            return [dict(state) for state in self._devices.values()]
+
+    def etag(self):
+        """ETag поточної версії парку (без лапок)."""
+        self._ensure_loaded()
+        with self._lock:
+            return f"{self._instance_id}-{self._version}"
+
+    def list_etag(self):
+        """ETag списку пристроїв: версія парку і лічильник оновлень last_seen (без лапок)."""
+        self._ensure_loaded()
+        with self._lock:
+            return f"{self._instance_id}-{self._version}.{self._seen_version}"
+
+    def versioned_snapshot(self):
+        """(ETag, копії станів усіх пристроїв) - узгоджені між собою."""
+        self._ensure_loaded()
+        with self._lock:
+            return f"{self._instance_id}-{self._version}", [dict(state) for state in self._devices.values()]
+
+    def changes_since(self, etag):
+        """
+        Зміни після версії `etag` (значення etag()/version з попередньої відповіді).
+        :return: (поточний ETag, змінені стани, id видалених) або
+                 (поточний ETag, None, None), якщо потрібен повний список.
+        """
+        self._ensure_loaded()
+        instance_id, _, version = (etag or '').rpartition('-')
+        with self._lock:
+            current = f"{self._instance_id}-{self._version}"
+            if instance_id != self._instance_id or not version.isdigit() or int(version) > self._version \
+                    or int(version) < self._journal_floor:
+                return current, None, None
+            version = int(version)
+            changed_ids = set()
+            for entry_version, device_id in reversed(self._journal):
+                if entry_version <= version:
+                    break
+                changed_ids.add(device_id)
+            states = [dict(self._devices[device_id]) for device_id in changed_ids if device_id in self._devices]
+            deleted = [device_id for device_id in changed_ids if device_id not in self._devices]
+            return current, states, deleted
+
+    def within_bbox(self, min_lat, min_lon, max_lat, max_lon):
+        """(ETag, копії станів пристроїв у прямокутнику)."""
+        self._ensure_loaded()
+        with self._lock:
+            device_ids = self._spatial.within_bbox(min_lat, min_lon, max_lat, max_lon)
+            return f"{self._instance_id}-{self._version}", [dict(self._devices[device_id]) for device_id in device_ids]
+
+    def within_radius(self, lat, lon, radius_km):
+        """(ETag, [(копія стану, відстань_км)]) для пристроїв у радіусі, від найближчого."""
+        self._ensure_loaded()
+        with self._lock:
+            found = self._spatial.within_radius(lat, lon, radius_km)
+            return (f"{self._instance_id}-{self._version}",
+                    [(dict(self._devices[device_id]), distance) for device_id, distance in found])
+
+    def clusters(self, zoom, min_lat=-90.0, min_lon=-180.0, max_lat=90.0, max_lon=180.0):
+        """(ETag, кластери масштабу zoom у прямокутнику) - див. ClusterGrid.clusters."""
+        self._ensure_loaded()
+        with self._lock:
+            return (f"{self._instance_id}-{self._version}",
+                    self._clusters.clusters(zoom, min_lat, min_lon, max_lat, max_lon))
+
+    def in_region(self, region):
+        """(ETag, копії станів пристроїв області)."""
+        self._ensure_loaded()
+        with self._lock:
+            return (f"{self._instance_id}-{self._version}",
+                    [dict(self._devices[device_id]) for device_id in self._by_region.get(region, ())])
+
+    def region_summary(self):
+        """
+        (ETag, {код області: {'total', 'statuses': {статус: кількість}}}, те саме для пристроїв без області).
+        Рахується за збереженим призначенням, без геометрії.
+        """
+        self._ensure_loaded()
+        with self._lock:
+            summary = {}
+            for region, device_ids in self._by_region.items():
+                statuses = collections.Counter(self._devices[device_id]['status'] for device_id in device_ids)
+                summary[region] = {'total': len(device_ids), 'statuses': dict(statuses)}
+            unassigned = collections.Counter(state['status'] for device_id, state in self._devices.items()
+                                             if device_id not in self._region_of)
+            return (f"{self._instance_id}-{self._version}", summary,
+                    {'total': sum(unassigned.values()), 'statuses': dict(unassigned)})
+
+    def status_of(self, device_id):
+        """Поточний статус пристрою (DeviceStatus) або None, якщо пристрою немає."""
+        state = self.get(device_id)
+        return DeviceStatus[state['status']] if state else None
+
+    def name_of(self, device_id):
+        """Ім'я (позивний) пристрою або None - для серіалізації логів і сповіщень без звернення до БД."""
+        self._ensure_loaded()
+        with self._lock:
+            state = self._devices.get(device_id)
+            return state['name'] if state is not None else None
+
+    def upsert(self, device):
+        """Додає або оновлює пристрій з ORM-об'єкта (викликається після commit)."""
+        self._ensure_loaded()
+        state = device.to_dict()
+        with self._lock:
+            # Не відкочуємо last_seen, який ще чекає на збереження
+            if device.id in self._dirty_last_seen:
+                state['last_seen'] = self._dirty_last_seen[device.id].isoformat()
+            self._devices[device.id] = state
+            self._index(device.id, state)
+            self._bump([device.id])
+
+    def apply(self, states):
+        """
+        Зливає в реєстр результат конвеєра телеметрії після commit: {device_id: стан, прочитаний
+        до транзакції}. Береться лише те, що змінює конвеєр - status і новіший last_seen; решта
+        полів (ім'я, координати, область), змінена адміном паралельно, не перезаписується.
+        :return: {device_id: копія злитого стану} для пристроїв, що досі є в реєстрі
+        """
+        with self._lock:
+            changed = []
+            merged = {}
+            for device_id, state in states.items():
+                current = self._devices.get(device_id)
+                # Пристрій могли видалити паралельно - не "воскрешаємо" його
+                if current is None:
+                    continue
+                if _is_newer(state.get('last_seen'), current.get('last_seen')):
+                    current['last_seen'] = state['last_seen']
+                    self._seen_version += 1
+                if current['status'] != state['status']:
+                    current['status'] = state['status']
+                    changed.append(device_id)
+                    self._index(device_id, current)
+                merged[device_id] = dict(current)
+            if changed:
+                self._bump(changed)
+            return merged
+
+    def remove(self, device_id):
+        with self._lock:
+            if self._devices.pop(device_id, None) is not None:
+                self._spatial.remove(device_id)
+                self._clusters.remove(device_id)
+                self._set_region(device_id, None)
+                self._bump([device_id])
+            self._dirty_last_seen.pop(device_id, None)
+
+    # --- Відкладене збереження last_seen ---
+
+    def mark_seen(self, device_ids, seen_at):
+        """Запам'ятовує last_seen для пристроїв; у БД він потрапить при наступному flush_last_seen()."""
+        with self._lock:
+            for device_id in device_ids:
+                if device_id in self._devices:
+                    self._devices[device_id]['last_seen'] = seen_at.isoformat()
+                    self._dirty_last_seen[device_id] = seen_at
+            self._seen_version += 1
+        self._flusher.start(self.app, self.flush_interval)
+
+    def pending_last_seen(self, device_ids=None):
+        """Незбережені значення last_seen: {device_id: datetime}."""
+        with self._lock:
+            if device_ids is None:
+                return dict(self._dirty_last_seen)
+            return {device_id: self._dirty_last_seen[device_id]
+                    for device_id in device_ids if device_id in self._dirty_last_seen}
+
+    def flush_last_seen(self):
+        """Зберігає накопичені last_seen у БД (один UPDATE ... CASE на кожні 500 пристроїв)."""
+        with self._lock:
+            dirty, self._dirty_last_seen = self._dirty_last_seen, {}
+        if not dirty:
+            return 0
+
+        items = list(dirty.items())
+        try:
+            for start in range(0, len(items), _LAST_SEEN_CHUNK_SIZE):
+                chunk = dict(items[start:start + _LAST_SEEN_CHUNK_SIZE])
+                db.session.execute(
+                    update(Device)
+                    .where(Device.id.in_(chunk.keys()))
+                    .values(last_seen=case(chunk, value=Device.id))
+                    .execution_options(synchronize_session=False)
+                )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            # Повертаємо значення назад, не перезаписуючи новіші
+            with self._lock:
+                for device_id, seen_at in dirty.items():
+                    if device_id in self._devices and device_id not in self._dirty_last_seen:
+                        self._dirty_last_seen[device_id] = seen_at
+            raise
+        return len(dirty)
+
+
+device_registry = DeviceRegistry()
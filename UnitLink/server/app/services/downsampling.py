@@ -0,0 +1,100 @@
+# server/app/services/downsampling.py
+"""
+Зменшення кількості точок часових рядів для графіків (Largest-Triangle-Three-Buckets).
+
+LTTB ділить ряд на max_points - 2 інтервали і з кожного бере точку, що утворює
+найбільший трикутник з попередньою вибраною точкою та середнім наступного
+інтервалу. На відміну від усереднення, поодинокі піки (затримка, втрата пакетів)
+зберігаються. Обчислення в межах інтервалу векторизовані (NumPy).
+
+Для набору метрик з однією віссю часу (рядки історії) LTTB виконується для кожної
+метрики окремо, а у відповідь ідуть реальні рядки з об'єднання вибраних індексів;
+бюджет, що звільнився через спільні точки метрик, перерозподіляється, тож рядків
+повертається рівно max_points.
+"""
+import datetime
+
+import numpy as np
+
+
+def lttb_indices(x, y, max_points):
+    """
+    Індекси точок, які залишає LTTB.
+
+    :param x: np.ndarray зростаючих значень осі X (float)
+    :param y: np.ndarray значень (float, без NaN)
+    :param max_points: бажана кількість точок (>= 3)
+    :return: np.ndarray індексів (зростаючих), завжди з першою та останньою точкою
+    """
+    n = len(x)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+
+    # Межі інтервалів для внутрішніх точок (перша та остання точки - окремо)
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    # Середні інтервалів через кумулятивні суми - одним проходом для всіх інтервалів
+    cum_x = np.concatenate(([0.0], np.cumsum(x)))
+    cum_y = np.concatenate(([0.0], np.cumsum(y)))
+    next_starts = np.append(edges[1:-1], n - 1)
+    next_ends = np.append(edges[2:], n)
+    counts = np.maximum(next_ends - next_starts, 1)
+    avg_x = (cum_x[next_ends] - cum_x[next_starts]) / counts
+    avg_y = (cum_y[next_ends] - cum_y[next_starts]) / counts
+
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for bucket in range(max_points - 2):
+        start, end = edges[bucket], max(edges[bucket + 1], edges[bucket] + 1)
+        bx, by = x[start:end], y[start:end]
+        # Подвоєна площа трикутника (a, точка інтервалу, середнє наступного інтервалу)
+        areas = np.abs((x[a] - avg_x[bucket]) * (by - y[a]) - (x[a] - bx) * (avg_y[bucket] - y[a]))
+        a = start + int(np.argmax(areas))
+        selected[bucket + 1] = a
+    return selected
+
+
+def downsample_rows(rows, metrics, max_points):
+    """
+    Зменшує список рядків (словники з 'timestamp' в ISO-форматі та метриками) до max_points.
+    Кожна метрика з даними отримує рівну частку бюджету; None-значення в LTTB не беруть участі.
+    Менше max_points рядків буває, лише якщо метрики мають дані не в усіх рядках.
+    """
+    if max_points is None or len(rows) <= max_points:
+        return rows
+
+    x = np.fromiter((datetime.datetime.fromisoformat(row['timestamp']).timestamp() for row in rows),
+                    dtype=np.float64, count=len(rows))
+    series = []
+    for metric in metrics:
+        y = np.array([row[metric] for row in rows], dtype=np.float64)  # None -> NaN
+        present = np.flatnonzero(~np.isnan(y))
+        if len(present):
+            series.append((y, present))
+
+    last = len(rows) - 1
+    budget = max(3, max_points // max(len(series), 1))
+    indices = _union_of_lttb(x, series, budget, last)
+    # Точки різних метрик частково збігаються, тож об'єднання менше за max_points:
+    # невикористаний бюджет ділимо між метриками ще раз, поки не заповнимо його
+    longest = max((len(present) for _, present in series), default=0)
+    while len(indices) < max_points and budget < longest:
+        step = max(1, (max_points - len(indices)) // len(series))
+        candidate = _union_of_lttb(x, series, budget + step, last)
+        if len(candidate) > max_points:
+            # Перебір: з нових точок беремо рівномірно стільки, скільки бракує
+            extra = np.setdiff1d(candidate, indices)
+            need = max_points - len(indices)
+            indices = np.union1d(indices, extra[np.linspace(0, len(extra) - 1, need).round().astype(np.int64)])
+            break
+        budget, indices = budget + step, candidate
+    return [rows[i] for i in indices]
+
+
+def _union_of_lttb(x, series, budget, last):
+    """Відсортоване об'єднання індексів LTTB усіх метрик (плюс перший і останній рядки)."""
+    keep = [np.array([0, last])]
+    for y, present in series:
+        keep.append(present[lttb_indices(x[present], y[present], budget)])
+    return np.unique(np.concatenate(keep))
@@ -0,0 +1,204 @@
+# server/app/services/heartbeat_watchdog.py
+"""
+Сторож heartbeat-ів: переводить у OFFLINE пристрої, які замовкли.
+
+Для кожного активного пристрою зберігається дедлайн (last_seen + HEARTBEAT_TIMEOUT_SECONDS)
+у купі (heapq). Heartbeat лише додає новий запис у купу - O(log n), старі записи
+відкидаються ліниво при вилученні. Фоновий потік спить до найближчого дедлайну,
+тож сканування таблиці devices не потрібне. Прострочені пристрої проходять через
+ingest_status_updates зі статусом OFFLINE, тому лог DISCONNECTED, CRITICAL-сповіщення
+та подія unit_status_update формуються так само, як для явного OFFLINE. Перед цим
+last_seen пристрою в реєстрі ще раз звіряється з дедлайном: heartbeat, що надійшов
+між вилученням дедлайну і записом OFFLINE, скасовує перехід.
+
+Пристрої, переведені в OFFLINE сторожем (а не власним повідомленням), запам'ятовуються:
+перший прийнятий від такого пристрою запис повертає його в ONLINE навіть без поля
+status (див. ingest_status_updates), і сторож знову ставить його на облік. Після
+перезапуску цей перелік відновлюється з журналу змін статусу.
+"""
+import atexit
+import datetime
+import heapq
+import threading
+import time
+import uuid
+
+from sqlalchemy import select
+
+from app import db
+from app.models import ConnectionLog, Device, DeviceStatus, LogEventType
+
+
+def _last_seen_timestamp(state):
+    """last_seen стану пристрою з реєстру в секундах Unix (0 - пристрій ще не виходив на зв'язок)."""
+    if not state['last_seen']:
+        return 0
+    last_seen = datetime.datetime.fromisoformat(state['last_seen'])
+    if last_seen.tzinfo is None:
+        last_seen = last_seen.replace(tzinfo=datetime.timezone.utc)
+    return last_seen.timestamp()
+
+
+class HeartbeatWatchdog:
+
+    def __init__(self):
+        self.app = None
+        self._heap = []  # (дедлайн, секунди Unix; device_id)
+        self._deadlines = {}  # device_id -> актуальний дедлайн
+        self._silenced = set()  # Пристрої, переведені сторожем у OFFLINE
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopping = False
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('HEARTBEAT_WATCHDOG_ENABLED', True)
+        self.timeout = app.config.get('HEARTBEAT_TIMEOUT_SECONDS', 90)
+
+    def start(self):
+        """Запускає фоновий потік і ставить на облік активні пристрої з реєстру. Потрібен контекст додатку."""
+        if not self.enabled or self._thread is not None:
+            return
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._seed()
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='heartbeat-watchdog', daemon=True)
+            self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        with self._cond:
+            thread, self._thread = self._thread, None
+            self._stopping = True
+            self._cond.notify_all()
+        if thread is not None:
+            thread.join()
+
+    def heartbeat(self, device_ids, seen_at):
+        """Переносить дедлайн пристроїв на seen_at + timeout."""
+        if not self.enabled or self._stopping:
+            return
+        self.start()
+        deadline = seen_at.timestamp() + self.timeout
+        with self._cond:
+            wake = not self._heap or deadline < self._heap[0][0]
+            for device_id in device_ids:
+                self._deadlines[device_id] = deadline
+                self._silenced.discard(device_id)
+                heapq.heappush(self._heap, (deadline, device_id))
+            # Застарілі записи прибираються при вилученні; якщо їх надто багато - перебудовуємо купу
+            if len(self._heap) > 2 * len(self._deadlines) + 1024:
+                self._heap = [(d, device_id) for device_id, d in self._deadlines.items()]
+                heapq.heapify(self._heap)
+            if wake:
+                self._cond.notify()
+
+    def forget(self, device_ids):
+        """Знімає пристрої з обліку (OFFLINE або видалені)."""
+        with self._cond:
+            for device_id in device_ids:
+                self._deadlines.pop(device_id, None)
+                self._silenced.discard(device_id)
+
+    def silenced(self, device_ids):
+        """Запам'ятовує пристрої, які сторож перевів у OFFLINE (викликається після commit)."""
+        with self._cond:
+            self._silenced.update(device_ids)
+
+    def is_silenced(self, device_id):
+        """Чи пристрій в OFFLINE через сторожа, а не через власне повідомлення."""
+        with self._cond:
+            return device_id in self._silenced
+
+    # --- Внутрішня логіка ---
+
+    def _seed(self):
+        from app.services.device_registry import device_registry
+        now = time.time()
+        for state in device_registry.snapshot():
+            if state['status'] not in (DeviceStatus.ONLINE.name, DeviceStatus.UNSTABLE.name):
+                continue
+            # Після простою сервера даємо пристроям повний таймаут, щоб вийти на зв'язок
+            deadline = max(_last_seen_timestamp(state), now) + self.timeout
+            device_id = uuid.UUID(state['id'])
+            self._deadlines[device_id] = deadline
+            self._heap.append((deadline, device_id))
+        heapq.heapify(self._heap)
+        self._silenced.update(self._load_silenced())
+
+    def _load_silenced(self):
+        """OFFLINE-пристрої, остання зміна статусу яких записана сторожем (details.source)."""
+        last_change = (select(ConnectionLog.details)
+                       .where(ConnectionLog.device_id == Device.id,
+                              ConnectionLog.event_type.in_([LogEventType.DISCONNECTED, LogEventType.STATUS_CHANGE]))
+                       .order_by(ConnectionLog.timestamp.desc(), ConnectionLog.id.desc())
+                       .limit(1).correlate(Device).scalar_subquery())
+        rows = db.session.execute(select(Device.id, last_change).where(Device.status == DeviceStatus.OFFLINE))
+        return {device_id for device_id, details in rows if details and details.get('source') == 'watchdog'}
+
+    def _pop_expired(self):
+        """Чекає на найближчий дедлайн і повертає список прострочених пристроїв."""
+        with self._cond:
+            while not self._stopping:
+                now = time.time()
+                expired = []
+                while self._heap and self._heap[0][0] <= now:
+                    deadline, device_id = heapq.heappop(self._heap)
+                    # Запис актуальний, лише якщо після нього не було heartbeat-ів
+                    if self._deadlines.get(device_id) == deadline:
+                        del self._deadlines[device_id]
+                        expired.append(device_id)
+                if expired:
+                    return expired
+                self._cond.wait(self._heap[0][0] - now if self._heap else None)
+            return []
+
+    def _still_silent(self, device_ids):
+        """
+        Пристрої, що досі мовчать за last_seen реєстру. Для решти (heartbeat надійшов після
+        вилучення дедлайну) дедлайн відновлюється, якщо його ще не переніс сам heartbeat.
+        Видалені пристрої відкидаються.
+        """
+        from app.services.device_registry import device_registry
+        now = time.time()
+        silent = []
+        for device_id, state in device_registry.get_many(device_ids).items():
+            deadline = _last_seen_timestamp(state) + self.timeout
+            if deadline <= now:
+                silent.append(device_id)
+                continue
+            with self._cond:
+                if device_id not in self._deadlines:
+                    self._deadlines[device_id] = deadline
+                    heapq.heappush(self._heap, (deadline, device_id))
+                    self._cond.notify()
+        return silent
+
+    def _run(self):
+        from app.services.ingest_service import ingest_status_updates
+        while True:
+            expired = self._pop_expired()
+            if not expired:
+                return
+            try:
+                with self.app.app_context():
+                    expired = self._still_silent(expired)
+                    if not expired:
+                        continue
+                    ingest_status_updates([(device_id, {'status': DeviceStatus.OFFLINE.name})
+                                           for device_id in expired], source='watchdog')
+                self.app.logger.info(f"Heartbeat watchdog marked {len(expired)} silent device(s) OFFLINE.")
+            except Exception as e:
+                self.app.logger.error(f"Heartbeat watchdog failed to mark {len(expired)} device(s) OFFLINE: {e}")
+                # Повторимо пізніше, якщо за цей час пристрої не вийшли на зв'язок
+                retry_at = time.time() + min(self.timeout, 30)
+                with self._cond:
+                    for device_id in expired:
+                        if device_id not in self._deadlines:
+                            self._deadlines[device_id] = retry_at
+                            heapq.heappush(self._heap, (retry_at, device_id))
+
+
+heartbeat_watchdog = HeartbeatWatchdog()
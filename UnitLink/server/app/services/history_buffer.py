@@ -0,0 +1,228 @@
+# server/app/services/history_buffer.py
+"""
+Буфер відкладеного запису (write-behind) для DeviceStatusHistory.
+
+Конвеєр обробки телеметрії кладе рядки історії в обмежену чергу в пам'яті,
+а фоновий потік скидає їх у БД пакетами (executemany або COPY на PostgreSQL)
+при досягненні порогу за розміром або за часом.
+
+Запис двофазний: `reserve` займає місце в черзі до транзакції викликача (якщо черга
+заповнена, чекає звільнення і зрештою кидає HistoryBufferFull - зворотний тиск),
+а рядки потрапляють у чергу через `submit` лише після успішного commit. При
+відкаті викликач повертає місце через `release`, тож у БД не потрапить історія
+оновлень, яких не було.
+"""
+import atexit
+import collections
+import csv
+import io
+import threading
+import time
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import Device, DeviceStatusHistory
+
+# Порядок колонок для COPY
+_COPY_COLUMNS = ('device_id', 'timestamp', 'signal_rssi', 'latency_ms', 'packet_loss_percent')
+
+
+class HistoryBufferFull(Exception):
+    """Черга запису історії заповнена, клієнт має повторити запит пізніше."""
+
+
+class HistoryWriteBuffer:
+    """Обмежена черга рядків історії з фоновим пакетним скиданням у БД."""
+
+    def __init__(self):
+        self.app = None
+        self._rows = collections.deque()
+        self._in_flight = 0  # рядки, які зараз записуються фоновим потоком
+        self._reserved = 0  # місця, зайняті транзакціями, що ще не завершились
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopping = False
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('HISTORY_BUFFER_ENABLED', True)
+        self.max_size = app.config.get('HISTORY_BUFFER_MAX_SIZE', 50000)
+        self.batch_size = app.config.get('HISTORY_FLUSH_BATCH_SIZE', 1000)
+        self.flush_interval = app.config.get('HISTORY_FLUSH_INTERVAL_SECONDS', 2.0)
+        self.submit_timeout = app.config.get('HISTORY_BUFFER_SUBMIT_TIMEOUT_SECONDS', 5.0)
+        self.use_copy = app.config.get('HISTORY_BUFFER_USE_COPY', True)
+        self.max_attempts = app.config.get('HISTORY_FLUSH_MAX_ATTEMPTS', 10)
+
+    def reserve(self, rows):
+        """
+        Резервує місце в черзі для рядків (словники з колонками DeviceStatusHistory)
+        до commit транзакції викликача. Якщо буфер вимкнено, рядки вставляються одразу
+        в поточній сесії (commit робить викликач).
+        :return: кількість зарезервованих місць - для submit після commit або release при відкаті
+        """
+        if not rows or not self.enabled:
+            if rows:
+                db.session.execute(insert(DeviceStatusHistory), rows)
+            return 0
+
+        self._ensure_started()
+        deadline = time.monotonic() + self.submit_timeout
+        with self._cond:
+            # Пакет резервується цілком або не резервується зовсім
+            while len(self._rows) + self._in_flight + self._reserved + len(rows) > self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._stopping:
+                    raise HistoryBufferFull(
+                        f"History write buffer is full ({self.max_size} rows pending).")
+                self._cond.wait(remaining)
+            self._reserved += len(rows)
+        return len(rows)
+
+    def submit(self, rows, reserved):
+        """Ставить у чергу рядки зафіксованої транзакції, займаючи зарезервоване для них місце."""
+        if not reserved:
+            return
+        with self._cond:
+            self._reserved -= reserved
+            self._rows.extend(rows)
+            if len(self._rows) >= self.batch_size:
+                self._cond.notify_all()
+
+    def release(self, reserved):
+        """Повертає місце, зарезервоване транзакцією, що відкотилась."""
+        if not reserved:
+            return
+        with self._cond:
+            self._reserved -= reserved
+            self._cond.notify_all()
+
+    def pending(self):
+        """Кількість рядків, що ще не записані в БД."""
+        with self._cond:
+            return len(self._rows) + self._in_flight
+
+    def shutdown(self):
+        """Зупиняє фоновий потік і скидає в БД усе, що залишилось у черзі."""
+        with self._cond:
+            if self._thread is None:
+                return
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join()
+        self._thread = None
+
+    # --- Внутрішня логіка ---
+
+    def _ensure_started(self):
+        # Потік стартує ліниво, щоб CLI-команди (flask db ...) не запускали зайвих потоків
+        if self._thread is not None:
+            return
+        with self._cond:
+            if self._thread is None:
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name='history-write-buffer', daemon=True)
+                self._thread.start()
+                atexit.register(self.shutdown)
+
+    def _take_batch(self):
+        """Чекає на пакет (за розміром або за часом) і забирає його з черги."""
+        with self._cond:
+            deadline = time.monotonic() + self.flush_interval
+            while len(self._rows) < self.batch_size and not self._stopping:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            count = min(len(self._rows), self.batch_size)
+            batch = [self._rows.popleft() for _ in range(count)]
+            self._in_flight = count
+            return batch
+
+    def _release(self, count):
+        with self._cond:
+            self._in_flight -= count
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if batch:
+                self._flush_with_retry(batch)
+            with self._cond:
+                if self._stopping and not self._rows:
+                    return
+
+    def _flush_with_retry(self, batch):
+        attempt = 0
+        while True:
+            try:
+                with self.app.app_context():
+                    self._write(batch)
+                break
+            except Exception as e:
+                attempt += 1
+                self.app.logger.error(f"History buffer flush of {len(batch)} rows failed (attempt {attempt}): {e}")
+                # Пакет, що не записується, не повинен вічно тримати місце в черзі (а при
+                # зупинці - саму зупинку): відкидаємо його, залишаючи рядки в логах
+                if attempt >= (3 if self._stopping else self.max_attempts):
+                    self._dead_letter(batch, attempt)
+                    break
+                time.sleep(min(self.flush_interval * attempt, 30))
+        self._release(len(batch))
+
+    def _dead_letter(self, rows, attempts):
+        self.app.logger.error(f"Dropping {len(rows)} history rows after {attempts} failed attempts.")
+        for row in rows:
+            self.app.logger.error(f"Dropped history row: {row}")
+
+    def _write(self, rows):
+        try:
+            self._bulk_insert(rows)
+            db.session.commit()
+        except IntegrityError:
+            # Пристрій могли видалити, поки рядки чекали в черзі - відкидаємо "осиротілі" рядки
+            db.session.rollback()
+            existing = {row[0] for row in db.session.query(Device.id).filter(
+                Device.id.in_({r['device_id'] for r in rows})).all()}
+            rows = [r for r in rows if r['device_id'] in existing]
+            if rows:
+                self._bulk_insert(rows)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        finally:
+            db.session.remove()
+
+    def _bulk_insert(self, rows):
+        if self.use_copy and db.engine.dialect.name == 'postgresql':
+            self._copy(rows)
+        else:
+            db.session.execute(insert(DeviceStatusHistory), rows)
+
+    def _copy(self, rows):
+        """Швидкий шлях для PostgreSQL: COPY ... FROM STDIN у форматі CSV."""
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        for row in rows:
+            # None записується як порожнє поле без лапок, що в CSV-режимі COPY означає NULL
+            writer.writerow(['' if row.get(col) is None else
+                             (row[col].isoformat() if col == 'timestamp' else row[col])
+                             for col in _COPY_COLUMNS])
+        buf.seek(0)
+        statement = (f"COPY {DeviceStatusHistory.__tablename__} ({', '.join(_COPY_COLUMNS)}) "
+                     f"FROM STDIN WITH (FORMAT csv)")
+        cursor = db.session.connection().connection.cursor()
+        try:
+            cursor.copy_expert(statement, buf)
+        except db.engine.dialect.dbapi.IntegrityError as e:
+            # Курсор драйвера кидає помилки DBAPI (psycopg2), а не SQLAlchemy -
+            # загортаємо, щоб _write відкинув рядки видалених пристроїв, як і для executemany
+            raise IntegrityError(statement, None, e) from e
+        finally:
+            cursor.close()
+
+
+history_buffer = HistoryWriteBuffer()
@@ -0,0 +1,165 @@
+# server/app/services/history_export.py
+"""
+Архівний експорт історії телеметрії та логів у колонкових форматах.
+
+Формати:
+  * parquet - Apache Parquet зі стисненням zstd (компактний, читається pandas/polars/duckdb);
+  * arrow   - Arrow IPC (Feather v2) без стиснення: файл можна відобразити в пам'ять
+              (pyarrow.memory_map + pyarrow.ipc.open_file) і читати без копіювання.
+
+Рядки читаються з курсора БД пакетами (yield_per, без ORM-об'єктів), кожен пакет
+перетворюється на стовпці і записується окремою групою рядків (record batch), тож
+пам'ять обмежена розміром пакета, а не періодом експорту. Вихід - будь-який файловий
+об'єкт або шлях; для HTTP-відповіді є iter_export, що віддає файл частинами.
+"""
+import json
+
+import pyarrow as pa
+import pyarrow.ipc
+import pyarrow.parquet as pq
+
+from app import db
+from app.models import DeviceStatusHistory, ConnectionLog
+
+EXPORT_FORMATS = {'parquet': '.parquet', 'arrow': '.arrow'}
+
+_TIMESTAMP = pa.timestamp('us', tz='UTC')
+_UUID_STRING = pa.string()
+
+
+def _uuid_str(value):
+    return str(value) if value is not None else None
+
+
+# Джерело експорту: модель, [(колонка, тип Arrow, перетворення значення або None)]
+EXPORT_SOURCES = {
+    'history': (DeviceStatusHistory, [
+        ('id', pa.int64(), None),
+        ('device_id', _UUID_STRING, _uuid_str),
+        ('timestamp', _TIMESTAMP, None),
+        ('signal_rssi', pa.int32(), None),
+        ('latency_ms', pa.int32(), None),
+        ('packet_loss_percent', pa.float64(), None),
+    ]),
+    'logs': (ConnectionLog, [
+        ('id', pa.int64(), None),
+        ('device_id', _UUID_STRING, _uuid_str),
+        ('user_id', _UUID_STRING, _uuid_str),
+        ('timestamp', _TIMESTAMP, None),
+        # Небагато різних значень - словникове кодування стискається краще
+        ('event_type', pa.dictionary(pa.int8(), pa.string()), lambda value: value.name),
+        ('message', pa.string(), None),
+        ('details', pa.string(), lambda value: json.dumps(value, ensure_ascii=False) if value is not None else None),
+    ]),
+}
+
+
+def export_schema(source):
+    _, columns = EXPORT_SOURCES[source]
+    return pa.schema([(name, arrow_type) for name, arrow_type, _ in columns])
+
+
+def export_filename(source, since, until, fmt):
+    model, _ = EXPORT_SOURCES[source]
+    return f"{model.__tablename__}_{since:%Y%m%dT%H%M}_{until:%Y%m%dT%H%M}{EXPORT_FORMATS[fmt]}"
+
+
+def _iter_batches(source, since, until, device_ids, chunk_size):
+    """Пакети рядків за період [since, until) у вигляді pyarrow.RecordBatch."""
+    model, columns = EXPORT_SOURCES[source]
+    schema = export_schema(source)
+    stmt = db.select(*[getattr(model, name) for name, _, _ in columns]).where(
+        model.timestamp >= since,
+        model.timestamp < until
+    ).order_by(model.timestamp)
+    if device_ids:
+        stmt = stmt.where(model.device_id.in_(device_ids))
+
+    result = db.session.execute(stmt, execution_options={'yield_per': chunk_size})
+    for rows in result.partitions():
+        arrays = []
+        for index, (_, arrow_type, convert) in enumerate(columns):
+            values = [row[index] for row in rows]
+            if convert is not None:
+                values = [convert(value) if value is not None else None for value in values]
+            if pa.types.is_dictionary(arrow_type):
+                arrays.append(pa.array(values, type=arrow_type.value_type).dictionary_encode().cast(arrow_type))
+            else:
+                arrays.append(pa.array(values, type=arrow_type))
+        yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _write_batches(source, sink, since, until, fmt, device_ids, chunk_size):
+    """Записує пакети в sink; після кожного повертає (yield) загальну кількість записаних рядків."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'.")
+    schema = export_schema(source)
+    if fmt == 'parquet':
+        writer = pq.ParquetWriter(sink, schema, compression='zstd')
+    else:
+        writer = pa.ipc.new_file(sink, schema)
+
+    rows = 0
+    try:
+        for batch in _iter_batches(source, since, until, device_ids, chunk_size):
+            writer.write_batch(batch)
+            rows += batch.num_rows
+            yield rows
+    finally:
+        writer.close()
+
+
+def write_export(source, sink, since, until, fmt='parquet', device_ids=None, chunk_size=50000):
+    """
+    Записує експорт джерела `source` ('history' | 'logs') за період [since, until) у sink
+    (шлях або файловий об'єкт). Повертає кількість записаних рядків.
+    """
+    rows = 0
+    for rows in _write_batches(source, sink, since, until, fmt, device_ids, chunk_size):
+        pass
+    return rows
+
+
+class _ChunkSink:
+    """Файловий об'єкт лише для запису, байти з якого забираються частинами (drain)."""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def writable(self):
+        return True
+
+    def drain(self):
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+def iter_export(source, since, until, fmt='parquet', device_ids=None, chunk_size=50000):
+    """Генерує байти файлу експорту частинами - по групі рядків (для потокової HTTP-відповіді)."""
+    sink = _ChunkSink()
+    for _ in _write_batches(source, sink, since, until, fmt, device_ids, chunk_size):
+        data = sink.drain()
+        if data:
+            yield data
+    # Решта: метадані Parquet / футер Arrow, записані при закритті
+    data = sink.drain()
+    if data:
+        yield data
@@ -0,0 +1,170 @@
+# server/app/services/history_partitions.py
+"""
+Секціонування (partitioning) device_status_history за часом та ретенція.
+
+PostgreSQL: таблиця секціонована декларативно - PARTITION BY RANGE (timestamp),
+по секції на календарний місяць (UTC): device_status_history_pYYYYMM. Секції
+створюються наперед (HISTORY_PARTITIONS_AHEAD місяців), а секція DEFAULT лише
+страхує вставку, якщо обслуговування не запускалось. Ретенція видаляє секції
+цілком (DROP TABLE) - без масового DELETE та роздування таблиці. Запити за
+останній період (get_device_history) читають лише потрібні секції.
+
+SQLite (розробка) декларативних секцій не має, тож там ретенція видаляє рядки
+пакетами за індексом timestamp.
+
+Ретенція запускається командою `flask history-retention`; у процесі сервера - лише
+якщо ввімкнено HISTORY_AUTO_RETENTION і задано HISTORY_RETENTION_DAYS. Під час
+старту сервер тільки створює секції наперед.
+"""
+import datetime
+import re
+
+from sqlalchemy import text
+
+from app import db
+from app.models import DeviceStatusHistory
+from app.services.background import PeriodicTask
+
+PARENT_TABLE = DeviceStatusHistory.__tablename__
+_PARTITION_RE = re.compile(rf'^{PARENT_TABLE}_p(\d{{4}})(\d{{2}})$')
+
+# Розмір пакета DELETE для БД без секцій
+_DELETE_BATCH_SIZE = 10000
+
+
+def month_start(moment):
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(moment, months):
+    years, month_index = divmod(moment.month - 1 + months, 12)
+    return moment.replace(year=moment.year + years, month=month_index + 1)
+
+
+def partition_name(start):
+    return f'{PARENT_TABLE}_p{start:%Y%m}'
+
+
+def is_partitioned():
+    """Чи є device_status_history секціонованою таблицею PostgreSQL."""
+    if db.engine.dialect.name != 'postgresql':
+        return False
+    relkind = db.session.execute(
+        text("SELECT relkind FROM pg_class WHERE relname = :name AND relkind IN ('r', 'p')"),
+        {'name': PARENT_TABLE}).scalar()
+    return relkind == 'p'
+
+
+def list_partitions():
+    """Місячні секції: {назва: (початок, кінець)}, кінець не включається."""
+    names = db.session.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "WHERE parent.relname = :parent"), {'parent': PARENT_TABLE}).scalars()
+    partitions = {}
+    for name in names:
+        match = _PARTITION_RE.match(name)
+        if match:
+            start = datetime.datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=datetime.timezone.utc)
+            partitions[name] = (start, add_months(start, 1))
+    return partitions
+
+
+def create_partition(start):
+    """Створює місячну секцію, що починається з start (перший день місяця, UTC)."""
+    end = add_months(start, 1)
+    db.session.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {partition_name(start)} PARTITION OF {PARENT_TABLE} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"))
+
+
+class HistoryPartitionManager:
+
+    def __init__(self):
+        self.app = None
+        self._maintainer = PeriodicTask('history-partitions', self.maintain)
+
+    def init_app(self, app):
+        self.app = app
+        self.retention_days = app.config.get('HISTORY_RETENTION_DAYS', 0)
+        self.auto_retention = app.config.get('HISTORY_AUTO_RETENTION', False)
+        self.months_ahead = app.config.get('HISTORY_PARTITIONS_AHEAD', 2)
+        self.maintenance_interval = app.config.get('HISTORY_MAINTENANCE_INTERVAL_SECONDS', 6 * 3600)
+
+    def start(self):
+        """
+        Секції наперед одразу, далі періодичне обслуговування (лише в процесі сервера).
+        Потрібен контекст додатку. Помилка обслуговування лише логується - сервер стартує.
+        """
+        try:
+            self._create_partitions()
+        except Exception as e:
+            db.session.rollback()
+            self.app.logger.error(f"History partition maintenance failed on startup: {e}")
+        self._maintainer.start(self.app, self.maintenance_interval)
+
+    def _create_partitions(self):
+        created = self.ensure_partitions()
+        if created:
+            self.app.logger.info(f"Created history partition(s): {', '.join(created)}.")
+
+    def maintain(self):
+        """Створює секції наперед і, якщо ввімкнено HISTORY_AUTO_RETENTION, застосовує ретенцію."""
+        self._create_partitions()
+        if self.auto_retention and self.retention_days > 0:
+            result = self.apply_retention(self.retention_days)
+            if result['dropped_partitions'] or result['deleted_rows']:
+                self.app.logger.info(
+                    f"History retention ({self.retention_days} days): dropped "
+                    f"{len(result['dropped_partitions'])} partition(s), deleted {result['deleted_rows']} row(s).")
+
+    def ensure_partitions(self, now=None):
+        """Створює секції поточного і наступних HISTORY_PARTITIONS_AHEAD місяців. Повертає назви нових."""
+        if not is_partitioned():
+            return []
+        now = now or datetime.datetime.now(datetime.timezone.utc)
+        existing = list_partitions()
+        created = []
+        for offset in range(self.months_ahead + 1):
+            start = add_months(month_start(now), offset)
+            if partition_name(start) not in existing:
+                create_partition(start)
+                created.append(partition_name(start))
+        db.session.commit()
+        return created
+
+    def apply_retention(self, days, dry_run=False, now=None):
+        """
+        Видаляє історію, старішу за `days` днів.
+        На PostgreSQL секції видаляються лише повністю (усі рядки секції прострочені);
+        без секціонування рядки видаляються пакетами.
+        :return: {'dropped_partitions': [...], 'deleted_rows': int}
+        """
+        now = now or datetime.datetime.now(datetime.timezone.utc)
+        cutoff = now - datetime.timedelta(days=days)
+        result = {'dropped_partitions': [], 'deleted_rows': 0}
+
+        if is_partitioned():
+            expired = sorted(name for name, (_, end) in list_partitions().items() if end <= cutoff)
+            result['dropped_partitions'] = expired
+            if not dry_run:
+                for name in expired:
+                    db.session.execute(text(f"DROP TABLE IF EXISTS {name}"))
+                db.session.commit()
+            return result
+
+        table = DeviceStatusHistory.__table__
+        if dry_run:
+            result['deleted_rows'] = DeviceStatusHistory.query.filter(DeviceStatusHistory.timestamp < cutoff).count()
+            return result
+        while True:
+            batch = db.session.query(table.c.id).filter(table.c.timestamp < cutoff).limit(_DELETE_BATCH_SIZE)
+            deleted = db.session.execute(table.delete().where(table.c.id.in_(batch.scalar_subquery()))).rowcount
+            db.session.commit()
+            result['deleted_rows'] += deleted
+            if deleted < _DELETE_BATCH_SIZE:
+                return result
+
+
+history_partitions = HistoryPartitionManager()
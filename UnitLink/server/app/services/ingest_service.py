@@ -0,0 +1,288 @@
+# server/app/services/ingest_service.py
+"""
+Спільний конвеєр обробки оновлень статусу/телеметрії пристроїв.
+
+Використовується як одиночним ендпоінтом `/api/devices/<id>/status`, так і
+пакетним `/api/devices/status/batch`: усі пристрої пакета завантажуються
+одним запитом, а записи історії, логів та сповіщень вставляються пакетно
+в одній транзакції.
+"""
+import datetime
+
+from flask import current_app
+from sqlalchemy import bindparam, insert, update
+
+from app import db, socketio
+from app.services.history_buffer import history_buffer
+from app.services.device_registry import device_registry
+from app.services.heartbeat_watchdog import heartbeat_watchdog
+from app.services.threshold_rules import threshold_engine
+from app.services.alert_dedup import alert_dedup, FLAPPING_KEY
+from app.services.telemetry_rollups import telemetry_rollups
+from app.models import (
+    Device, DeviceStatus,
+    ConnectionLog, LogEventType, Alert, AlertSeverity
+)
+
+
+class StatusRecordError(ValueError):
+    """Помилка валідації окремого запису оновлення статусу."""
+
+
+def parse_status_record(data):
+    """
+    Валідує тіло оновлення статусу та повертає нормалізований словник:
+    {'status': DeviceStatus | None, 'signal_rssi': int | None,
+     'latency_ms': int | None, 'packet_loss_percent': float | None}
+    """
+    if not isinstance(data, dict):
+        raise StatusRecordError("Record must be a JSON object.")
+
+    status = None
+    new_status_str = data.get('status')
+    if new_status_str:
+        try:
+            status = DeviceStatus[str(new_status_str).upper()]
+        except KeyError:
+            raise StatusRecordError(
+                f"Invalid status '{new_status_str}'. Valid are: {[s.name for s in DeviceStatus]}")
+
+    signal_rssi = data.get('signal_rssi')
+    latency_ms = data.get('latency_ms')
+    packet_loss_percent = data.get('packet_loss_percent')
+
+    # Конвертуємо у відповідні типи, обробляючи None
+    try:
+        return {
+            'status': status,
+            'signal_rssi': int(signal_rssi) if signal_rssi is not None else None,
+            'latency_ms': int(latency_ms) if latency_ms is not None else None,
+            'packet_loss_percent': float(packet_loss_percent) if packet_loss_percent is not None else None,
+        }
+    except (ValueError, TypeError):
+        raise StatusRecordError(
+            "Invalid parameter format. RSSI and Latency must be integers, Packet Loss must be a number.")
+
+
+def _transition_event(device_name, old_status, new_status):
+    """Визначає тип події ConnectionLog та повідомлення для зміни статусу."""
+    # Подія: втрата зв'язку (був онлайн -> став офлайн)
+    if old_status == DeviceStatus.ONLINE and new_status == DeviceStatus.OFFLINE:
+        return LogEventType.DISCONNECTED, f"Device '{device_name}' lost connection."
+    # Подія: відновлення зв'язку (був офлайн -> став онлайн)
+    if old_status == DeviceStatus.OFFLINE and new_status == DeviceStatus.ONLINE:
+        return LogEventType.CONNECTED, f"Device '{device_name}' connection restored."
+    # Подія: загальна зміна статусу (напр., на UNSTABLE)
+    return LogEventType.STATUS_CHANGE, f"Device '{device_name}' status changed to {new_status.name}."
+
+
+def _threshold_log_message(device_name, event):
+    """Повідомлення ConnectionLog для події порогу телеметрії."""
+    if event['kind'] == 'clear':
+        return f"Device '{device_name}' {event['metric']} returned to normal ({event['value']})."
+    return (f"Device '{device_name}' {event['metric']} {event['value']} is {event['direction']} "
+            f"threshold {event['threshold']}.")
+
+
+def ingest_status_updates(updates, source='device'):
+    """
+    Обробляє пакет оновлень статусу в одній транзакції.
+
+    :param updates: список пар (device_id: uuid.UUID, payload: dict) у порядку надходження
+    :param source: 'device' - повідомлення від пристрою (heartbeat, оновлює last_seen);
+                   'watchdog' - статус виставлено сервером через відсутність heartbeat-ів
+    :return: список результатів для кожного запису у тому ж порядку:
+             {'device_id': str, 'code': int, 'message': str}
+    """
+    current_time = datetime.datetime.now(datetime.timezone.utc)
+    is_heartbeat = source == 'device'
+    results = [None] * len(updates)
+
+    # Валідуємо всі записи до звернення до БД
+    parsed = []
+    for index, (device_id, payload) in enumerate(updates):
+        try:
+            parsed.append((index, device_id, parse_status_record(payload)))
+        except StatusRecordError as e:
+            results[index] = {'device_id': str(device_id), 'code': 400, 'message': str(e)}
+
+    # Стан пристроїв береться з реєстру в пам'яті; БД перевіряємо лише для
+    # невідомих реєстру id (пристрій міг бути доданий іншим процесом)
+    device_ids = {device_id for _, device_id, _ in parsed}
+    states = device_registry.get_many(device_ids)
+    missing = device_ids - states.keys()
+    if missing:
+        for device in Device.query.filter(Device.id.in_(missing)).all():
+            device_registry.upsert(device)
+            states[device.id] = device.to_dict()
+
+    history_rows = []
+    log_rows = []
+    alert_candidates = []  # (device_id, severity, dedup_key, message) - див. AlertDeduplicator.resolve
+    transitions = []  # id пристроїв для кожної зміни статусу (для виявлення флапінгу)
+    threshold_samples = []  # (device_id, unit_type, telemetry) для перевірки порогів
+    status_changes = {}  # device_id -> новий DeviceStatus
+    latest_telemetry = {}  # device_id -> телеметрія останнього запису пакета
+
+    for index, device_id, record in parsed:
+        state = states.get(device_id)
+        if state is None:
+            results[index] = {'device_id': str(device_id), 'code': 404, 'message': "Device not found."}
+            continue
+
+        new_status = record['status']
+        old_status = DeviceStatus[state['status']]
+        # Пристрій, який сторож вважав мовчазним, знову на зв'язку - навіть без поля status
+        if is_heartbeat and new_status is None and old_status == DeviceStatus.OFFLINE \
+                and heartbeat_watchdog.is_silenced(device_id):
+            new_status = DeviceStatus.ONLINE
+        if new_status and old_status != new_status:
+            state['status'] = new_status.name
+            status_changes[device_id] = new_status
+            transitions.append(device_id)
+
+            # --- ЛОГІКА ЗАПИСУ В ConnectionLog ---
+            log_event_type, log_message = _transition_event(state['name'], old_status, new_status)
+            details = {  # Зберігаємо трохи контексту
+                'from_status': old_status.name,
+                'to_status': new_status.name
+            }
+            if not is_heartbeat:
+                details['source'] = source
+            log_rows.append({
+                'timestamp': current_time,
+                'device_id': device_id,
+                'event_type': log_event_type,
+                'message': log_message,
+                'details': details
+            })
+
+            # --- ЛОГІКА СТВОРЕННЯ АЛЕРТУ ---
+            if new_status == DeviceStatus.OFFLINE:
+                alert_candidates.append((device_id, AlertSeverity.CRITICAL, 'offline',
+                                         f"Пристрій '{state['name']}' втратив зв'язок (OFFLINE)."))
+
+        # Оновлюємо час останнього контакту
+        if is_heartbeat:
+            state['last_seen'] = current_time.isoformat()
+
+        telemetry = {
+            'signal_rssi': record['signal_rssi'],
+            'latency_ms': record['latency_ms'],
+            'packet_loss_percent': record['packet_loss_percent'],
+        }
+        # Створюємо запис в історії, якщо хоча б один параметр передано
+        if any(v is not None for v in telemetry.values()):
+            history_rows.append(dict(telemetry, device_id=device_id, timestamp=current_time))
+            threshold_samples.append((device_id, state['unit_type'], telemetry))
+
+        latest_telemetry[device_id] = dict(telemetry, timestamp=current_time.isoformat())
+        results[index] = {'device_id': str(device_id), 'code': 200,
+                          'message': "Device status updated successfully."}
+
+    if not latest_telemetry:
+        return results
+
+    # --- ПЕРЕВІРКА ПОРОГІВ ТЕЛЕМЕТРІЇ (PARAMETER_THRESHOLD) ---
+    threshold_events, threshold_changes = threshold_engine.evaluate_batch(threshold_samples)
+    for event in threshold_events:
+        device_name = states[event['device_id']]['name']
+        log_rows.append({
+            'timestamp': current_time,
+            'device_id': event['device_id'],
+            'event_type': LogEventType.PARAMETER_THRESHOLD,
+            'message': _threshold_log_message(device_name, event),
+            'details': {key: event[key] for key in ('metric', 'kind', 'direction', 'value', 'threshold')}
+        })
+        if event['kind'] == 'breach':
+            alert_candidates.append((event['device_id'], AlertSeverity.WARNING, f"threshold:{event['metric']}",
+                                     f"Пристрій '{device_name}': {event['metric']} = {event['value']} "
+                                     f"(поріг {event['threshold']})."))
+
+    # --- ДЕДУПЛІКАЦІЯ СПОВІЩЕНЬ ТА ФЛАПІНГ ---
+    flapping_started, transition_changes = alert_dedup.record_transitions(transitions, current_time)
+    for device_id, transition_count in flapping_started.items():
+        alert_candidates.append((device_id, AlertSeverity.WARNING, FLAPPING_KEY,
+                                 f"Пристрій '{states[device_id]['name']}' нестабільний: "
+                                 f"{transition_count} змін статусу за короткий час."))
+    new_alerts, alert_bumps, dedup_changes = alert_dedup.resolve(alert_candidates, current_time,
+                                                                 transition_changes)
+
+    reserved = 0
+    try:
+        # Історія йде через write-behind буфер: місце резервується до запису в БД (якщо буфер
+        # заповнений, HistoryBufferFull відкочує транзакцію і клієнт повторює запит цілком),
+        # а самі рядки стають у чергу лише після commit
+        reserved = history_buffer.reserve(history_rows)
+
+        # UPDATE за первинним ключем без попереднього SELECT пристроїв - лише при зміні статусу.
+        # last_seen решти пристроїв зберігає реєстр пакетно (див. DeviceRegistry.flush_last_seen)
+        if status_changes:
+            db.session.execute(update(Device), [
+                dict({'id': device_id, 'status': status}, **({'last_seen': current_time} if is_heartbeat else {}))
+                for device_id, status in status_changes.items()
+            ])
+
+        # Пакетні INSERT (executemany) замість окремого INSERT на кожен рядок
+        if log_rows:
+            db.session.execute(insert(ConnectionLog), log_rows)
+        # Сповіщень мало; ORM вставляє їх одним багаторядковим INSERT (id задані наперед)
+        db.session.add_all(new_alerts)
+        # Повтори відкритих сповіщень - лише лічильник і час останнього повтору
+        if alert_bumps:
+            alerts_table = Alert.__table__
+            db.session.execute(
+                alerts_table.update()
+                .where(alerts_table.c.id == bindparam('alert_id'))
+                .values(occurrence_count=alerts_table.c.occurrence_count + bindparam('repeats'),
+                        last_occurred_at=current_time, updated_at=current_time),
+                [{'alert_id': alert_id, 'repeats': repeats} for alert_id, repeats in alert_bumps.items()])
+        db.session.flush()
+
+        # Готуємо дані для WebSocket до commit, поки об'єкти не "протухли" (expire_on_commit).
+        # Ім'я пристрою беремо з реєстру, щоб не викликати lazy load Alert.device
+        alert_payloads = [alert.to_dict(device_name=states[alert.device_id]['name']) for alert in new_alerts]
+
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        history_buffer.release(reserved)
+        raise
+
+    history_buffer.submit(history_rows, reserved)
+    # Стан з реєстру після злиття - з паралельними змінами адміна (ім'я, координати тощо)
+    touched = device_registry.apply({device_id: states[device_id] for device_id in latest_telemetry})
+    threshold_engine.commit(threshold_changes)
+    alert_dedup.commit(dedup_changes, transition_changes)
+    telemetry_rollups.add(history_rows)
+    if is_heartbeat:
+        # Позначаємо і пристрої зі зміною статусу, щоб старіше відкладене значення не перезаписало новіше
+        device_registry.mark_seen(touched.keys(), current_time)
+        # Пристрої, що повідомили OFFLINE, сторож більше не відстежує; решті переносимо дедлайн
+        heartbeat_watchdog.forget([d for d in touched if touched[d]['status'] == DeviceStatus.OFFLINE.name])
+        heartbeat_watchdog.heartbeat([d for d in touched if touched[d]['status'] != DeviceStatus.OFFLINE.name],
+                                     current_time)
+    elif source == 'watchdog':
+        heartbeat_watchdog.silenced([d for d, status in status_changes.items()
+                                     if status == DeviceStatus.OFFLINE and d in touched])
+
+    current_app.logger.info(
+        f"Ingested {len(latest_telemetry)} device update(s): {len(history_rows)} history, "
+        f"{len(log_rows)} log, {len(alert_payloads)} alert row(s), {len(alert_bumps)} repeated alert(s).")
+
+    # ---> НАДСИЛАЄМО ПОДІЇ WEBSOCKET <---
+    for alert_data in alert_payloads:
+        socketio.emit('new_alert', alert_data)
+    # Повтори: легка подія без нового дзвіночка на клієнті
+    for state in dedup_changes.values():
+        if state['id'] in alert_bumps:
+            socketio.emit('alert_updated', {'id': str(state['id']),
+                                            'occurrence_count': state['occurrence_count'],
+                                            'last_occurred_at': state['last_occurred_at'].isoformat()})
+    # По одній події на пристрій (останній стан у пакеті), а не на кожен запис
+    for device_id, telemetry in latest_telemetry.items():
+        if device_id in touched:  # Пристрій, видалений паралельно, не оголошуємо
+            device_data = dict(touched[device_id], latest_telemetry=telemetry)
+            socketio.emit('unit_status_update', device_data, room=None)
+
+    return results
@@ -0,0 +1,51 @@
+# server/app/services/json_stream.py
+"""
+Потокові JSON-відповіді для великих списків (історія, логи).
+
+Відповідь виду {"поле": значення, ..., "items": [...]} формується частинами:
+спочатку дрібні поля, далі елементи списку по одному з генератора, який читає
+результат запиту пакетами (yield_per - серверний курсор на PostgreSQL). Тож
+у пам'яті одночасно лише один пакет рядків і один буфер виводу, незалежно від
+розміру результату, а перші байти йдуть клієнту ще до кінця читання з БД.
+
+Статус відповіді вже надіслано, тому помилка посеред потоку лише логується -
+клієнт отримає обірваний (невалідний) JSON.
+"""
+from flask import Response, current_app, stream_with_context
+
+# Розмір частини виводу в байтах: менше - раніше перший байт, більше - менше накладних витрат
+_CHUNK_SIZE = 64 * 1024
+
+
+def iter_json_object(fields, items_key, items):
+    """Генерує JSON-об'єкт з полями `fields` та масивом `items_key` із `items` частинами тексту."""
+    dumps = current_app.json.dumps
+    head = ''.join(f'{dumps(key)}: {dumps(value)}, ' for key, value in fields.items())
+    parts = ['{', head, dumps(items_key), ': [']
+    size = 0
+    first = True
+    for item in items:
+        encoded = dumps(item)
+        parts.append(encoded if first else ',' + encoded)
+        first = False
+        size += len(encoded) + 1
+        if size >= _CHUNK_SIZE:
+            yield ''.join(parts)
+            parts, size = [], 0
+    parts.append(']}')
+    yield ''.join(parts)
+
+
+def json_stream_response(fields, items_key, items, status=200):
+    """
+    Потокова JSON-відповідь. Генератор `items` виконується поза view-функцією,
+    але в контексті запиту (сесія БД ще відкрита).
+    """
+    def generate():
+        try:
+            yield from iter_json_object(fields, items_key, items)
+        except Exception as e:
+            current_app.logger.error(f"Error while streaming '{items_key}' response: {e}")
+            raise
+
+    return Response(stream_with_context(generate()), status=status, mimetype='application/json')
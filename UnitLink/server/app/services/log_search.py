@@ -0,0 +1,33 @@
+# server/app/services/log_search.py
+"""
+Повнотекстовий пошук по журналу подій (message + details).
+
+PostgreSQL: вираз LOG_SEARCH_DOCUMENT_SQL з GIN-індексом ix_connection_logs_search,
+запит - websearch_to_tsquery (підтримує "фрази", OR та -виключення).
+SQLite: FTS5-таблиця connection_logs_fts (синхронізується тригерами), слова
+запиту шукаються як окремі фрази, усі одночасно.
+Інші СУБД: ILIKE по message (без індексу).
+"""
+from sqlalchemy import func, literal_column, select, table
+
+from app import db
+from app.models import ConnectionLog
+from app.models.log_models import LOG_SEARCH_DOCUMENT_SQL, LOG_SEARCH_FTS_TABLE
+
+
+def _fts5_query(query_text):
+    """Екранує введений текст для MATCH: кожне слово - фраза в лапках (без синтаксису FTS5)."""
+    return ' '.join('"' + word.replace('"', '""') + '"' for word in query_text.split())
+
+
+def log_search_condition(query_text):
+    """Умова WHERE для пошуку записів журналу за текстом."""
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        return literal_column(LOG_SEARCH_DOCUMENT_SQL).op('@@')(func.websearch_to_tsquery('simple', query_text))
+    if dialect == 'sqlite':
+        fts = table(LOG_SEARCH_FTS_TABLE)
+        matches = select(literal_column('rowid')).select_from(fts).where(
+            literal_column(LOG_SEARCH_FTS_TABLE).op('MATCH')(_fts5_query(query_text)))
+        return ConnectionLog.id.in_(matches)
+    return ConnectionLog.message.ilike(f'%{query_text}%')
@@ -0,0 +1,236 @@
+# server/app/services/mqtt_bridge.py
+"""
+Міст прийому телеметрії через MQTT.
+
+Пристрої публікують той самий JSON, що й у POST /api/devices/<id>/status, у топік
+`<MQTT_TOPIC_PREFIX>/<device_id>/status`; шлюзи/вузли зв'язку можуть публікувати
+масив записів з полем device_id у `<MQTT_TOPIC_PREFIX>/batch`.
+
+Повідомлення накопичуються і передаються в ingest_status_updates пакетами.
+Для QoS 1/2 підтвердження (PUBACK/PUBCOMP) надсилається лише після commit пакета
+(manual_ack), а сесія брокера постійна (clean_session=False), тож після збою
+непідтверджені повідомлення будуть доставлені повторно.
+
+Черга між мережевим потоком paho і записом у БД обмежена (MQTT_QUEUE_MAX). Мережевий
+потік ніколи не чекає на місце в ній - інакше він не відповідав би брокеру (PINGREQ,
+PUBACK), і той розірвав би з'єднання. Коли черга заповнена, повідомлення QoS 1/2
+відкладаються без підтвердження: брокер не надсилає більше непідтверджених
+повідомлень, ніж дозволяє його вікно (max_inflight_messages у mosquitto), тож прийом
+призупиняється, доки потік запису не звільнить місце. Брокер без обмеження вікна
+цього не гарантує - про це попереджає лог. QoS 0 брокер не повторює, тож такі
+повідомлення відкидаються з попередженням у лозі.
+
+Пакет, який не вдалося записати за кілька спроб, підтверджується, а його повідомлення
+записуються в лог помилок ("Dropped MQTT message ...") - щоб їх можна було дослати.
+"""
+import atexit
+import collections
+import json
+import queue
+import ssl
+import threading
+import time
+import uuid
+
+import paho.mqtt.client as mqtt
+
+from app.services.history_buffer import HistoryBufferFull
+from app.services.ingest_service import ingest_status_updates
+
+
+class MqttIngestBridge:
+    """Підписник MQTT, що передає повідомлення у спільний конвеєр телеметрії."""
+
+    def __init__(self):
+        self.app = None
+        self.client = None
+        self._messages = queue.Queue()
+        self._overflow = collections.deque()  # Непідтверджені QoS 1/2, що не вмістились у чергу
+        self._dropped = 0  # Відкинуті через заповнену чергу повідомлення QoS 0
+        self._worker = None
+        self._stopping = threading.Event()
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('MQTT_ENABLED', False)
+        self.topic_prefix = app.config.get('MQTT_TOPIC_PREFIX', 'unitlink/devices').rstrip('/')
+        self.qos = app.config.get('MQTT_QOS', 1)
+        self.batch_size = app.config.get('MQTT_BATCH_SIZE', 200)
+        self.batch_interval = app.config.get('MQTT_BATCH_INTERVAL_SECONDS', 1.0)
+        self.max_attempts = 5  # Спроб запису пакета при помилках БД, після чого пакет відкидається
+        self.queue_max = app.config.get('MQTT_QUEUE_MAX', 10000)
+        self._messages = queue.Queue(maxsize=self.queue_max)
+
+    def start(self):
+        """Підключається до брокера і запускає фонові потоки (мережевий цикл paho та запис пакетів)."""
+        if self.client is not None:
+            return
+        config = self.app.config
+        self.client = mqtt.Client(
+            mqtt.CallbackAPIVersion.VERSION2,
+            client_id=config.get('MQTT_CLIENT_ID', 'unitlink-server'),
+            clean_session=False,
+            manual_ack=True,
+        )
+        if config.get('MQTT_USERNAME'):
+            self.client.username_pw_set(config['MQTT_USERNAME'], config.get('MQTT_PASSWORD'))
+        if config.get('MQTT_TLS'):
+            self.client.tls_set(cert_reqs=ssl.CERT_REQUIRED)
+        self.client.on_connect = self._on_connect
+        self.client.on_message = self._on_message
+
+        self._stopping.clear()
+        self._worker = threading.Thread(target=self._run, name='mqtt-ingest', daemon=True)
+        self._worker.start()
+
+        self.client.connect_async(config.get('MQTT_BROKER_HOST', 'localhost'),
+                                  config.get('MQTT_BROKER_PORT', 1883), keepalive=60)
+        self.client.loop_start()
+        atexit.register(self.stop)
+        self.app.logger.info(f"MQTT ingest bridge started, topic prefix '{self.topic_prefix}'.")
+
+    def stop(self):
+        """Зупиняє прийом і дописує вже отримані повідомлення."""
+        if self.client is None:
+            return
+        self._stopping.set()
+        self._worker.join()
+        self.client.loop_stop()
+        self.client.disconnect()
+        self.client = None
+
+    # --- Колбеки paho (виконуються в мережевому потоці paho) ---
+
+    def _on_connect(self, client, userdata, flags, reason_code, properties):
+        if reason_code.is_failure:
+            self.app.logger.error(f"MQTT connection failed: {reason_code}")
+            return
+        client.subscribe([(f"{self.topic_prefix}/+/status", self.qos),
+                          (f"{self.topic_prefix}/batch", self.qos)])
+        self.app.logger.info("MQTT ingest bridge connected and subscribed.")
+
+    def _on_message(self, client, userdata, message):
+        # Лише кладемо в чергу: розбір і запис у БД - в окремому потоці
+        if message.qos == 0:
+            try:
+                self._messages.put_nowait(message)
+            except queue.Full:
+                self._dropped += 1
+                if self._dropped % 1000 == 1:
+                    self.app.logger.warning(f"MQTT ingest queue is full ({self.queue_max} messages), "
+                                            f"dropped {self._dropped} QoS 0 message(s) so far.")
+            return
+        # QoS 1/2: після першого відкладеного всі наступні теж відкладаються, щоб зберегти порядок
+        if not self._overflow:
+            try:
+                self._messages.put_nowait(message)
+                return
+            except queue.Full:
+                self.app.logger.warning(f"MQTT ingest queue is full ({self.queue_max} messages), "
+                                        f"holding QoS {message.qos} messages unacknowledged.")
+        self._overflow.append(message)
+        if len(self._overflow) == self.queue_max:
+            self.app.logger.warning(f"{self.queue_max} unacknowledged MQTT messages held: the broker does not "
+                                    f"limit in-flight messages (set max_inflight_messages).")
+
+    # --- Обробка пакетів ---
+
+    def _decode(self, message):
+        """Перетворює MQTT-повідомлення на список пар (device_id, payload) для конвеєра."""
+        try:
+            payload = json.loads(message.payload)
+        except (ValueError, UnicodeDecodeError):
+            raise ValueError("payload is not valid JSON")
+
+        if message.topic == f"{self.topic_prefix}/batch":
+            if not isinstance(payload, list):
+                raise ValueError("batch payload must be a JSON array")
+            updates = []
+            for item in payload:
+                try:
+                    updates.append((uuid.UUID(str(item.get('device_id'))), item))
+                except (ValueError, TypeError, AttributeError):
+                    self.app.logger.warning(f"Skipping MQTT batch record without valid device_id: {item!r}")
+            return updates
+
+        # <prefix>/<device_id>/status
+        device_part = message.topic[len(self.topic_prefix) + 1:].split('/', 1)[0]
+        return [(uuid.UUID(device_part), payload)]
+
+    def _take_batch(self):
+        messages = []
+        deadline = time.monotonic() + self.batch_interval
+        while len(messages) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                messages.append(self._messages.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return messages
+
+    def _refill(self):
+        """Переносить відкладені повідомлення в чергу, поки в ній є місце."""
+        while self._overflow:
+            try:
+                self._messages.put_nowait(self._overflow[0])
+            except queue.Full:
+                return
+            self._overflow.popleft()
+
+    def _run(self):
+        while not (self._stopping.is_set() and self._messages.empty() and not self._overflow):
+            messages = self._take_batch()
+            self._refill()
+            if messages:
+                self._process(messages)
+
+    def _process(self, messages):
+        updates = []
+        for message in messages:
+            try:
+                updates.extend(self._decode(message))
+            except (ValueError, TypeError) as e:
+                # Некоректне повідомлення підтверджуємо, інакше брокер доставлятиме його вічно
+                self.app.logger.warning(f"Dropping MQTT message on '{message.topic}': {e}")
+
+        attempt = 0
+        while updates:
+            attempt += 1
+            try:
+                with self.app.app_context():
+                    results = ingest_status_updates(updates)
+                rejected = [r for r in results if r['code'] != 200]
+                if rejected:
+                    self.app.logger.warning(f"MQTT batch: {len(rejected)} of {len(results)} record(s) rejected, "
+                                            f"first: {rejected[0]}")
+                break
+            except HistoryBufferFull:
+                # Зворотний тиск: не підтверджуємо повідомлення, поки буфер не звільниться
+                if self._stopping.is_set():
+                    return
+                time.sleep(self.batch_interval)
+            except Exception as e:
+                self.app.logger.error(f"MQTT batch of {len(updates)} record(s) failed (attempt {attempt}): {e}")
+                if self._stopping.is_set():
+                    # Без ACK брокер доставить повідомлення повторно після перезапуску
+                    return
+                if attempt >= self.max_attempts:
+                    self._dead_letter(messages, len(updates))
+                    break
+                time.sleep(self.batch_interval * attempt)
+
+        for message in messages:
+            if message.qos > 0:
+                self.client.ack(message.mid, message.qos)
+
+    def _dead_letter(self, messages, records):
+        """Записує в лог помилок повідомлення пакета, що відкидається, - для ручного досилання."""
+        self.app.logger.error(f"Dropping MQTT batch of {records} record(s) from {len(messages)} message(s).")
+        for message in messages:
+            self.app.logger.error(f"Dropped MQTT message on '{message.topic}': "
+                                  f"{message.payload.decode('utf-8', errors='replace')}")
+
+
+mqtt_bridge = MqttIngestBridge()
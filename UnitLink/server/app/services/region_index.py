@@ -0,0 +1,118 @@
+# server/app/services/region_index.py
+"""
+Визначення області (ADM1) за координатами пристрою.
+
+Межі областей беруться з того ж GeoJSON, що малює карта (REGIONS_GEOJSON_PATH,
+за замовчуванням client/public/ukraine_borders.geojson), і завантажуються один
+раз при першому зверненні. Для кожної області готується:
+  * обмежувальний прямокутник - більшість областей відкидається одним порівнянням;
+  * сітка ребер: діапазон широт ділиться на REGION_EDGE_BANDS смуг, і в кожній
+    смузі зберігаються лише ребра, що її перетинають. Тест "точка в полігоні"
+    (промінь на схід, правило парності) перевіряє ребра однієї смуги, а не всі.
+
+Області перевіряються від меншої за площею прямокутника до більшої, тож місто
+з окремим статусом (Київ, Севастополь) має пріоритет над областю навколо нього.
+
+Область присвоюється пристрою при додаванні та зміні координат (add_device /
+update_device) і зберігається в devices.region; фільтри та зведення за областями
+користуються збереженим значенням, без геометрії на кожен запит. Наявні
+пристрої доповнюються командою `flask assign-regions`.
+"""
+import json
+import math
+import os
+import threading
+
+
+class _Region:
+    """Підготовлена область: прямокутник і ребра, розкладені по смугах широти."""
+
+    def __init__(self, code, name, rings, bands):
+        self.code = code
+        self.name = name
+        lats = [lat for ring in rings for _, lat in ring]
+        lons = [lon for ring in rings for lon, _ in ring]
+        self.min_lat, self.max_lat = min(lats), max(lats)
+        self.min_lon, self.max_lon = min(lons), max(lons)
+        self.area = (self.max_lat - self.min_lat) * (self.max_lon - self.min_lon)
+        self._band_height = (self.max_lat - self.min_lat) / bands or 1.0
+        self._bands = [[] for _ in range(bands)]
+        for ring in rings:
+            for (lon1, lat1), (lon2, lat2) in zip(ring, ring[1:] + ring[:1]):
+                if lat1 == lat2:
+                    continue  # Горизонтальне ребро промінь не перетинає
+                for band in range(self._band(min(lat1, lat2)), self._band(max(lat1, lat2)) + 1):
+                    self._bands[band].append((lon1, lat1, lon2, lat2))
+
+    def _band(self, lat):
+        return min(max(int((lat - self.min_lat) / self._band_height), 0), len(self._bands) - 1)
+
+    def contains(self, lat, lon):
+        if not (self.min_lat <= lat <= self.max_lat and self.min_lon <= lon <= self.max_lon):
+            return False
+        inside = False
+        for lon1, lat1, lon2, lat2 in self._bands[self._band(lat)]:
+            if (lat1 > lat) != (lat2 > lat):
+                crossing_lon = lon1 + (lat - lat1) * (lon2 - lon1) / (lat2 - lat1)
+                if lon < crossing_lon:
+                    inside = not inside
+        return inside
+
+
+class RegionIndex:
+
+    def __init__(self):
+        self.app = None
+        self._regions = None  # [_Region] від меншої до більшої
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+
+    def _load(self):
+        path = self.app.config.get('REGIONS_GEOJSON_PATH') if self.app else None
+        bands = self.app.config.get('REGION_EDGE_BANDS', 64) if self.app else 64
+        regions = []
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                collection = json.load(f)
+            for feature in collection.get('features', []):
+                properties, geometry = feature.get('properties') or {}, feature.get('geometry') or {}
+                code = properties.get('shapeISO')
+                if not code or geometry.get('type') not in ('Polygon', 'MultiPolygon'):
+                    continue
+                polygons = geometry['coordinates'] if geometry['type'] == 'MultiPolygon' else [geometry['coordinates']]
+                # Зовнішні межі та "дірки" всіх частин - правило парності враховує їх однаково
+                rings = [[(float(point[0]), float(point[1])) for point in ring]
+                         for polygon in polygons for ring in polygon if len(ring) >= 3]
+                if rings:
+                    regions.append(_Region(code, properties.get('shapeName') or code, rings, bands))
+            regions.sort(key=lambda region: region.area)
+            if self.app:
+                self.app.logger.info(f"Region index loaded with {len(regions)} region(s) from {path}.")
+        elif self.app:
+            self.app.logger.warning(f"Regions GeoJSON not found at {path}; devices will not get a region.")
+        return regions
+
+    def _ensure_loaded(self):
+        if self._regions is None:
+            with self._lock:
+                if self._regions is None:
+                    self._regions = self._load()
+        return self._regions
+
+    def locate(self, lat, lon):
+        """Код області (shapeISO, напр. 'UA-30') для точки або None поза областями / без координат."""
+        if lat is None or lon is None or not (math.isfinite(lat) and math.isfinite(lon)):
+            return None
+        for region in self._ensure_loaded():
+            if region.contains(lat, lon):
+                return region.code
+        return None
+
+    def regions(self):
+        """{код: назва} всіх відомих областей."""
+        return {region.code: region.name for region in self._ensure_loaded()}
+
+
+region_index = RegionIndex()
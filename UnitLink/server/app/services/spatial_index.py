@@ -0,0 +1,108 @@
+# server/app/services/spatial_index.py
+"""
+Просторовий індекс позицій пристроїв - рівномірна сітка в градусах.
+
+Точка потрапляє в комірку (floor(lat / cell), floor(lon / cell)). Запит за
+прямокутником (bbox) перебирає лише комірки, що його перетинають, і перевіряє
+точки в них; запит за радіусом зводиться до bbox навколо центру з точною
+перевіркою відстані (гаверсинус). Для парку в межах країни сітка простіша за
+R-дерево і оновлюється за O(1) при переміщенні пристрою.
+
+Індекс не потокобезпечний сам по собі: ним володіє DeviceRegistry і звертається
+до нього під своїм блокуванням.
+"""
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+# Кілометрів в одному градусі широти
+_KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Відстань по великому колу між двома точками, км."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GridIndex:
+    """Відображення ключ -> (lat, lon) з відбором за прямокутником і радіусом."""
+
+    def __init__(self, cell_degrees=0.25):
+        self.cell_degrees = cell_degrees
+        self._points = {}  # ключ -> (lat, lon, комірка)
+        self._cells = {}  # комірка -> set(ключів)
+
+    def __len__(self):
+        return len(self._points)
+
+    def _cell(self, lat, lon):
+        return math.floor(lat / self.cell_degrees), math.floor(lon / self.cell_degrees)
+
+    def insert(self, key, lat, lon):
+        """Додає або переміщує точку; точка без координат з індексу прибирається."""
+        if lat is None or lon is None:
+            self.remove(key)
+            return
+        cell = self._cell(lat, lon)
+        previous = self._points.get(key)
+        if previous is not None and previous[2] != cell:
+            self._discard_from_cell(key, previous[2])
+        self._points[key] = (lat, lon, cell)
+        self._cells.setdefault(cell, set()).add(key)
+
+    def remove(self, key):
+        previous = self._points.pop(key, None)
+        if previous is not None:
+            self._discard_from_cell(key, previous[2])
+
+    def _discard_from_cell(self, key, cell):
+        keys = self._cells.get(cell)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._cells[cell]
+
+    def clear(self):
+        self._points.clear()
+        self._cells.clear()
+
+    def within_bbox(self, min_lat, min_lon, max_lat, max_lon):
+        """Ключі точок у прямокутнику (межі включно)."""
+        min_row, min_col = self._cell(min_lat, min_lon)
+        max_row, max_col = self._cell(max_lat, max_lon)
+        # Великий прямокутник (напр., весь світ) - дешевше перебрати зайняті комірки
+        if (max_row - min_row + 1) * (max_col - min_col + 1) > len(self._cells):
+            cells = [cell for cell in self._cells
+                     if min_row <= cell[0] <= max_row and min_col <= cell[1] <= max_col]
+        else:
+            cells = [(row, col) for row in range(min_row, max_row + 1) for col in range(min_col, max_col + 1)
+                     if (row, col) in self._cells]
+
+        result = []
+        for cell in cells:
+            # Точки внутрішніх комірок перевіряти не обов'язково, але перевірка дешева
+            for key in self._cells[cell]:
+                lat, lon, _ = self._points[key]
+                if min_lat <= lat <= max_lat and min_lon <= lon <= max_lon:
+                    result.append(key)
+        return result
+
+    def within_radius(self, lat, lon, radius_km):
+        """[(ключ, відстань_км)] точок не далі radius_km від (lat, lon), від найближчої."""
+        d_lat = radius_km / _KM_PER_DEGREE
+        cos_lat = math.cos(math.radians(lat))
+        # Біля полюсів градус довготи вироджується - беремо всю довготу
+        d_lon = 180.0 if cos_lat < 1e-6 else min(180.0, radius_km / (_KM_PER_DEGREE * cos_lat))
+        candidates = self.within_bbox(max(-90.0, lat - d_lat), lon - d_lon, min(90.0, lat + d_lat), lon + d_lon)
+
+        result = []
+        for key in candidates:
+            point_lat, point_lon, _ = self._points[key]
+            distance = haversine_km(lat, lon, point_lat, point_lon)
+            if distance <= radius_km:
+                result.append((key, distance))
+        result.sort(key=lambda item: item[1])
+        return result
@@ -0,0 +1,90 @@
+# server/app/services/telemetry_protocol.py
+"""
+Компактний бінарний формат UDP-датаграми телеметрії пристрою.
+
+Модуль не залежить від Flask: ним користуються і сервер (app/services/udp_receiver.py),
+і пристрої - емулятор імпортує його через server/telemetry_protocol.py.
+
+Формат (big-endian, 39 байт):
+    version      B   версія протоколу (PROTOCOL_VERSION)
+    status       B   0 - не передано, далі див. STATUS_CODES
+    device_id    16s UUID пристрою (bytes)
+    sequence     I   лічильник датаграм пристрою
+    timestamp    I   час відправки, секунди Unix
+    signal_rssi  b   dBm, -128 - не передано
+    latency_ms   H   мс, 0xFFFF - не передано
+    packet_loss  H   соті частки відсотка, 0xFFFF - не передано
+    mac          8s  HMAC-SHA256 (перші 8 байт) від усіх попередніх полів
+
+HMAC замінює заголовок X-Device-Api-Key: ключ ніколи не передається в ефір.
+"""
+import hashlib
+import hmac
+import struct
+import uuid
+
+PROTOCOL_VERSION = 1
+
+_BODY = struct.Struct('!BB16sIIbHH')
+MAC_SIZE = 8
+DATAGRAM_SIZE = _BODY.size + MAC_SIZE
+
+# Коди статусу - імена відповідають app.models.DeviceStatus
+STATUS_CODES = {'ONLINE': 1, 'OFFLINE': 2, 'UNSTABLE': 3, 'UNKNOWN': 4}
+_STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+
+_RSSI_NONE = -128
+_U16_NONE = 0xFFFF
+
+
+class DatagramError(ValueError):
+    """Датаграма пошкоджена, має невідомий формат або невірний HMAC."""
+
+
+def _mac(key, body):
+    return hmac.new(key, body, hashlib.sha256).digest()[:MAC_SIZE]
+
+
+def encode_status_datagram(key, device_id, sequence, timestamp, status=None,
+                           signal_rssi=None, latency_ms=None, packet_loss_percent=None):
+    """Кодує оновлення статусу в датаграму. key - bytes, device_id - UUID або рядок."""
+    if not isinstance(device_id, uuid.UUID):
+        device_id = uuid.UUID(str(device_id))
+    body = _BODY.pack(
+        PROTOCOL_VERSION,
+        STATUS_CODES[status.upper()] if status else 0,
+        device_id.bytes,
+        sequence & 0xFFFFFFFF,
+        int(timestamp) & 0xFFFFFFFF,
+        _RSSI_NONE if signal_rssi is None else max(-127, min(127, int(signal_rssi))),
+        _U16_NONE if latency_ms is None else max(0, min(0xFFFE, int(latency_ms))),
+        _U16_NONE if packet_loss_percent is None else max(0, min(10000, round(packet_loss_percent * 100))),
+    )
+    return body + _mac(key, body)
+
+
+def decode_status_datagram(key, datagram):
+    """
+    Перевіряє HMAC і декодує датаграму.
+    Повертає (device_id: UUID, sequence, timestamp, payload), де payload має
+    формат тіла POST /api/devices/<id>/status.
+    """
+    if len(datagram) != DATAGRAM_SIZE:
+        raise DatagramError(f"Invalid datagram size {len(datagram)}, expected {DATAGRAM_SIZE}.")
+    body, mac = datagram[:_BODY.size], datagram[_BODY.size:]
+    if not hmac.compare_digest(mac, _mac(key, body)):
+        raise DatagramError("HMAC verification failed.")
+
+    version, status, device_bytes, sequence, timestamp, rssi, latency, loss = _BODY.unpack(body)
+    if version != PROTOCOL_VERSION:
+        raise DatagramError(f"Unsupported protocol version {version}.")
+    if status and status not in _STATUS_NAMES:
+        raise DatagramError(f"Unknown status code {status}.")
+
+    payload = {
+        'status': _STATUS_NAMES.get(status),
+        'signal_rssi': None if rssi == _RSSI_NONE else rssi,
+        'latency_ms': None if latency == _U16_NONE else latency,
+        'packet_loss_percent': None if loss == _U16_NONE else loss / 100.0,
+    }
+    return uuid.UUID(bytes=device_bytes), sequence, timestamp, payload
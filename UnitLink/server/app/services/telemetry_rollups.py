@@ -0,0 +1,242 @@
+# server/app/services/telemetry_rollups.py
+"""
+Інкрементальні агрегати (rollups) історії телеметрії: 1 хв, 15 хв, 1 год.
+
+Кожен рядок історії з конвеєра обробки додається до відкритих інтервалів усіх
+роздільних здатностей у пам'яті. Інтервал закривається, коли минув його кінець
+плюс ROLLUP_LATE_GRACE_SECONDS (запас на пізні пакети MQTT/UDP), і записується
+в таблицю агрегатів одним пакетним upsert. Якщо дані для інтервалу надійшли
+після закриття (або після перезапуску сервера), рядки об'єднуються: min/max/sum/count
+точні, p95 - наближений (максимум двох значень).
+
+Для початкового заповнення та відновлення є `flask rollups-rebuild`.
+"""
+import atexit
+import collections
+import datetime
+import math
+import threading
+
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import Device, DeviceStatusHistory, ROLLUP_RESOLUTIONS
+from app.models.device_models import ROLLUP_METRICS, ROLLUP_STATS
+from app.services.background import PeriodicTask
+
+# Скільки рядків агрегатів записувати одним INSERT ... ON CONFLICT
+_UPSERT_CHUNK_SIZE = 1000
+
+
+def bucket_floor(timestamp, seconds):
+    """Початок інтервалу тривалістю `seconds`, що містить timestamp (UTC)."""
+    if timestamp.tzinfo is None:
+        # SQLite повертає "наївні" datetime - вважаємо їх UTC
+        timestamp = timestamp.replace(tzinfo=datetime.timezone.utc)
+    epoch = int(timestamp.timestamp())
+    return datetime.datetime.fromtimestamp(epoch - epoch % seconds, tz=datetime.timezone.utc)
+
+
+def _percentile(sorted_values, fraction):
+    """Перцентиль методом найближчого рангу."""
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+
+def compute_stats(samples):
+    """Рахує агрегат для списку словників телеметрії (рядків історії)."""
+    stats = {'sample_count': len(samples)}
+    for metric in ROLLUP_METRICS:
+        values = sorted(s[metric] for s in samples if s.get(metric) is not None)
+        if values:
+            stats.update({f'{metric}_min': values[0], f'{metric}_max': values[-1],
+                          f'{metric}_sum': sum(values), f'{metric}_count': len(values),
+                          f'{metric}_p95': _percentile(values, 0.95)})
+        else:
+            stats.update({f'{metric}_min': None, f'{metric}_max': None, f'{metric}_sum': None,
+                          f'{metric}_count': 0, f'{metric}_p95': None})
+    return stats
+
+
+def merge_stats(a, b):
+    """Об'єднує два агрегати одного інтервалу (p95 - наближено, як максимум)."""
+    merged = {'sample_count': a['sample_count'] + b['sample_count']}
+    for metric in ROLLUP_METRICS:
+        for stat in ROLLUP_STATS:
+            key = f'{metric}_{stat}'
+            x, y = a[key], b[key]
+            if stat == 'count':
+                merged[key] = x + y
+            elif x is None or y is None:
+                merged[key] = y if x is None else x
+            elif stat == 'sum':
+                merged[key] = x + y
+            elif stat == 'min':
+                merged[key] = min(x, y)
+            else:
+                merged[key] = max(x, y)
+    return merged
+
+
+class _BucketSet:
+    """Відкриті інтервали: (resolution, device_id, bucket_start) -> список зразків."""
+
+    def __init__(self):
+        self.buckets = collections.defaultdict(list)
+
+    def add(self, rows):
+        for row in rows:
+            sample = {metric: row.get(metric) for metric in ROLLUP_METRICS}
+            for resolution, (_, seconds) in ROLLUP_RESOLUTIONS.items():
+                self.buckets[(resolution, row['device_id'], bucket_floor(row['timestamp'], seconds))].append(sample)
+
+    def discard_device(self, device_id):
+        for key in [key for key in self.buckets if key[1] == device_id]:
+            del self.buckets[key]
+
+    def pop_closed(self, now, grace, force=False):
+        closed = {}
+        for key in list(self.buckets):
+            resolution, _, bucket_start = key
+            seconds = ROLLUP_RESOLUTIONS[resolution][1]
+            if force or bucket_start + datetime.timedelta(seconds=seconds + grace) <= now:
+                closed[key] = self.buckets.pop(key)
+        return closed
+
+
+def upsert_rollups(closed):
+    """Записує агрегати закритих інтервалів; існуючі рядки об'єднуються з новими."""
+    by_resolution = collections.defaultdict(list)
+    for (resolution, device_id, bucket_start), samples in closed.items():
+        by_resolution[resolution].append(dict(compute_stats(samples), device_id=device_id, bucket_start=bucket_start))
+
+    dialect = db.engine.dialect.name
+    insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+    # PostgreSQL: GREATEST/LEAST ігнорують NULL; у SQLite скалярні max()/min() повертають NULL, тож додаємо coalesce
+    greatest, least = (func.greatest, func.least) if dialect == 'postgresql' else (func.max, func.min)
+
+    for resolution, rows in by_resolution.items():
+        table = ROLLUP_RESOLUTIONS[resolution][0].__table__
+        for start in range(0, len(rows), _UPSERT_CHUNK_SIZE):
+            stmt = insert(table).values(rows[start:start + _UPSERT_CHUNK_SIZE])
+            old, new = table.c, stmt.excluded
+            merged = {'sample_count': old.sample_count + new.sample_count}
+            for metric in ROLLUP_METRICS:
+                for stat in ROLLUP_STATS:
+                    key = f'{metric}_{stat}'
+                    if stat == 'count':
+                        merged[key] = old[key] + new[key]
+                        continue
+                    if stat == 'sum':
+                        merged[key] = func.coalesce(old[key], 0) + func.coalesce(new[key], 0)
+                        continue
+                    # p95 об'єднується наближено - як максимум двох значень
+                    o, n = func.coalesce(old[key], new[key]), func.coalesce(new[key], old[key])
+                    merged[key] = least(o, n) if stat == 'min' else greatest(o, n)
+            db.session.execute(stmt.on_conflict_do_update(index_elements=['device_id', 'bucket_start'], set_=merged))
+
+
+class TelemetryRollupService:
+
+    def __init__(self):
+        self.app = None
+        self._open = _BucketSet()
+        self._lock = threading.Lock()
+        self._flusher = PeriodicTask('telemetry-rollups', self.flush)
+        self._shutdown_registered = False
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('ROLLUPS_ENABLED', True)
+        self.flush_interval = app.config.get('ROLLUP_FLUSH_INTERVAL_SECONDS', 30.0)
+        self.grace = app.config.get('ROLLUP_LATE_GRACE_SECONDS', 60)
+
+    def add(self, rows):
+        """Додає рядки історії (словники з device_id, timestamp та метриками) до відкритих інтервалів."""
+        if not self.enabled or not rows:
+            return
+        with self._lock:
+            self._open.add(rows)
+        self._flusher.start(self.app, self.flush_interval)
+        if not self._shutdown_registered:
+            self._shutdown_registered = True
+            # Реєструється після PeriodicTask.stop, тож виконується раніше (atexit - LIFO)
+            atexit.register(self._flush_all)
+
+    def flush(self, force=False):
+        """Записує в БД закриті інтервали (force=True - усі відкриті). Повертає кількість інтервалів."""
+        with self._lock:
+            closed = self._open.pop_closed(datetime.datetime.now(datetime.timezone.utc), self.grace, force)
+        if not closed:
+            return 0
+        try:
+            try:
+                upsert_rollups(closed)
+                db.session.commit()
+            except IntegrityError:
+                # Пристрій могли видалити, поки його інтервали були відкриті - відкидаємо "осиротілі",
+                # інакше один такий ключ зупинив би запис агрегатів усього парку
+                db.session.rollback()
+                device_ids = {device_id for _, device_id, _ in closed}
+                existing = {row[0] for row in db.session.query(Device.id).filter(Device.id.in_(device_ids)).all()}
+                closed = {key: samples for key, samples in closed.items() if key[1] in existing}
+                if closed:
+                    upsert_rollups(closed)
+                db.session.commit()
+        except Exception:
+            db.session.rollback()
+            # Повертаємо зразки, щоб повторити при наступному виклику
+            with self._lock:
+                for key, samples in closed.items():
+                    self._open.buckets[key].extend(samples)
+            raise
+        return len(closed)
+
+    def forget(self, device_id):
+        """Відкидає відкриті інтервали видаленого пристрою."""
+        with self._lock:
+            self._open.discard_device(device_id)
+
+    def _flush_all(self):
+        with self.app.app_context():
+            try:
+                self.flush(force=True)
+            except Exception as e:
+                self.app.logger.error(f"Failed to flush open telemetry rollups on shutdown: {e}")
+
+    def open_rollups(self, device_ids, resolution, since):
+        """Агрегати ще не записаних інтервалів пристроїв: {(device_id, bucket_start): stats}."""
+        with self._lock:
+            return {(dev, bucket_start): compute_stats(samples)
+                    for (res, dev, bucket_start), samples in self._open.buckets.items()
+                    if res == resolution and dev in device_ids and bucket_start >= since}
+
+    def rebuild(self, since, until=None, chunk_size=5000):
+        """
+        Перераховує агрегати з сирої історії за період (вирівнюється до годинних меж).
+        Повертає кількість записаних інтервалів.
+        """
+        since = bucket_floor(since, ROLLUP_RESOLUTIONS['1h'][1])
+        query = DeviceStatusHistory.query.filter(DeviceStatusHistory.timestamp >= since)
+        if until is not None:
+            until = bucket_floor(until, ROLLUP_RESOLUTIONS['1h'][1])
+            query = query.filter(DeviceStatusHistory.timestamp < until)
+
+        for model, _ in ROLLUP_RESOLUTIONS.values():
+            stale = model.query.filter(model.bucket_start >= since)
+            if until is not None:
+                stale = stale.filter(model.bucket_start < until)
+            stale.delete(synchronize_session=False)
+
+        buckets = _BucketSet()
+        columns = [DeviceStatusHistory.device_id, DeviceStatusHistory.timestamp] + \
+                  [getattr(DeviceStatusHistory, metric) for metric in ROLLUP_METRICS]
+        for row in query.with_entities(*columns).yield_per(chunk_size):
+            buckets.add([row._asdict()])
+        upsert_rollups(buckets.buckets)
+        db.session.commit()
+        return len(buckets.buckets)
+
+
+telemetry_rollups = TelemetryRollupService()
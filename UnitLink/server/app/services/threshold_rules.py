@@ -0,0 +1,96 @@
+# server/app/services/threshold_rules.py
+"""
+Правила порогів телеметрії з гістерезисом (події PARAMETER_THRESHOLD).
+
+Пороги задаються в конфігурації TELEMETRY_THRESHOLDS: секція 'default' та
+перевизначення для окремих UnitType. Кожне правило має поріг спрацювання
+('above' або 'below') і поріг скидання ('clear'), тож значення, що коливається
+біля межі, не генерує потік подій.
+
+Правила компілюються в кортежі при init_app, а стан "порушено/в нормі"
+тримається в множині в пам'яті, тому перевірка запису - кілька порівнянь.
+"""
+import threading
+
+from app.models import UnitType
+
+METRICS = ('signal_rssi', 'latency_ms', 'packet_loss_percent')
+
+
+class ThresholdRulesEngine:
+
+    def __init__(self):
+        self._rules = {}  # UnitType.name -> ((metric, direction, trigger, clear), ...)
+        self._breached = set()  # (device_id, metric)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self._rules = self.compile(app.config.get('TELEMETRY_THRESHOLDS', {}))
+
+    @staticmethod
+    def compile(config):
+        """Зводить 'default' та перевизначення типів у кортежі правил для кожного UnitType."""
+        compiled = {}
+        for unit_type in UnitType:
+            merged = dict(config.get('default', {}))
+            merged.update(config.get(unit_type.name, {}))
+            rules = []
+            for metric, rule in merged.items():
+                if metric not in METRICS or not rule:
+                    continue
+                if 'above' in rule:
+                    rules.append((metric, 1, rule['above'], rule.get('clear', rule['above'])))
+                elif 'below' in rule:
+                    # Для "нижче порогу" інвертуємо знак, щоб порівнювати однаково
+                    rules.append((metric, -1, -rule['below'], -rule.get('clear', rule['below'])))
+            compiled[unit_type.name] = tuple(rules)
+        return compiled
+
+    def evaluate_batch(self, samples):
+        """
+        Перевіряє пакет записів телеметрії, не змінюючи збережений стан.
+
+        :param samples: список (device_id, unit_type_name, telemetry: dict) у порядку надходження
+        :return: (events, changes) - події [{'device_id', 'metric', 'kind': 'breach'|'clear',
+                 'direction': 'above'|'below', 'value', 'threshold'}] та зміни стану для commit()
+        """
+        events = []
+        changes = {}  # (device_id, metric) -> порушено? (накладається на self._breached у межах пакета)
+        breached = self._breached
+        for device_id, unit_type, telemetry in samples:
+            for metric, direction, trigger, clear in self._rules.get(unit_type, ()):
+                value = telemetry.get(metric)
+                if value is None:
+                    continue
+                key = (device_id, metric)
+                is_breached = changes[key] if key in changes else key in breached
+                signed = value * direction
+                if not is_breached and signed > trigger:
+                    changes[key] = True
+                    events.append({'device_id': device_id, 'metric': metric, 'kind': 'breach',
+                                   'direction': 'above' if direction > 0 else 'below',
+                                   'value': value, 'threshold': trigger * direction})
+                elif is_breached and signed <= clear:
+                    changes[key] = False
+                    events.append({'device_id': device_id, 'metric': metric, 'kind': 'clear',
+                                   'direction': 'above' if direction > 0 else 'below',
+                                   'value': value, 'threshold': clear * direction})
+        return events, changes
+
+    def commit(self, changes):
+        """Застосовує зміни стану після успішного запису подій у БД."""
+        if not changes:
+            return
+        with self._lock:
+            for key, is_breached in changes.items():
+                if is_breached:
+                    self._breached.add(key)
+                else:
+                    self._breached.discard(key)
+
+    def forget(self, device_id):
+        with self._lock:
+            self._breached = {key for key in self._breached if key[0] != device_id}
+
+
+threshold_engine = ThresholdRulesEngine()
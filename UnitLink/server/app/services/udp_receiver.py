@@ -0,0 +1,140 @@
+# server/app/services/udp_receiver.py
+"""
+Asyncio UDP-приймач бінарної телеметрії (формат - app/services/telemetry_protocol.py).
+
+Цикл подій asyncio працює в окремому потоці: датаграми перевіряються (HMAC,
+розмір, вікно часу, повтори) одразу при отриманні, накопичуються і пакетами
+передаються в ingest_status_updates у пулі потоків, щоб запис у БД не блокував
+прийом.
+"""
+import asyncio
+import atexit
+import threading
+import time
+
+from app.services.history_buffer import HistoryBufferFull
+from app.services.ingest_service import ingest_status_updates
+from app.services.telemetry_protocol import DatagramError, decode_status_datagram
+
+
+class _TelemetryDatagramProtocol(asyncio.DatagramProtocol):
+
+    def __init__(self, receiver):
+        self.receiver = receiver
+
+    def datagram_received(self, data, addr):
+        self.receiver.handle_datagram(data, addr)
+
+
+class UdpTelemetryReceiver:
+    """Приймач UDP-телеметрії з пакетною передачею в конвеєр обробки."""
+
+    def __init__(self):
+        self.app = None
+        self._loop = None
+        self._thread = None
+        self._transport = None
+        self._flusher = None
+        self._pending = []
+        self._last_seen = {}  # device_id -> (timestamp, sequence) останньої прийнятої датаграми
+        self.stats = {'received': 0, 'rejected': 0, 'replayed': 0, 'ingested': 0}
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('UDP_ENABLED', False)
+        self.host = app.config.get('UDP_BIND_HOST', '0.0.0.0')
+        self.port = app.config.get('UDP_PORT', 5005)
+        # Окремий ключ: ключ HTTP API пристроїв не повинен підписувати датаграми
+        key = app.config.get('UDP_HMAC_KEY')
+        self.key = key.encode('utf-8') if key else None
+        self.max_skew = app.config.get('UDP_MAX_CLOCK_SKEW_SECONDS', 120)
+        self.batch_size = app.config.get('UDP_BATCH_SIZE', 500)
+        self.batch_interval = app.config.get('UDP_BATCH_INTERVAL_SECONDS', 0.5)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        if not self.key:
+            self.app.logger.error("UDP telemetry receiver is not started: UDP_HMAC_KEY is not set.")
+            return
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(ready,), name='udp-telemetry', daemon=True)
+        self._thread.start()
+        ready.wait()
+        atexit.register(self.stop)
+        self.app.logger.info(f"UDP telemetry receiver listening on {self.host}:{self.port}.")
+
+    def stop(self):
+        if self._thread is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._thread = None
+
+    # --- Потік циклу подій ---
+
+    def _run(self, ready):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._transport, _ = self._loop.run_until_complete(self._loop.create_datagram_endpoint(
+            lambda: _TelemetryDatagramProtocol(self), local_addr=(self.host, self.port)))
+        self._flusher = self._loop.create_task(self._flush_periodically())
+        ready.set()
+        self._loop.run_forever()
+        self._loop.close()
+
+    async def _shutdown(self):
+        self._transport.close()
+        self._flusher.cancel()
+        await self._flush()
+
+    def handle_datagram(self, data, addr):
+        self.stats['received'] += 1
+        try:
+            device_id, sequence, timestamp, payload = decode_status_datagram(self.key, data)
+        except DatagramError as e:
+            self.stats['rejected'] += 1
+            self.app.logger.debug(f"Rejected UDP datagram from {addr}: {e}")
+            return
+
+        # Захист від повторів: час у межах вікна і строго зростаюча пара (timestamp, sequence)
+        if abs(time.time() - timestamp) > self.max_skew:
+            self.stats['rejected'] += 1
+            self.app.logger.debug(f"Rejected UDP datagram from {addr}: timestamp outside allowed skew.")
+            return
+        marker = (timestamp, sequence)
+        if marker <= self._last_seen.get(device_id, (0, -1)):
+            self.stats['replayed'] += 1
+            return
+        self._last_seen[device_id] = marker
+
+        self._pending.append((device_id, payload))
+        if len(self._pending) >= self.batch_size:
+            self._loop.create_task(self._flush())
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.batch_interval)
+            await self._flush()
+
+    async def _flush(self):
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        # Запис у БД блокуючий - виконуємо в пулі потоків, цикл подій продовжує приймати датаграми
+        await self._loop.run_in_executor(None, self._ingest, batch)
+
+    def _ingest(self, batch):
+        try:
+            with self.app.app_context():
+                results = ingest_status_updates(batch)
+            self.stats['ingested'] += sum(1 for r in results if r['code'] == 200)
+        except HistoryBufferFull as e:
+            # UDP не має повторної доставки - фіксуємо втрату
+            self.app.logger.warning(f"Dropped {len(batch)} UDP record(s): {e}")
+        except Exception as e:
+            self.app.logger.error(f"UDP batch of {len(batch)} record(s) failed: {e}")
+
+
+udp_receiver = UdpTelemetryReceiver()
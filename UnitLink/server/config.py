@@ -24,6 +24,112 @@ class Config:
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS') or "http://localhost:3000"
     FRONTEND_URL = 'http://localhost:3000'
     DEVICE_API_KEY = os.environ.get('DEVICE_API_KEY') or '}Tg4[n~a@7G7g"1w,W_!1^)h_c9>a1'
+    # Максимальна кількість записів в одному запиті /api/devices/status/batch
+    STATUS_BATCH_MAX_SIZE = int(os.environ.get('STATUS_BATCH_MAX_SIZE', 500))
+    # Буфер відкладеного запису історії телеметрії (write-behind)
+    HISTORY_BUFFER_ENABLED = os.environ.get('HISTORY_BUFFER_ENABLED', 'true').lower() == 'true'
+    HISTORY_BUFFER_MAX_SIZE = int(os.environ.get('HISTORY_BUFFER_MAX_SIZE', 50000))  # Рядків у черзі
+    HISTORY_FLUSH_BATCH_SIZE = int(os.environ.get('HISTORY_FLUSH_BATCH_SIZE', 1000))
+    HISTORY_FLUSH_INTERVAL_SECONDS = float(os.environ.get('HISTORY_FLUSH_INTERVAL_SECONDS', 2.0))
+    HISTORY_BUFFER_SUBMIT_TIMEOUT_SECONDS = 5.0  # Скільки чекати місця в черзі перед відповіддю 503
+    HISTORY_BUFFER_USE_COPY = True  # COPY FROM STDIN на PostgreSQL замість executemany
+    # Після стількох невдалих спроб запису пакет відкидається (рядки залишаються в лозі помилок)
+    HISTORY_FLUSH_MAX_ATTEMPTS = int(os.environ.get('HISTORY_FLUSH_MAX_ATTEMPTS', 10))
+    # Як часто зберігати накопичені в пам'яті значення devices.last_seen
+    LAST_SEEN_FLUSH_INTERVAL_SECONDS = float(os.environ.get('LAST_SEEN_FLUSH_INTERVAL_SECONDS', 10.0))
+    # Записів (версія, пристрій) у журналі змін реєстру для /api/devices/changes; старіша версія - повний список
+    DEVICE_CHANGES_JOURNAL_SIZE = int(os.environ.get('DEVICE_CHANGES_JOURNAL_SIZE', 50000))
+    # Розмір комірки сітки просторового індексу пристроїв у градусах (bbox / near у /api/devices)
+    DEVICE_GRID_CELL_DEGREES = float(os.environ.get('DEVICE_GRID_CELL_DEGREES', 0.25))
+    # Кластери карти (/api/devices/clusters): комірка масштабу zoom - тайл рівня zoom + CLUSTER_CELL_ZOOM_OFFSET;
+    # сітка ведеться до CLUSTER_MAX_ZOOM, ближче карта показує окремі підрозділи
+    CLUSTER_MAX_ZOOM = int(os.environ.get('CLUSTER_MAX_ZOOM', 14))
+    CLUSTER_CELL_ZOOM_OFFSET = int(os.environ.get('CLUSTER_CELL_ZOOM_OFFSET', 2))
+    # Межі областей для визначення регіону пристрою (app/services/region_index.py) - той самий файл, що малює карта
+    REGIONS_GEOJSON_PATH = os.environ.get('REGIONS_GEOJSON_PATH') or \
+        os.path.join(basedir, '..', 'client', 'public', 'ukraine_borders.geojson')
+    # Кількість смуг широти в сітці ребер кожної області
+    REGION_EDGE_BANDS = int(os.environ.get('REGION_EDGE_BANDS', 64))
+    # Сторож heartbeat-ів: пристрій без повідомлень довше таймауту переводиться в OFFLINE
+    HEARTBEAT_WATCHDOG_ENABLED = os.environ.get('HEARTBEAT_WATCHDOG_ENABLED', 'true').lower() == 'true'
+    HEARTBEAT_TIMEOUT_SECONDS = int(os.environ.get('HEARTBEAT_TIMEOUT_SECONDS', 90))  # 6 інтервалів емулятора
+    # Пороги телеметрії для подій PARAMETER_THRESHOLD (див. app/services/threshold_rules.py).
+    # 'above'/'below' - поріг спрацювання, 'clear' - поріг повернення в норму (гістерезис).
+    # Ключі, крім 'default', - імена UnitType; вони перевизначають окремі метрики.
+    TELEMETRY_THRESHOLDS = {
+        'default': {
+            'signal_rssi': {'below': -95, 'clear': -90},
+            'latency_ms': {'above': 400, 'clear': 300},
+            'packet_loss_percent': {'above': 8.0, 'clear': 5.0},
+        },
+        'COMMAND_POST': {
+            'latency_ms': {'above': 250, 'clear': 180},
+            'packet_loss_percent': {'above': 5.0, 'clear': 3.0},
+        },
+        'COMMUNICATION_HUB': {
+            'signal_rssi': {'below': -90, 'clear': -85},
+            'latency_ms': {'above': 250, 'clear': 180},
+        },
+    }
+    # Дедуплікація сповіщень (див. app/services/alert_dedup.py): повтори в межах вікна
+    # згортаються в одне сповіщення; ALERT_FLAP_THRESHOLD змін статусу за ALERT_FLAP_WINDOW_SECONDS - флапінг
+    ALERT_DEDUP_WINDOW_SECONDS = int(os.environ.get('ALERT_DEDUP_WINDOW_SECONDS', 600))
+    ALERT_FLAP_WINDOW_SECONDS = int(os.environ.get('ALERT_FLAP_WINDOW_SECONDS', 600))
+    ALERT_FLAP_THRESHOLD = int(os.environ.get('ALERT_FLAP_THRESHOLD', 6))
+    # Дельта-синхронізація сповіщень (/api/alerts/unacknowledged?since=...): перекриття вікна для
+    # транзакцій, що завершились із запізненням; старіший курсор - повний список
+    ALERT_SYNC_OVERLAP_SECONDS = int(os.environ.get('ALERT_SYNC_OVERLAP_SECONDS', 30))
+    ALERT_SYNC_MAX_AGE_SECONDS = int(os.environ.get('ALERT_SYNC_MAX_AGE_SECONDS', 86400))
+    # Найбільше id в одному масовому підтвердженні (/api/alerts/acknowledge)
+    ALERT_BULK_ACK_MAX_IDS = int(os.environ.get('ALERT_BULK_ACK_MAX_IDS', 1000))
+    # Агрегати історії телеметрії 1 хв / 15 хв / 1 год (див. app/services/telemetry_rollups.py)
+    ROLLUPS_ENABLED = os.environ.get('ROLLUPS_ENABLED', 'true').lower() == 'true'
+    ROLLUP_FLUSH_INTERVAL_SECONDS = float(os.environ.get('ROLLUP_FLUSH_INTERVAL_SECONDS', 30.0))
+    ROLLUP_LATE_GRACE_SECONDS = int(os.environ.get('ROLLUP_LATE_GRACE_SECONDS', 60))
+    # Для resolution=auto історія віддається в найдрібнішій роздільній здатності, що дає не більше точок
+    HISTORY_AUTO_MAX_POINTS = int(os.environ.get('HISTORY_AUTO_MAX_POINTS', 1500))
+    # Орієнтовний інтервал heartbeat-ів пристрою - для оцінки кількості сирих точок
+    HISTORY_RAW_INTERVAL_SECONDS = int(os.environ.get('HISTORY_RAW_INTERVAL_SECONDS', 15))
+    # Скільки рядків історії читати з курсора БД за раз (потокові відповіді, див. app/services/json_stream.py)
+    HISTORY_STREAM_BATCH_SIZE = int(os.environ.get('HISTORY_STREAM_BATCH_SIZE', 2000))
+    # Журнал подій: загальна кількість кешується; на PostgreSQL від LOGS_EXACT_COUNT_LIMIT рядків - оцінка зі статистики
+    LOGS_TOTAL_CACHE_SECONDS = float(os.environ.get('LOGS_TOTAL_CACHE_SECONDS', 30))
+    LOGS_EXACT_COUNT_LIMIT = int(os.environ.get('LOGS_EXACT_COUNT_LIMIT', 1000000))
+    # З фільтрами/пошуком записи рахуються лише до цієї межі (далі total_is_estimate)
+    LOGS_FILTERED_COUNT_LIMIT = int(os.environ.get('LOGS_FILTERED_COUNT_LIMIT', 10000))
+    # Рядків в одній групі (row group / record batch) архівного експорту (flask export-history, /api/admin/export)
+    EXPORT_CHUNK_ROWS = int(os.environ.get('EXPORT_CHUNK_ROWS', 50000))
+    # Максимум пристроїв в одному запиті /api/devices/history
+    FLEET_HISTORY_MAX_DEVICES = int(os.environ.get('FLEET_HISTORY_MAX_DEVICES', 200))
+    # Секціонування історії та ретенція (див. app/services/history_partitions.py).
+    # HISTORY_RETENTION_DAYS - глибина історії для `flask history-retention` (0 - не задана).
+    # Періодичне видалення у процесі сервера - лише якщо явно ввімкнене HISTORY_AUTO_RETENTION
+    HISTORY_RETENTION_DAYS = int(os.environ.get('HISTORY_RETENTION_DAYS', 0))
+    HISTORY_AUTO_RETENTION = os.environ.get('HISTORY_AUTO_RETENTION', 'false').lower() == 'true'
+    HISTORY_PARTITIONS_AHEAD = int(os.environ.get('HISTORY_PARTITIONS_AHEAD', 2))
+    HISTORY_MAINTENANCE_INTERVAL_SECONDS = int(os.environ.get('HISTORY_MAINTENANCE_INTERVAL_SECONDS', 6 * 3600))
+    # Прийом телеметрії через MQTT (див. app/services/mqtt_bridge.py)
+    MQTT_ENABLED = os.environ.get('MQTT_ENABLED', 'false').lower() == 'true'
+    MQTT_BROKER_HOST = os.environ.get('MQTT_BROKER_HOST') or 'localhost'
+    MQTT_BROKER_PORT = int(os.environ.get('MQTT_BROKER_PORT', 1883))
+    MQTT_USERNAME = os.environ.get('MQTT_USERNAME')
+    MQTT_PASSWORD = os.environ.get('MQTT_PASSWORD')
+    MQTT_TLS = os.environ.get('MQTT_TLS', 'false').lower() == 'true'
+    MQTT_CLIENT_ID = os.environ.get('MQTT_CLIENT_ID') or 'unitlink-server'
+    MQTT_TOPIC_PREFIX = os.environ.get('MQTT_TOPIC_PREFIX') or 'unitlink/devices'
+    MQTT_QOS = int(os.environ.get('MQTT_QOS', 1))
+    MQTT_BATCH_SIZE = 200  # Максимум повідомлень в одній транзакції
+    MQTT_BATCH_INTERVAL_SECONDS = 1.0  # Максимальна затримка перед записом неповного пакета
+    # Повідомлень у черзі до запису; при заповненні QoS 0 відкидаються, QoS 1/2 лишаються непідтвердженими
+    MQTT_QUEUE_MAX = int(os.environ.get('MQTT_QUEUE_MAX', 10000))
+    # Прийом бінарної телеметрії через UDP (див. app/services/telemetry_protocol.py)
+    UDP_ENABLED = os.environ.get('UDP_ENABLED', 'false').lower() == 'true'
+    UDP_BIND_HOST = os.environ.get('UDP_BIND_HOST') or '0.0.0.0'
+    UDP_PORT = int(os.environ.get('UDP_PORT', 5005))
+    UDP_HMAC_KEY = os.environ.get('UDP_HMAC_KEY')  # Обов'язковий: без нього UDP-приймач не запускається
+    UDP_MAX_CLOCK_SKEW_SECONDS = 120  # Допустима розбіжність годинника пристрою
+    UDP_BATCH_SIZE = 500
+    UDP_BATCH_INTERVAL_SECONDS = 0.5
 
 
 class DevelopmentConfig(Config):
@@ -33,6 +139,15 @@ class DevelopmentConfig(Config):
     # SQLALCHEMY_DATABASE_URI = os.environ.get('DEV_DATABASE_URL') or Config.SQLALCHEMY_DATABASE_URI
 
 
+class TestingConfig(Config):
+    """Конфігурація для тестів (tests/). Тимчасову SQLite-базу підставляє tests/conftest.py."""
+    TESTING = True
+    # Окрема порожня база PostgreSQL для тестів планів запитів; схема створюється міграціями
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_POSTGRES_URL') or 'sqlite://'
+    # Історія пишеться в транзакції запиту, без фонового потоку буфера
+    HISTORY_BUFFER_ENABLED = False
+
+
 class ProductionConfig(Config):
     """Конфігурація для продакшену."""
     DEBUG = False
@@ -48,5 +163,6 @@ class ProductionConfig(Config):
 config = {
     'development': DevelopmentConfig,
     'production': ProductionConfig,
+    'testing': TestingConfig,
     'default': DevelopmentConfig
 }
\ No newline at end of file
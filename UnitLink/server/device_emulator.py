@@ -1,3 +1,4 @@
+import os
 import requests
 import json
 import time
@@ -8,6 +9,17 @@ import uuid
 BACKEND_URL = "http://localhost:5000/api/devices"
 EMULATOR_API_KEY = '}Tg4[n~a@7G7g"1w,W_!1^)h_c9>a1'
 
+# Транспорт: "http" (POST на бекенд), "mqtt" (публікація в брокер, див. app/services/mqtt_bridge.py)
+# або "udp" (бінарні датаграми з HMAC, див. telemetry_protocol.py)
+TRANSPORT = os.environ.get('EMULATOR_TRANSPORT', 'http')
+MQTT_BROKER_HOST = os.environ.get('MQTT_BROKER_HOST', 'localhost')
+MQTT_BROKER_PORT = int(os.environ.get('MQTT_BROKER_PORT', 1883))
+MQTT_TOPIC_PREFIX = os.environ.get('MQTT_TOPIC_PREFIX', 'unitlink/devices')
+MQTT_QOS = 1
+UDP_SERVER_HOST = os.environ.get('UDP_SERVER_HOST', 'localhost')
+UDP_SERVER_PORT = int(os.environ.get('UDP_PORT', 5005))
+UDP_HMAC_KEY = os.environ.get('UDP_HMAC_KEY')  # Той самий ключ, що й у сервера
+
 DEVICE_IDS_TO_SIMULATE = [
     "2934aa60-9e0c-498b-b6ab-9a3aced153b3",
     "e581b1bb-b017-449b-976b-cc95d7e8ea6e",
@@ -72,8 +84,50 @@ def generate_status_data(status_type):
     }
 
 
+_mqtt_client = None
+
+
+def get_mqtt_client():
+    """Створює (один раз) постійне з'єднання з MQTT-брокером."""
+    global _mqtt_client
+    if _mqtt_client is None:
+        import paho.mqtt.client as mqtt
+        _mqtt_client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id=f"emulator-{uuid.uuid4().hex[:8]}")
+        _mqtt_client.connect(MQTT_BROKER_HOST, MQTT_BROKER_PORT, keepalive=60)
+        _mqtt_client.loop_start()
+    return _mqtt_client
+
+
+def send_status_update_mqtt(device_id, data):
+    """Публікує оновлення статусу в MQTT-топік пристрою."""
+    topic = f"{MQTT_TOPIC_PREFIX}/{device_id}/status"
+    info = get_mqtt_client().publish(topic, json.dumps(data), qos=MQTT_QOS)
+    print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Device {device_id}: Published {data['status']} to {topic} (rc={info.rc})")
+
+
+_udp_socket = None
+_udp_sequence = 0
+
+
+def send_status_update_udp(device_id, data):
+    """Надсилає оновлення статусу однією бінарною датаграмою (39 байт)."""
+    global _udp_socket, _udp_sequence
+    import socket
+    from telemetry_protocol import encode_status_datagram
+    if _udp_socket is None:
+        _udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    _udp_sequence += 1
+    datagram = encode_status_datagram(UDP_HMAC_KEY.encode('utf-8'), device_id, _udp_sequence, time.time(), **data)
+    _udp_socket.sendto(datagram, (UDP_SERVER_HOST, UDP_SERVER_PORT))
+    print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Device {device_id}: Sent {data['status']} via UDP ({len(datagram)} bytes)")
+
+
 def send_status_update(device_id, data):
     """Надсилає оновлення статусу на бекенд."""
+    if TRANSPORT == 'mqtt':
+        return send_status_update_mqtt(device_id, data)
+    if TRANSPORT == 'udp':
+        return send_status_update_udp(device_id, data)
     url = f"{BACKEND_URL}/{device_id}/status"
     headers = {
         'Content-Type': 'application/json',
@@ -96,10 +150,14 @@ if __name__ == "__main__":
     if num_devices == 0:
         print("Не вказано жодного ID пристрою для симуляції.")
         exit()
+    if TRANSPORT == 'udp' and not UDP_HMAC_KEY:
+        print("Для транспорту udp задайте UDP_HMAC_KEY (той самий, що й на сервері).")
+        exit()
 
     print("Starting device emulator...")
     print(f"Simulating {num_devices} devices.")
     print(f"Update interval: {UPDATE_INTERVAL_SECONDS} seconds.")
+    print(f"Transport: {TRANSPORT}")
     print(f"API Key: ...{EMULATOR_API_KEY[-5:]}")  # Показуємо тільки останні 5 символів ключа
     print("Press Ctrl+C to stop.")
 
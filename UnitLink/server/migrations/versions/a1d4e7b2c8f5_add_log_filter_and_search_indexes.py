@@ -0,0 +1,77 @@
+"""Add log filter and full-text search indexes
+
+Revision ID: a1d4e7b2c8f5
+Revises: f2b6d8a4c9e1
+Create Date: 2026-10-18 15:02:44.613290
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1d4e7b2c8f5'
+down_revision = 'f2b6d8a4c9e1'
+branch_labels = None
+depends_on = None
+
+# Має збігатися з LOG_SEARCH_DOCUMENT_SQL в app/models/log_models.py
+SEARCH_DOCUMENT_SQL = "to_tsvector('simple', coalesce(message, '') || ' ' || coalesce(details::text, ''))"
+
+# Копія LOG_SEARCH_SQLITE_DDL з app/models/log_models.py на момент цієї ревізії - навмисно:
+# міграції не імпортують моделі, щоб подальші зміни моделей не змінювали вже застосовану ревізію.
+# Текстові значення JSON з details (без \u-екранування)
+SQLITE_DETAILS_TEXT = "(SELECT group_concat(value, ' ') FROM json_tree({row}.details) WHERE type = 'text')"
+
+SQLITE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS connection_logs_fts USING fts5(message, details)",
+    "CREATE TRIGGER IF NOT EXISTS connection_logs_fts_ai AFTER INSERT ON connection_logs BEGIN "
+    "INSERT INTO connection_logs_fts(rowid, message, details) "
+    f"VALUES (new.id, new.message, {SQLITE_DETAILS_TEXT.format(row='new')}); END",
+    "CREATE TRIGGER IF NOT EXISTS connection_logs_fts_ad AFTER DELETE ON connection_logs BEGIN "
+    "DELETE FROM connection_logs_fts WHERE rowid = old.id; END",
+    "CREATE TRIGGER IF NOT EXISTS connection_logs_fts_au AFTER UPDATE ON connection_logs BEGIN "
+    "DELETE FROM connection_logs_fts WHERE rowid = old.id; "
+    "INSERT INTO connection_logs_fts(rowid, message, details) "
+    f"VALUES (new.id, new.message, {SQLITE_DETAILS_TEXT.format(row='new')}); END",
+)
+
+
+def upgrade():
+    # Фільтри журналу: (<поле>, timestamp, id) замінюють окремі індекси device_id / user_id
+    op.create_index('ix_connection_logs_device_id_timestamp_id', 'connection_logs',
+                    ['device_id', 'timestamp', 'id'], unique=False)
+    op.create_index('ix_connection_logs_user_id_timestamp_id', 'connection_logs',
+                    ['user_id', 'timestamp', 'id'], unique=False)
+    op.create_index('ix_connection_logs_event_type_timestamp_id', 'connection_logs',
+                    ['event_type', 'timestamp', 'id'], unique=False)
+    op.drop_index('ix_connection_logs_device_id', table_name='connection_logs')
+    op.drop_index('ix_connection_logs_user_id', table_name='connection_logs')
+
+    # Повнотекстовий пошук по message + details
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.create_index('ix_connection_logs_search', 'connection_logs', [sa.text(SEARCH_DOCUMENT_SQL)],
+                        unique=False, postgresql_using='gin')
+    elif dialect == 'sqlite':
+        for statement in SQLITE_FTS_DDL:
+            op.execute(statement)
+        # Індексуємо вже наявні записи
+        op.execute("INSERT INTO connection_logs_fts(rowid, message, details) "
+                   f"SELECT id, message, {SQLITE_DETAILS_TEXT.format(row='connection_logs')} FROM connection_logs")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.drop_index('ix_connection_logs_search', table_name='connection_logs')
+    elif dialect == 'sqlite':
+        for trigger in ('connection_logs_fts_ai', 'connection_logs_fts_ad', 'connection_logs_fts_au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS connection_logs_fts")
+
+    op.create_index('ix_connection_logs_user_id', 'connection_logs', ['user_id'], unique=False)
+    op.create_index('ix_connection_logs_device_id', 'connection_logs', ['device_id'], unique=False)
+    op.drop_index('ix_connection_logs_event_type_timestamp_id', table_name='connection_logs')
+    op.drop_index('ix_connection_logs_user_id_timestamp_id', table_name='connection_logs')
+    op.drop_index('ix_connection_logs_device_id_timestamp_id', table_name='connection_logs')
@@ -0,0 +1,33 @@
+"""Add alert deduplication columns
+
+Revision ID: b3f1c2d4e5a6
+Revises: 88ae3ea75677
+Create Date: 2026-10-18 10:12:41.204518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3f1c2d4e5a6'
+down_revision = '88ae3ea75677'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('alerts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('dedup_key', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('occurrence_count', sa.Integer(), nullable=False, server_default='1'))
+        batch_op.add_column(sa.Column('last_occurred_at', sa.DateTime(timezone=True), nullable=True))
+
+    # Наявні сповіщення вважаємо одиничними
+    op.execute("UPDATE alerts SET last_occurred_at = timestamp WHERE last_occurred_at IS NULL")
+
+
+def downgrade():
+    with op.batch_alter_table('alerts', schema=None) as batch_op:
+        batch_op.drop_column('last_occurred_at')
+        batch_op.drop_column('occurrence_count')
+        batch_op.drop_column('dedup_key')
@@ -0,0 +1,34 @@
+"""Add alert updated_at for incremental sync
+
+Revision ID: b8e2f4a6d1c3
+Revises: a1d4e7b2c8f5
+Create Date: 2026-10-18 16:05:12.418207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8e2f4a6d1c3'
+down_revision = 'a1d4e7b2c8f5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('alerts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True))
+
+    # Наявні сповіщення: остання відома зміна - підтвердження або останній повтор
+    op.execute("UPDATE alerts SET updated_at = coalesce(acknowledged_at, last_occurred_at, timestamp)")
+
+    with op.batch_alter_table('alerts', schema=None) as batch_op:
+        batch_op.alter_column('updated_at', nullable=False, server_default=sa.func.now())
+        batch_op.create_index('ix_alerts_updated_at', ['updated_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('alerts', schema=None) as batch_op:
+        batch_op.drop_index('ix_alerts_updated_at')
+        batch_op.drop_column('updated_at')
@@ -0,0 +1,48 @@
+"""Add telemetry rollup tables
+
+Revision ID: c4a2d9e1f7b3
+Revises: b3f1c2d4e5a6
+Create Date: 2026-10-18 11:02:17.558230
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4a2d9e1f7b3'
+down_revision = 'b3f1c2d4e5a6'
+branch_labels = None
+depends_on = None
+
+ROLLUP_TABLES = ('device_telemetry_rollup_1m', 'device_telemetry_rollup_15m', 'device_telemetry_rollup_1h')
+
+
+def _metric_columns(metric, value_type, sum_type):
+    return [
+        sa.Column(f'{metric}_min', value_type, nullable=True),
+        sa.Column(f'{metric}_max', value_type, nullable=True),
+        sa.Column(f'{metric}_sum', sum_type, nullable=True),
+        sa.Column(f'{metric}_count', sa.Integer(), nullable=False),
+        sa.Column(f'{metric}_p95', value_type, nullable=True),
+    ]
+
+
+def upgrade():
+    for table_name in ROLLUP_TABLES:
+        op.create_table(table_name,
+            sa.Column('device_id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('bucket_start', sa.DateTime(timezone=True), nullable=False),
+            sa.Column('sample_count', sa.Integer(), nullable=False),
+            *_metric_columns('signal_rssi', sa.Integer(), sa.BigInteger()),
+            *_metric_columns('latency_ms', sa.Integer(), sa.BigInteger()),
+            *_metric_columns('packet_loss_percent', sa.Float(), sa.Float()),
+            sa.ForeignKeyConstraint(['device_id'], ['devices.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('device_id', 'bucket_start')
+        )
+
+
+def downgrade():
+    for table_name in reversed(ROLLUP_TABLES):
+        op.drop_table(table_name)
@@ -0,0 +1,29 @@
+"""Add device region
+
+Revision ID: c6f1a9d3e2b7
+Revises: b8e2f4a6d1c3
+Create Date: 2026-10-18 17:42:30.915604
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6f1a9d3e2b7'
+down_revision = 'b8e2f4a6d1c3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Значення для наявних пристроїв заповнює `flask assign-regions` (потрібна геометрія областей)
+    with op.batch_alter_table('devices', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('region', sa.String(length=8), nullable=True))
+        batch_op.create_index(batch_op.f('ix_devices_region'), ['region'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('devices', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_devices_region'))
+        batch_op.drop_column('region')
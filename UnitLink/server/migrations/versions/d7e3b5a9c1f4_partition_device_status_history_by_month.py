@@ -0,0 +1,110 @@
+"""Partition device_status_history by month (PostgreSQL)
+
+Revision ID: d7e3b5a9c1f4
+Revises: c4a2d9e1f7b3
+Create Date: 2026-10-18 12:21:40.913377
+
+"""
+import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7e3b5a9c1f4'
+down_revision = 'c4a2d9e1f7b3'
+branch_labels = None
+depends_on = None
+
+TABLE = 'device_status_history'
+LEGACY = 'device_status_history_legacy'
+SEQUENCE = 'device_status_history_id_seq'
+# Скільки місяців наперед створювати секції (далі - app/services/history_partitions.py)
+MONTHS_AHEAD = 2
+
+
+def _add_months(moment, months):
+    years, month_index = divmod(moment.month - 1 + months, 12)
+    return moment.replace(year=moment.year + years, month=month_index + 1)
+
+
+def _create_partition(start):
+    end = _add_months(start, 1)
+    op.execute(f"CREATE TABLE IF NOT EXISTS {TABLE}_p{start:%Y%m} PARTITION OF {TABLE} "
+               f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')")
+
+
+def upgrade():
+    # Декларативні секції є лише в PostgreSQL; на SQLite таблиця лишається звичайною
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute(f"ALTER TABLE {TABLE} RENAME TO {LEGACY}")
+    op.execute(f"ALTER INDEX ix_{TABLE}_device_id RENAME TO ix_{LEGACY}_device_id")
+    op.execute(f"ALTER INDEX ix_{TABLE}_timestamp RENAME TO ix_{LEGACY}_timestamp")
+    op.execute(f"ALTER TABLE {LEGACY} RENAME CONSTRAINT {TABLE}_pkey TO {LEGACY}_pkey")
+    # Послідовність id переходить до нової таблиці
+    op.execute(f"ALTER SEQUENCE {SEQUENCE} OWNED BY NONE")
+
+    # Унікальні обмеження секціонованої таблиці мають містити ключ секціонування
+    op.execute(f"""
+        CREATE TABLE {TABLE} (
+            id BIGINT NOT NULL DEFAULT nextval('{SEQUENCE}'),
+            device_id UUID NOT NULL REFERENCES devices (id) ON DELETE CASCADE,
+            timestamp TIMESTAMP WITH TIME ZONE NOT NULL,
+            signal_rssi INTEGER,
+            latency_ms INTEGER,
+            packet_loss_percent DOUBLE PRECISION,
+            CONSTRAINT {TABLE}_pkey PRIMARY KEY (id, timestamp)
+        ) PARTITION BY RANGE (timestamp)
+    """)
+    op.execute(f"ALTER SEQUENCE {SEQUENCE} OWNED BY {TABLE}.id")
+    op.create_index(f'ix_{TABLE}_device_id', TABLE, ['device_id'], unique=False)
+    op.create_index(f'ix_{TABLE}_timestamp', TABLE, ['timestamp'], unique=False)
+    op.execute(f"CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT")
+
+    # Секції для наявних даних і кількох наступних місяців
+    bind = op.get_bind()
+    oldest = bind.execute(sa.text(f"SELECT min(timestamp) FROM {LEGACY}")).scalar()
+    now = datetime.datetime.now(datetime.timezone.utc)
+    start = (oldest or now).astimezone(datetime.timezone.utc).replace(
+        day=1, hour=0, minute=0, second=0, microsecond=0)
+    last = _add_months(now.replace(day=1, hour=0, minute=0, second=0, microsecond=0), MONTHS_AHEAD)
+    while start <= last:
+        _create_partition(start)
+        start = _add_months(start, 1)
+
+    op.execute(f"INSERT INTO {TABLE} (id, device_id, timestamp, signal_rssi, latency_ms, packet_loss_percent) "
+               f"SELECT id, device_id, timestamp, signal_rssi, latency_ms, packet_loss_percent FROM {LEGACY}")
+    op.drop_table(LEGACY)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute(f"ALTER SEQUENCE {SEQUENCE} OWNED BY NONE")
+    op.execute(f"ALTER TABLE {TABLE} RENAME TO {LEGACY}")
+    op.execute(f"ALTER INDEX ix_{TABLE}_device_id RENAME TO ix_{LEGACY}_device_id")
+    op.execute(f"ALTER INDEX ix_{TABLE}_timestamp RENAME TO ix_{LEGACY}_timestamp")
+    op.execute(f"ALTER TABLE {LEGACY} RENAME CONSTRAINT {TABLE}_pkey TO {LEGACY}_pkey")
+
+    op.execute(f"""
+        CREATE TABLE {TABLE} (
+            id BIGINT NOT NULL DEFAULT nextval('{SEQUENCE}'),
+            device_id UUID NOT NULL REFERENCES devices (id) ON DELETE CASCADE,
+            timestamp TIMESTAMP WITH TIME ZONE NOT NULL,
+            signal_rssi INTEGER,
+            latency_ms INTEGER,
+            packet_loss_percent DOUBLE PRECISION,
+            CONSTRAINT {TABLE}_pkey PRIMARY KEY (id)
+        )
+    """)
+    op.execute(f"ALTER SEQUENCE {SEQUENCE} OWNED BY {TABLE}.id")
+    op.execute(f"INSERT INTO {TABLE} SELECT id, device_id, timestamp, signal_rssi, latency_ms, packet_loss_percent "
+               f"FROM {LEGACY}")
+    op.create_index(f'ix_{TABLE}_device_id', TABLE, ['device_id'], unique=False)
+    op.create_index(f'ix_{TABLE}_timestamp', TABLE, ['timestamp'], unique=False)
+    # Видаляє і всі секції
+    op.execute(f"DROP TABLE {LEGACY}")
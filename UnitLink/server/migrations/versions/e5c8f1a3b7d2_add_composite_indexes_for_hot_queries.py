@@ -0,0 +1,38 @@
+"""Add composite indexes for hot queries
+
+Revision ID: e5c8f1a3b7d2
+Revises: d7e3b5a9c1f4
+Create Date: 2026-10-18 13:05:52.117804
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5c8f1a3b7d2'
+down_revision = 'd7e3b5a9c1f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Історія пристрою за період: (device_id, timestamp) замінює окремий індекс device_id.
+    # На секціонованій таблиці PostgreSQL індекс створюється в усіх секціях
+    op.create_index('ix_device_status_history_device_id_timestamp', 'device_status_history',
+                    ['device_id', 'timestamp'], unique=False,
+                    postgresql_include=['id', 'signal_rssi', 'latency_ms', 'packet_loss_percent'])
+    op.drop_index('ix_device_status_history_device_id', table_name='device_status_history')
+
+    # Непідтверджені сповіщення: частковий індекс замість індексу по булевому полю
+    op.create_index('ix_alerts_unacknowledged_timestamp', 'alerts', ['timestamp'], unique=False,
+                    postgresql_where=sa.text('NOT is_acknowledged'),
+                    sqlite_where=sa.text('is_acknowledged = 0'))
+    op.drop_index('ix_alerts_is_acknowledged', table_name='alerts')
+
+
+def downgrade():
+    op.create_index('ix_alerts_is_acknowledged', 'alerts', ['is_acknowledged'], unique=False)
+    op.drop_index('ix_alerts_unacknowledged_timestamp', table_name='alerts')
+    op.create_index('ix_device_status_history_device_id', 'device_status_history', ['device_id'], unique=False)
+    op.drop_index('ix_device_status_history_device_id_timestamp', table_name='device_status_history')
@@ -0,0 +1,28 @@
+"""Add keyset pagination index for connection logs
+
+Revision ID: f2b6d8a4c9e1
+Revises: e5c8f1a3b7d2
+Create Date: 2026-10-18 14:21:37.408115
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b6d8a4c9e1'
+down_revision = 'e5c8f1a3b7d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # (timestamp, id) обслуговує і курсорну пагінацію журналу, і вибірки за період,
+    # тож окремий індекс timestamp більше не потрібен
+    op.create_index('ix_connection_logs_timestamp_id', 'connection_logs', ['timestamp', 'id'], unique=False)
+    op.drop_index('ix_connection_logs_timestamp', table_name='connection_logs')
+
+
+def downgrade():
+    op.create_index('ix_connection_logs_timestamp', 'connection_logs', ['timestamp'], unique=False)
+    op.drop_index('ix_connection_logs_timestamp_id', table_name='connection_logs')
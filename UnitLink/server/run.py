@@ -5,6 +5,13 @@ import random
 import uuid
 import datetime # Потрібен для DeviceStatusHistory
 from app import create_app, socketio, db # Імпортуємо все необхідне з app
+from app.services.mqtt_bridge import mqtt_bridge
+from app.services.udp_receiver import udp_receiver
+from app.services.heartbeat_watchdog import heartbeat_watchdog
+from app.services.telemetry_rollups import telemetry_rollups
+from app.services.history_partitions import history_partitions
+from app.services.region_index import region_index
+from app.services.history_export import EXPORT_SOURCES, EXPORT_FORMATS, export_filename, write_export
 
 # Імпортуємо всі моделі та Enum'и, що використовуються в seed та context
 from app.models import (
@@ -124,7 +131,8 @@ def seed():
                      status=random_status,
                      # Встановлюємо last_seen, якщо статус не UNKNOWN/OFFLINE
                      last_seen=datetime.datetime.now(datetime.timezone.utc) if random_status in [DeviceStatus.ONLINE, DeviceStatus.UNSTABLE] else None,
-                     added_by_user_id=admin_id # Використовуємо ID адміна або None
+                     added_by_user_id=admin_id, # Використовуємо ID адміна або None
+                     region=region_index.locate(data['lat'], data['lon'])
                  )
                  db.session.add(device)
                  count_added += 1
@@ -146,9 +154,82 @@ def seed():
         traceback.print_exc()
 # -----------------------------
 
+@app.cli.command("rollups-rebuild")
+@click.option('--hours', default=24 * 7, show_default=True, type=int, help="Глибина перерахунку в годинах.")
+def rollups_rebuild(hours):
+    """Перераховує агрегати телеметрії (1m/15m/1h) з сирої історії."""
+    # Поточна година не чіпається - її інтервали ще відкриті в працюючому сервері
+    now = datetime.datetime.now(datetime.timezone.utc)
+    count = telemetry_rollups.rebuild(now - datetime.timedelta(hours=hours), until=now)
+    print(f"Rebuilt {count} rollup bucket(s) for the last {hours} hour(s).")
+
+@app.cli.command("history-retention")
+@click.option('--days', default=None, type=int, help="Скільки днів історії зберігати (за замовчуванням HISTORY_RETENTION_DAYS).")
+@click.option('--dry-run', is_flag=True, help="Лише показати, що буде видалено.")
+def history_retention(days, dry_run):
+    """Видаляє прострочену історію телеметрії (на PostgreSQL - цілими секціями) і створює секції наперед."""
+    days = days if days is not None else app.config['HISTORY_RETENTION_DAYS']
+    if days <= 0:
+        print("No retention period set (pass --days or HISTORY_RETENTION_DAYS), nothing to do.")
+        return
+    if not dry_run:
+        for name in history_partitions.ensure_partitions():
+            print(f"Created partition {name}.")
+    result = history_partitions.apply_retention(days, dry_run=dry_run)
+    prefix = "Would drop" if dry_run else "Dropped"
+    for name in result['dropped_partitions']:
+        print(f"{prefix} partition {name}.")
+    if result['deleted_rows']:
+        print(f"{'Would delete' if dry_run else 'Deleted'} {result['deleted_rows']} history row(s).")
+    print(f"History older than {days} day(s) processed.")
+
+@app.cli.command("assign-regions")
+@click.option('--all', 'reassign', is_flag=True, help="Перерахувати область і для пристроїв, що її вже мають.")
+def assign_regions(reassign):
+    """Визначає область (devices.region) за координатами пристроїв - після міграції або оновлення меж."""
+    query = Device.query if reassign else Device.query.filter(Device.region.is_(None))
+    changed = 0
+    for device in query.all():
+        region = region_index.locate(device.location_lat, device.location_lon)
+        if device.region != region:
+            device.region = region
+            changed += 1
+    db.session.commit()
+    print(f"Assigned regions to {changed} device(s).")
+
+@app.cli.command("export-history")
+@click.option('--since', required=True, type=click.DateTime(), help="Початок періоду (UTC), напр. 2025-01-01.")
+@click.option('--until', default=None, type=click.DateTime(), help="Кінець періоду (UTC, не включається), за замовчуванням - зараз.")
+@click.option('--source', 'sources', multiple=True, type=click.Choice(list(EXPORT_SOURCES)),
+              help="Що експортувати (можна кілька), за замовчуванням - усе.")
+@click.option('--format', 'fmt', default='parquet', show_default=True, type=click.Choice(list(EXPORT_FORMATS)))
+@click.option('--output-dir', default='.', show_default=True, type=click.Path(file_okay=False),
+              help="Каталог для файлів архіву.")
+def export_history(since, until, sources, fmt, output_dir):
+    """Експортує історію телеметрії та логи за період у Parquet/Arrow (потоково, пакетами з курсора БД)."""
+    since = since.replace(tzinfo=datetime.timezone.utc)
+    until = until.replace(tzinfo=datetime.timezone.utc) if until else datetime.datetime.now(datetime.timezone.utc)
+    os.makedirs(output_dir, exist_ok=True)
+    for source in sources or EXPORT_SOURCES:
+        path = os.path.join(output_dir, export_filename(source, since, until, fmt))
+        rows = write_export(source, path, since, until, fmt, chunk_size=app.config['EXPORT_CHUNK_ROWS'])
+        print(f"Exported {rows} {source} row(s) to {path}.")
+
 # Точка входу для запуску додатку
 if __name__ == '__main__':
     print(f"--- Starting UnitLink Server in {config_name} mode ---")
+    # Фонові сервіси запускаємо тільки в процесі сервера (не в CLI-командах)
+    # При use_reloader стартуємо лише в дочірньому процесі, який реально обслуговує запити
+    if not app.debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        # Сторож ставить на облік пристрої, що були активні до перезапуску
+        with app.app_context():
+            heartbeat_watchdog.start()
+            # Секції історії наперед + автоматична ретенція
+            history_partitions.start()
+        if app.config['MQTT_ENABLED']:
+            mqtt_bridge.start()
+        if app.config['UDP_ENABLED']:
+            udp_receiver.start()
     # Використовуємо socketio.run для підтримки WebSocket
     socketio.run(app, host='0.0.0.0', port=5000, debug=app.debug,
                  use_reloader=app.debug, allow_unsafe_werkzeug=True if app.debug else False)
\ No newline at end of file
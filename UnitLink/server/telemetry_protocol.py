@@ -0,0 +1,8 @@
+# server/telemetry_protocol.py
+"""
+Формат UDP-датаграми для коду пристроїв (device_emulator.py) - див. app/services/telemetry_protocol.py.
+"""
+from app.services.telemetry_protocol import (  # noqa: F401
+    DATAGRAM_SIZE, MAC_SIZE, PROTOCOL_VERSION, STATUS_CODES, DatagramError,
+    decode_status_datagram, encode_status_datagram,
+)
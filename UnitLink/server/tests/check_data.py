@@ -0,0 +1,66 @@
+# server/tests/check_data.py
+"""Згенеровані дані для тестів планів і кількості запитів (tests/test_query_*.py)."""
+import datetime
+import random
+import uuid
+
+from sqlalchemy import insert
+
+from app import db
+from app.models import (
+    User, UserRole, RegistrationRequest, RegistrationRequestStatus,
+    Device, DeviceStatus, DeviceStatusHistory, UnitType,
+    ConnectionLog, LogEventType, Alert, AlertSeverity, ROLLUP_RESOLUTIONS
+)
+
+
+def generate_check_data(devices=50, history_per_device=400):
+    """
+    Наповнює таблиці гарячих запитів правдоподібними даними (у поточній транзакції).
+    Повертає (device_ids, since).
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+    device_ids = [uuid.uuid4() for _ in range(devices)]
+    db.session.execute(insert(Device), [
+        {'id': device_id, 'name': f'plan-check-{device_id.hex[:12]}', 'location_lat': 50.0, 'location_lon': 30.0,
+         'unit_type': UnitType.OTHER, 'status': DeviceStatus.ONLINE}
+        for device_id in device_ids])
+
+    user_ids = [uuid.uuid4() for _ in range(5)]
+    db.session.execute(insert(User), [
+        {'id': user_id, 'username': f'plan-check-{user_id.hex[:12]}', 'email': f'{user_id.hex[:12]}@plan-check.local',
+         'password_hash': '-', 'role': UserRole.OPERATOR, 'is_active': True}
+        for user_id in user_ids])
+    db.session.execute(insert(RegistrationRequest), [
+        {'id': uuid.uuid4(), 'requested_username': f'plan-check-request-{i}', 'email': f'request-{i}@plan-check.local',
+         'full_name': 'Plan Check', 'status': RegistrationRequestStatus.PENDING}
+        for i in range(5)])
+
+    history, logs, alerts = [], [], []
+    for device_id in device_ids:
+        for i in range(history_per_device):
+            timestamp = now - datetime.timedelta(seconds=15 * i)
+            history.append({'device_id': device_id, 'timestamp': timestamp,
+                            'signal_rssi': random.randint(-100, -50), 'latency_ms': random.randint(10, 500),
+                            'packet_loss_percent': random.random() * 10})
+            if i % 20 == 0:
+                logs.append({'device_id': device_id, 'timestamp': timestamp, 'event_type': LogEventType.STATUS_CHANGE,
+                             'message': 'plan check', 'user_id': random.choice(user_ids + [None])})
+        for i in range(10):
+            alerts.append({'id': uuid.uuid4(), 'device_id': device_id, 'severity': AlertSeverity.WARNING,
+                           'message': 'plan check', 'timestamp': now - datetime.timedelta(minutes=i),
+                           'updated_at': now - datetime.timedelta(minutes=i),
+                           'is_acknowledged': i > 0, 'occurrence_count': 1})
+    db.session.execute(insert(DeviceStatusHistory), history)
+    db.session.execute(insert(ConnectionLog), logs)
+    db.session.execute(insert(Alert), alerts)
+
+    rollup_model, seconds = ROLLUP_RESOLUTIONS['1m']
+    rollups = []
+    for device_id in device_ids:
+        for i in range(history_per_device // 4):
+            rollups.append({'device_id': device_id, 'bucket_start': now - datetime.timedelta(seconds=seconds * (i + 1)),
+                            'sample_count': 4, 'signal_rssi_count': 0, 'latency_ms_count': 0,
+                            'packet_loss_percent_count': 0})
+    db.session.execute(insert(rollup_model), rollups)
+    return device_ids, now - datetime.timedelta(hours=1)
@@ -0,0 +1,69 @@
+# server/tests/conftest.py
+"""
+Спільні фікстури тестів сервера. Запуск: `python -m pytest` з каталогу server/.
+
+Фікстура app працює на тимчасовій SQLite-базі (схема з моделей). Якщо задано
+TEST_POSTGRES_URL - на цій базі PostgreSQL (окрема, порожня; схема з міграцій).
+"""
+import os
+import sqlite3
+import sys
+
+import pytest
+from sqlalchemy import BigInteger, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+TEST_POSTGRES_URL = os.environ.get('TEST_POSTGRES_URL')
+
+
+# Моделі розраховані на PostgreSQL; у тимчасовій SQLite-базі - найближчі типи
+@compiles(JSONB, 'sqlite')
+def _jsonb_on_sqlite(type_, compiler, **kw):
+    return 'JSON'
+
+
+@compiles(BigInteger, 'sqlite')
+def _big_integer_on_sqlite(type_, compiler, **kw):
+    # Лише INTEGER PRIMARY KEY у SQLite отримує автоінкремент (rowid)
+    return 'INTEGER'
+
+
+@event.listens_for(Engine, 'connect')
+def _sqlite_foreign_keys(dbapi_connection, connection_record):
+    # Як на PostgreSQL: порушення зовнішніх ключів - помилка, ON DELETE CASCADE працює
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.execute('PRAGMA foreign_keys=ON')
+
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    """Додаток у режимі 'testing' з відкритим контекстом на всю сесію тестів."""
+    import config
+    if not TEST_POSTGRES_URL:
+        config.TestingConfig.SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path_factory.mktemp('db') / 'test.db'}"
+
+    from app import create_app, db
+    from app.services.history_partitions import history_partitions
+    app = create_app('testing')
+    with app.app_context():
+        if TEST_POSTGRES_URL:
+            from flask_migrate import upgrade
+            upgrade(directory=os.path.join(SERVER_DIR, 'migrations'))
+            history_partitions.ensure_partitions()
+        else:
+            db.create_all()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def admin_headers(app):
+    from flask_jwt_extended import create_access_token
+    from app.models import UserRole
+    token = create_access_token(identity='test-admin', additional_claims={'role': UserRole.ADMIN.value})
+    return {'Authorization': f'Bearer {token}'}
@@ -0,0 +1,65 @@
+# server/tests/test_device_registry.py
+import datetime
+
+import pytest
+
+from app import db
+from app.models import Device, DeviceStatus, UnitType
+from app.services.device_registry import device_registry
+
+
+@pytest.fixture
+def device(app):
+    device = Device(name=f'registry-{datetime.datetime.now().timestamp()}', location_lat=50.45, location_lon=30.52,
+                    unit_type=UnitType.OTHER, status=DeviceStatus.ONLINE)
+    db.session.add(device)
+    db.session.commit()
+    device_registry.upsert(device)
+    yield device
+    db.session.delete(device)
+    db.session.commit()
+    device_registry.remove(device.id)
+
+
+def test_last_seen_flush_keeps_fleet_version(device):
+    etag = device_registry.etag()
+    device_registry.mark_seen([device.id], datetime.datetime.now(datetime.timezone.utc))
+    assert device_registry.flush_last_seen() == 1
+    assert device_registry.etag() == etag
+    assert db.session.get(Device, device.id).last_seen is not None
+
+
+def test_heartbeats_stay_out_of_change_journal(app, device):
+    client = app.test_client()
+    headers = {'X-Device-Api-Key': app.config['DEVICE_API_KEY']}
+    etag = device_registry.etag()
+
+    response = client.post(f'/api/devices/{device.id}/status', json={'signal_rssi': -60}, headers=headers)
+    assert response.status_code == 200
+    device_registry.flush_last_seen()
+    assert device_registry.changes_since(etag) == (etag, [], [])
+
+    response = client.post(f'/api/devices/{device.id}/status', json={'status': 'UNSTABLE'}, headers=headers)
+    assert response.status_code == 200
+    version, changed, deleted = device_registry.changes_since(etag)
+    assert version != etag
+    assert [state['id'] for state in changed] == [str(device.id)] and deleted == []
+
+
+def test_device_list_shows_current_last_seen(app, admin_headers, device):
+    client = app.test_client()
+    first = client.get('/api/devices/', headers=admin_headers)
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+
+    seen_at = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=5)
+    response = client.post(f'/api/devices/{device.id}/status', json={'signal_rssi': -60},
+                           headers={'X-Device-Api-Key': app.config['DEVICE_API_KEY']})
+    assert response.status_code == 200
+    device_registry.mark_seen([device.id], seen_at)
+
+    response = client.get('/api/devices/', headers=dict(admin_headers, **{'If-None-Match': etag}))
+    assert response.status_code == 200
+    listed = {state['id']: state for state in response.get_json()['devices']}
+    assert listed[str(device.id)]['last_seen'] == seen_at.isoformat()
+    assert response.get_json()['version'] == device_registry.etag()
@@ -0,0 +1,89 @@
+# server/tests/test_downsampling.py
+import datetime
+
+import numpy as np
+import pytest
+
+from app.services.downsampling import downsample_rows, lttb_indices
+
+METRICS = ('signal_rssi', 'latency_ms', 'packet_loss_percent')
+
+
+def _rows(count, **spikes):
+    """Рядки історії з посекундними мітками часу; spikes - {метрика: (індекс, значення)}."""
+    start = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+    rows = []
+    for i in range(count):
+        rows.append({
+            'timestamp': (start + datetime.timedelta(seconds=i)).isoformat(),
+            'signal_rssi': -60 + (i % 5),
+            'latency_ms': 40 + (i % 7),
+            'packet_loss_percent': float(i % 3),
+        })
+    for metric, (index, value) in spikes.items():
+        rows[index][metric] = value
+    return rows
+
+
+def test_lttb_keeps_requested_count_and_endpoints():
+    x = np.arange(1000, dtype=np.float64)
+    y = np.sin(x / 25.0)
+    indices = lttb_indices(x, y, 100)
+    assert len(indices) == 100
+    assert indices[0] == 0 and indices[-1] == 999
+    assert np.all(np.diff(indices) > 0)
+
+
+def test_lttb_returns_everything_when_budget_is_large():
+    x = np.arange(10, dtype=np.float64)
+    assert list(lttb_indices(x, x, 50)) == list(range(10))
+    assert list(lttb_indices(x, x, 2)) == list(range(10))
+
+
+def test_lttb_preserves_spike():
+    x = np.arange(5000, dtype=np.float64)
+    y = np.zeros(5000)
+    y[3217] = 1000.0
+    assert 3217 in lttb_indices(x, y, 50)
+
+
+def test_downsample_rows_passes_short_series_through():
+    rows = _rows(20)
+    assert downsample_rows(rows, METRICS, 50) is rows
+    assert downsample_rows(rows, METRICS, None) is rows
+
+
+@pytest.mark.parametrize('max_points', [10, 97, 300, 1000])
+def test_downsample_rows_fills_budget(max_points):
+    # Періодичні метрики з однаковою віссю часу вибирають багато спільних рядків
+    result = downsample_rows(_rows(5000), METRICS, max_points)
+    assert len(result) == max_points
+    timestamps = [row['timestamp'] for row in result]
+    assert timestamps == sorted(set(timestamps))
+
+
+def test_downsample_rows_preserves_spikes_of_each_metric():
+    rows = _rows(20000, latency_ms=(4321, 9000), packet_loss_percent=(15000, 100.0), signal_rssi=(777, -120))
+    result = downsample_rows(rows, METRICS, 200)
+    assert len(result) == 200
+    assert rows[4321] in result
+    assert rows[15000] in result
+    assert rows[777] in result
+    assert result[0] is rows[0] and result[-1] is rows[-1]
+
+
+def test_downsample_rows_ignores_missing_values():
+    rows = _rows(3000)
+    for row in rows:
+        row['packet_loss_percent'] = None
+    rows[1500]['packet_loss_percent'] = 50.0
+    result = downsample_rows(rows, METRICS, 100)
+    assert len(result) == 100
+    assert rows[1500] in result
+
+
+def test_downsample_rows_without_data_keeps_endpoints():
+    rows = [{'timestamp': row['timestamp'], 'signal_rssi': None, 'latency_ms': None, 'packet_loss_percent': None}
+            for row in _rows(100)]
+    result = downsample_rows(rows, METRICS, 10)
+    assert result == [rows[0], rows[-1]]
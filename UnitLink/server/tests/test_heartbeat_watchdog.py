@@ -0,0 +1,76 @@
+# server/tests/test_heartbeat_watchdog.py
+import datetime
+
+import pytest
+
+from app import db
+from app.models import ConnectionLog, Device, DeviceStatus, LogEventType, UnitType
+from app.services.device_registry import device_registry
+from app.services.heartbeat_watchdog import heartbeat_watchdog
+from app.services.ingest_service import ingest_status_updates
+
+
+def test_heartbeat_after_expiry_cancels_offline(app):
+    device = Device(name='watchdog-recheck', location_lat=50.0, location_lon=30.0,
+                    unit_type=UnitType.OTHER, status=DeviceStatus.ONLINE)
+    db.session.add(device)
+    db.session.commit()
+    device_registry.upsert(device)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    try:
+        # Дедлайн уже вилучено, а heartbeat встиг записатися в реєстр
+        device_registry.mark_seen([device.id], now)
+        assert heartbeat_watchdog._still_silent([device.id]) == []
+        assert heartbeat_watchdog._deadlines[device.id] > now.timestamp()
+
+        heartbeat_watchdog.forget([device.id])
+        device_registry.mark_seen([device.id], now - datetime.timedelta(seconds=heartbeat_watchdog.timeout + 1))
+        assert heartbeat_watchdog._still_silent([device.id]) == [device.id]
+    finally:
+        heartbeat_watchdog.forget([device.id])
+        db.session.delete(device)
+        db.session.commit()
+        device_registry.remove(device.id)
+
+
+@pytest.fixture
+def device(app):
+    device = Device(name=f'watchdog-{datetime.datetime.now().timestamp()}', location_lat=50.0, location_lon=30.0,
+                    unit_type=UnitType.OTHER, status=DeviceStatus.ONLINE)
+    db.session.add(device)
+    db.session.commit()
+    device_registry.upsert(device)
+    device_id = device.id
+    yield device_id
+    heartbeat_watchdog.forget([device_id])
+    db.session.delete(db.session.get(Device, device_id))
+    db.session.commit()
+    device_registry.remove(device_id)
+
+
+def _post_telemetry(app, device_id, payload):
+    response = app.test_client().post(f'/api/devices/{device_id}/status', json=payload,
+                                      headers={'X-Device-Api-Key': app.config['DEVICE_API_KEY']})
+    assert response.status_code == 200
+
+
+def test_telemetry_after_watchdog_offline_brings_device_online(app, device):
+    ingest_status_updates([(device, {'status': DeviceStatus.OFFLINE.name})], source='watchdog')
+    assert device_registry.status_of(device) == DeviceStatus.OFFLINE
+    assert heartbeat_watchdog.is_silenced(device)
+    # Після перезапуску перелік відновлюється з журналу
+    assert device in heartbeat_watchdog._load_silenced()
+
+    _post_telemetry(app, device, {'signal_rssi': -60})
+    assert device_registry.status_of(device) == DeviceStatus.ONLINE
+    assert db.session.get(Device, device).status == DeviceStatus.ONLINE
+    assert device in heartbeat_watchdog._deadlines and not heartbeat_watchdog.is_silenced(device)
+    last_log = ConnectionLog.query.filter_by(device_id=device).order_by(ConnectionLog.id.desc()).first()
+    assert last_log.event_type == LogEventType.CONNECTED
+
+
+def test_telemetry_after_reported_offline_keeps_status(app, device):
+    _post_telemetry(app, device, {'status': DeviceStatus.OFFLINE.name})
+    _post_telemetry(app, device, {'signal_rssi': -60})
+    assert device_registry.status_of(device) == DeviceStatus.OFFLINE
+    assert device not in heartbeat_watchdog._load_silenced()
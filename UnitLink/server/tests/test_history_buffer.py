@@ -0,0 +1,68 @@
+# server/tests/test_history_buffer.py
+import datetime
+import uuid
+
+import pytest
+
+from app import db
+from app.models import Device, DeviceStatus, DeviceStatusHistory, UnitType
+from app.services.history_buffer import HistoryWriteBuffer
+
+
+@pytest.fixture
+def buffer(app):
+    buffer = HistoryWriteBuffer()
+    buffer.init_app(app)
+    buffer.flush_interval = 0
+    return buffer
+
+
+@pytest.fixture
+def device_id(app):
+    # _write закриває сесію, тож тест працює з id, а не з об'єктом
+    device = Device(name=f'history-{datetime.datetime.now().timestamp()}', location_lat=50.0, location_lon=30.0,
+                    unit_type=UnitType.OTHER, status=DeviceStatus.ONLINE)
+    db.session.add(device)
+    db.session.commit()
+    device_id = device.id
+    yield device_id
+    db.session.delete(db.session.get(Device, device_id))
+    db.session.commit()
+
+
+def _row(device_id):
+    return {'device_id': device_id, 'timestamp': datetime.datetime.now(datetime.timezone.utc),
+            'signal_rssi': -70, 'latency_ms': 40, 'packet_loss_percent': 0.0}
+
+
+def _saved_rows(device_id):
+    return DeviceStatusHistory.query.filter_by(device_id=device_id).count()
+
+
+@pytest.mark.parametrize('use_copy', [False, True])
+def test_write_skips_rows_of_deleted_devices(buffer, device_id, use_copy):
+    if use_copy and db.engine.dialect.name != 'postgresql':
+        pytest.skip("COPY is used only on PostgreSQL.")
+    buffer.use_copy = use_copy
+    orphan_id = uuid.uuid4()
+    buffer._write([_row(device_id), _row(orphan_id)])
+    assert _saved_rows(device_id) == 1
+    assert _saved_rows(orphan_id) == 0
+
+
+def test_failing_batch_is_dropped_after_max_attempts(buffer, device_id, monkeypatch, caplog):
+    calls = []
+
+    def failing_insert(rows):
+        calls.append(len(rows))
+        raise RuntimeError('database is unavailable')
+
+    monkeypatch.setattr(buffer, '_bulk_insert', failing_insert)
+    buffer.max_attempts = 3
+    buffer._in_flight = 2
+    buffer._flush_with_retry([_row(device_id), _row(device_id)])
+
+    assert calls == [2, 2, 2]
+    assert buffer.pending() == 0
+    assert "Dropping 2 history rows after 3 failed attempts." in caplog.text
+    assert _saved_rows(device_id) == 0
@@ -0,0 +1,35 @@
+# server/tests/test_log_search.py
+import datetime
+
+import pytest
+from sqlalchemy import create_engine, insert, select
+
+from app import db
+from app.models import ConnectionLog, LogEventType
+from app.services.log_search import log_search_condition
+
+
+def _insert_log(connection, message):
+    connection.execute(insert(ConnectionLog), [{
+        'timestamp': datetime.datetime.now(datetime.timezone.utc), 'event_type': LogEventType.STATUS_CHANGE,
+        'message': message, 'details': {'to_status': 'ONLINE'}}])
+
+
+def test_sqlite_fts_is_recreated_with_connection_logs(app):
+    if db.engine.dialect.name != 'sqlite':
+        pytest.skip("FTS5 search table exists only on SQLite.")
+    # Окрема база в пам'яті: drop_all не чіпає спільну тестову базу
+    engine = create_engine('sqlite://')
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        _insert_log(connection, "Пристрій 'A' втратив зв'язок")
+
+    db.metadata.drop_all(engine)
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        # Той самий id 1: рядок старої FTS-таблиці дав би конфлікт rowid
+        _insert_log(connection, "Зв'язок з пристроєм 'B' відновлено")
+        found = connection.execute(select(ConnectionLog.message).where(log_search_condition('відновлено'))).all()
+        stale = connection.execute(select(ConnectionLog.message).where(log_search_condition('втратив'))).all()
+    assert [row.message for row in found] == ["Зв'язок з пристроєм 'B' відновлено"]
+    assert stale == []
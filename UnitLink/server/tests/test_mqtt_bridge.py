@@ -0,0 +1,124 @@
+# server/tests/test_mqtt_bridge.py
+"""
+Міст MQTT. Тест з брокером виконується, лише якщо брокер доступний за адресою
+TEST_MQTT_BROKER (host:port, за замовчуванням localhost:1883).
+"""
+import json
+import os
+import socket
+import time
+import types
+import uuid
+
+import pytest
+
+from app.services import mqtt_bridge as mqtt_bridge_module
+from app.services.mqtt_bridge import MqttIngestBridge
+
+TEST_MQTT_BROKER = os.environ.get('TEST_MQTT_BROKER', 'localhost:1883')
+
+
+class _FakeClient:
+    def __init__(self):
+        self.acked = []
+
+    def ack(self, mid, qos):
+        self.acked.append(mid)
+
+
+def _message(mid, qos=1, payload=None):
+    payload = payload if payload is not None else {'signal_rssi': -60}
+    return types.SimpleNamespace(topic=f"unitlink/devices/{uuid.uuid4()}/status", qos=qos, mid=mid,
+                                 payload=json.dumps(payload).encode())
+
+
+@pytest.fixture
+def bridge(app):
+    bridge = MqttIngestBridge()
+    bridge.init_app(app)
+    bridge.batch_interval = 0.01
+    bridge.client = _FakeClient()
+    return bridge
+
+
+def test_full_queue_holds_qos1_messages_without_blocking(bridge):
+    bridge.queue_max = 2
+    bridge._messages = mqtt_bridge_module.queue.Queue(maxsize=2)
+    started = time.monotonic()
+    for mid in range(5):
+        bridge._on_message(bridge.client, None, _message(mid))
+    assert time.monotonic() - started < 0.5
+    assert bridge._messages.qsize() == 2
+    assert [message.mid for message in bridge._overflow] == [2, 3, 4]
+
+    assert [message.mid for message in bridge._take_batch()] == [0, 1]
+    bridge._refill()
+    assert [message.mid for message in bridge._take_batch()] == [2, 3]
+    bridge._refill()
+    assert [message.mid for message in bridge._take_batch()] == [4]
+    assert not bridge._overflow and bridge.client.acked == []
+
+
+def test_failing_batch_is_logged_before_ack(bridge, monkeypatch, caplog):
+    def failing_ingest(updates):
+        raise RuntimeError('database is unavailable')
+
+    monkeypatch.setattr(mqtt_bridge_module, 'ingest_status_updates', failing_ingest)
+    bridge.max_attempts = 2
+    message = _message(7, payload={'signal_rssi': -61})
+    bridge._process([message])
+
+    assert bridge.client.acked == [7]
+    assert "Dropping MQTT batch of 1 record(s) from 1 message(s)." in caplog.text
+    assert f"Dropped MQTT message on '{message.topic}': {message.payload.decode()}" in caplog.text
+
+
+def _broker_address():
+    host, _, port = TEST_MQTT_BROKER.rpartition(':')
+    try:
+        socket.create_connection((host, int(port)), timeout=0.5).close()
+    except OSError:
+        pytest.skip(f"No MQTT broker at {TEST_MQTT_BROKER}.")
+    return host, int(port)
+
+
+def test_slow_ingest_keeps_broker_connection(app, monkeypatch):
+    import paho.mqtt.client as mqtt
+    host, port = _broker_address()
+    received = []
+
+    def slow_ingest(updates):
+        time.sleep(0.05)
+        received.extend(updates)
+        return [{'code': 200} for _ in updates]
+
+    monkeypatch.setattr(mqtt_bridge_module, 'ingest_status_updates', slow_ingest)
+    prefix = f"unitlink-test/{uuid.uuid4().hex}"
+    for key, value in {'MQTT_BROKER_HOST': host, 'MQTT_BROKER_PORT': port, 'MQTT_TOPIC_PREFIX': prefix,
+                       'MQTT_CLIENT_ID': f"unitlink-test-{uuid.uuid4().hex[:8]}", 'MQTT_QUEUE_MAX': 2}.items():
+        monkeypatch.setitem(app.config, key, value)
+    bridge = MqttIngestBridge()
+    bridge.init_app(app)
+    bridge.batch_size = 1
+    bridge.batch_interval = 0.05
+    publisher = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+    bridge.start()
+    try:
+        deadline = time.monotonic() + 5
+        while not bridge.client.is_connected() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        time.sleep(0.2)  # підписка
+        publisher.connect(host, port)
+        publisher.loop_start()
+        for _ in range(20):
+            publisher.publish(f"{prefix}/{uuid.uuid4()}/status", json.dumps({'signal_rssi': -60}), qos=1)
+
+        deadline = time.monotonic() + 15
+        while len(received) < 20 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert len(received) == 20
+        assert bridge.client.is_connected()
+    finally:
+        publisher.loop_stop()
+        publisher.disconnect()
+        bridge.stop()
@@ -0,0 +1,77 @@
+# server/tests/test_query_counts.py
+"""
+Кількість SQL-запитів на ендпоінт: кожен GET-ендпоінт з ENDPOINT_QUERY_BUDGETS
+викликається тестовим клієнтом на згенерованих даних. Перший виклик прогріває кеші
+(реєстр пристроїв, кількість логів), під час другого рахуються запити до БД.
+Сторінки беруться великими: лінива загрузка зв'язків для кожного рядка (N+1)
+дала б сотні запитів замість одиниць.
+"""
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from app import db
+from app.models import UserRole
+from app.services.device_registry import device_registry
+
+from check_data import generate_check_data
+
+# Ендпоінт (шаблон URL) -> максимально допустима кількість запитів до БД
+ENDPOINT_QUERY_BUDGETS = {
+    '/api/devices/': 0,  # Список з реєстру, серіалізований на версію парку
+    '/api/devices/changes': 0,
+    '/api/devices/clusters?zoom=6': 0,
+    '/api/devices/regions': 0,
+    '/api/devices/?region=UA-30': 0,
+    '/api/devices/{device_id}': 1,
+    '/api/devices/{device_id}/history?hours=1&resolution=raw': 2,
+    '/api/devices/{device_id}/history?hours=1&resolution=1m': 2,
+    '/api/devices/history?ids={device_ids}&hours=1&resolution=raw': 1,
+    '/api/logs/?per_page=100': 1,
+    '/api/logs/?page=2&per_page=100': 1,
+    '/api/logs/?per_page=100&event_type=status_change&q=plan': 2,
+    '/api/alerts/unacknowledged': 1,
+    '/api/admin/users': 1,
+    '/api/admin/registration_requests': 1,
+}
+
+
+@pytest.fixture(scope='module')
+def endpoint_data(app):
+    """
+    Дані зберігаються в тестовій базі: тестовий клієнт працює в окремому контексті
+    додатку (власна сесія) і незбережених рядків не побачив би.
+    """
+    device_ids, _ = generate_check_data()
+    db.session.commit()
+    device_registry.load()
+    token = create_access_token(identity='query-count-check', additional_claims={'role': UserRole.ADMIN.value})
+    return device_ids, {'Authorization': f'Bearer {token}'}
+
+
+def _get(client, path, headers):
+    response = client.get(path, headers=headers)
+    response.get_data()  # Потокові відповіді виконують запити під час читання тіла
+    return response
+
+
+@pytest.mark.parametrize('template', list(ENDPOINT_QUERY_BUDGETS))
+def test_endpoint_query_budget(app, endpoint_data, template):
+    device_ids, headers = endpoint_data
+    path = template.format(device_id=device_ids[0], device_ids=','.join(map(str, device_ids[:10])))
+    client = app.test_client()
+    _get(client, path, headers)
+
+    queries = []
+
+    def count_query(conn, cursor, statement, parameters, context, executemany):
+        queries.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', count_query)
+    try:
+        response = _get(client, path, headers)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count_query)
+
+    assert response.status_code == 200
+    assert len(queries) <= ENDPOINT_QUERY_BUDGETS[template], '\n'.join(queries)
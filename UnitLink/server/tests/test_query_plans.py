@@ -0,0 +1,162 @@
+# server/tests/test_query_plans.py
+"""
+Плани виконання "гарячих" запитів: кожен запит будується тими самими функціями,
+що й у маршрутах, і перевіряється EXPLAIN на згенерованих даних (транзакція
+потім відкочується). Тест не проходить, якщо запит читає таблицю повним
+скануванням, сортує результат окремим кроком замість індексу або використовує
+індекс, умова якого не містить усіх очікуваних колонок (наприклад, лише timestamp
+замість (device_id, timestamp)), чи не використовує очікуваний частковий індекс.
+
+PostgreSQL (TEST_POSTGRES_URL): EXPLAIN (FORMAT JSON) з enable_seqscan/enable_sort = off -
+планувальник обирає послідовне сканування чи Sort лише тоді, коли відповідного індексу
+немає, тож результат не залежить від обсягу даних. SQLite: EXPLAIN QUERY PLAN, заборонені
+"SCAN <таблиця>" без індексу та "USE TEMP B-TREE FOR ORDER BY".
+"""
+import json
+import types
+
+import pytest
+from flask import current_app
+from sqlalchemy import text
+
+from app import db
+from app.models import Device, DeviceStatusHistory, ConnectionLog, Alert, ROLLUP_RESOLUTIONS
+from app.routes.alert_routes import _changed_since_query, _unacknowledged_query
+from app.routes.device_routes import _raw_fleet_history_query, _raw_history_query, _rollup_history_query
+from app.routes.log_routes import _encode_cursor, _keyset_query, _log_filters, _matching_ids_query
+from app.schemas import connection_log_schema
+
+from check_data import generate_check_data
+
+# Назва запиту -> колонки, які мають бути в умові індексу, або назва очікуваного індексу
+HOT_QUERIES = {
+    'device_history_raw': ('device_id', 'timestamp'),
+    'fleet_history_raw': ('device_id', 'timestamp'),
+    'device_history_rollup': ('device_id', 'bucket_start'),
+    'unacknowledged_alerts': 'ix_alerts_unacknowledged_timestamp',
+    'alerts_changed_since': 'ix_alerts_updated_at',
+    'logs_page': 'ix_connection_logs_timestamp_id',
+    'logs_page_after_cursor': 'ix_connection_logs_timestamp_id',
+    'logs_by_device': 'ix_connection_logs_device_id_timestamp_id',
+    'logs_by_event_type': 'ix_connection_logs_event_type_timestamp_id',
+    # Лише відбір (GIN / FTS5), без сортування - як у підрахунку за фільтрами
+    'logs_search': (),
+}
+
+
+def _log_page_query(query_string, cursor=None):
+    """Запит першої (або за курсором) сторінки журналу з фільтрами, як у log_routes.get_logs."""
+    with current_app.test_request_context(f'/api/logs/?{query_string}'):
+        query = connection_log_schema.query().filter(*_log_filters())
+        return _keyset_query(query, cursor, 20)[0]
+
+
+def _build_query(name, device_ids, since):
+    device_id = device_ids[0]
+    if name == 'device_history_raw':
+        return _raw_history_query(device_id, since)
+    if name == 'fleet_history_raw':
+        return _raw_fleet_history_query(device_ids[:10], since)
+    if name == 'device_history_rollup':
+        return _rollup_history_query(ROLLUP_RESOLUTIONS['1m'][0], [device_id], since)
+    if name == 'unacknowledged_alerts':
+        return _unacknowledged_query()
+    if name == 'alerts_changed_since':
+        return _changed_since_query(since)
+    if name == 'logs_page':
+        return _log_page_query('')
+    if name == 'logs_page_after_cursor':
+        return _log_page_query('', _encode_cursor(types.SimpleNamespace(timestamp=since, id=1000), 'next'))
+    if name == 'logs_by_device':
+        return _log_page_query(f'device_id={device_id}')
+    if name == 'logs_by_event_type':
+        return _log_page_query('event_type=status_change')
+    if name == 'logs_search':
+        with current_app.test_request_context('/api/logs/?q=plan check'):
+            return _matching_ids_query(_log_filters(), 1000)
+    raise KeyError(name)
+
+
+def _explain(prefix, query):
+    """Виконує EXPLAIN для запиту; параметри підставляються літералами, щоб план відповідав реальним значенням."""
+    statement = getattr(query, 'statement', query)  # Query (legacy) або select()
+    sql = statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True})
+    return db.session.execute(text(f"{prefix} {sql}"))
+
+
+def _postgresql_problems(plan, expected):
+    """Вузли плану PostgreSQL, що означають повне сканування, окреме сортування або не той індекс."""
+    problems = []
+    index_columns = expected if isinstance(expected, tuple) else ()
+    if isinstance(expected, str) and f'"Index Name": "{expected}"' not in json.dumps(plan):
+        problems.append(f"index {expected} is not used")
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        node_type = node.get('Node Type')
+        if node_type == 'Seq Scan':
+            problems.append(f"sequential scan on {node.get('Relation Name')}")
+        elif node_type in ('Sort', 'Incremental Sort'):
+            problems.append(f"sort by {', '.join(node.get('Sort Key', []))}")
+        elif 'Index Cond' in node or node_type in ('Index Scan', 'Index Only Scan'):
+            missing = [column for column in index_columns if column not in node.get('Index Cond', '')]
+            if missing:
+                problems.append(f"{node.get('Index Name')} does not filter on {', '.join(missing)}")
+        stack.extend(node.get('Plans', []))
+    return problems
+
+
+def _sqlite_problems(rows, expected):
+    problems = []
+    index_columns = expected if isinstance(expected, tuple) else ()
+    if isinstance(expected, str) and not any(f'INDEX {expected}' in row[-1] for row in rows):
+        problems.append(f"index {expected} is not used")
+    for row in rows:
+        detail = row[-1]
+        if detail.startswith('SCAN ') and 'USING' not in detail and 'VIRTUAL TABLE INDEX' not in detail:
+            problems.append(detail)
+        elif 'USE TEMP B-TREE' in detail:
+            problems.append(detail)
+        elif index_columns:
+            # "SEARCH <таблиця> USING INDEX <індекс> (device_id=? AND timestamp>?)"
+            condition = detail.partition('(')[2]
+            missing = [column for column in index_columns if column not in condition]
+            if missing:
+                problems.append(f"{detail} does not filter on {', '.join(missing)}")
+            elif 'ANY(' in condition:
+                # skip-scan: провідна колонка індексу не в умові - індекс читається майже повністю
+                problems.append(f"{detail} skips the leading index column")
+    return problems
+
+
+@pytest.fixture(scope='module')
+def check_data(app):
+    """Згенеровані дані та налаштування планувальника; після тестів модуля транзакція відкочується."""
+    dialect = db.engine.dialect.name
+    if dialect not in ('postgresql', 'sqlite'):
+        pytest.skip(f"Query plan checks are not supported for '{dialect}'.")
+    try:
+        device_ids, since = generate_check_data()
+        for table in (Device.__table__, DeviceStatusHistory.__table__, ConnectionLog.__table__,
+                      Alert.__table__, ROLLUP_RESOLUTIONS['1m'][0].__table__):
+            db.session.execute(text(f'ANALYZE {table.name}'))
+        if dialect == 'postgresql':
+            db.session.execute(text('SET LOCAL enable_seqscan = off'))
+            db.session.execute(text('SET LOCAL enable_sort = off'))
+        yield device_ids, since
+    finally:
+        db.session.rollback()
+
+
+@pytest.mark.parametrize('name', list(HOT_QUERIES))
+def test_hot_query_uses_index(check_data, name):
+    device_ids, since = check_data
+    query, expected = _build_query(name, device_ids, since), HOT_QUERIES[name]
+    if db.engine.dialect.name == 'postgresql':
+        plan = _explain('EXPLAIN (FORMAT JSON)', query).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        problems = _postgresql_problems(plan[0]['Plan'], expected)
+    else:
+        problems = _sqlite_problems(_explain('EXPLAIN QUERY PLAN', query).all(), expected)
+    assert problems == []
@@ -0,0 +1,49 @@
+# server/tests/test_telemetry_rollups.py
+import datetime
+
+from app import db
+from app.models import Device, DeviceStatus, UnitType, ROLLUP_RESOLUTIONS
+from app.services.telemetry_rollups import telemetry_rollups
+
+
+def _device(name):
+    device = Device(name=name, location_lat=50.0, location_lon=30.0, unit_type=UnitType.OTHER,
+                    status=DeviceStatus.ONLINE)
+    db.session.add(device)
+    db.session.commit()
+    return device
+
+
+def _sample(device_id):
+    return {'device_id': device_id, 'timestamp': datetime.datetime.now(datetime.timezone.utc),
+            'signal_rssi': -70, 'latency_ms': 40, 'packet_loss_percent': 0.0}
+
+
+def _saved_buckets(device_id):
+    model = ROLLUP_RESOLUTIONS['1m'][0]
+    return model.query.filter_by(device_id=device_id).count()
+
+
+def test_delete_device_forgets_open_rollups(app, admin_headers):
+    kept, deleted = _device('rollups-kept'), _device('rollups-deleted')
+    telemetry_rollups.add([_sample(kept.id), _sample(deleted.id)])
+
+    response = app.test_client().delete(f'/api/devices/{deleted.id}', headers=admin_headers)
+    assert response.status_code == 200
+    assert telemetry_rollups.open_rollups({deleted.id}, '1m', datetime.datetime.min.replace(
+        tzinfo=datetime.timezone.utc)) == {}
+
+    assert telemetry_rollups.flush(force=True) == len(ROLLUP_RESOLUTIONS)
+    assert _saved_buckets(kept.id) == 1
+
+
+def test_flush_skips_buckets_of_devices_deleted_meanwhile(app):
+    kept, deleted = _device('rollups-kept-2'), _device('rollups-orphan')
+    telemetry_rollups.add([_sample(kept.id), _sample(deleted.id)])
+    # Видалення в обхід маршруту: інтервали пристрою лишаються відкритими
+    db.session.delete(deleted)
+    db.session.commit()
+
+    assert telemetry_rollups.flush(force=True) == len(ROLLUP_RESOLUTIONS)
+    assert _saved_buckets(kept.id) == 1
+    assert telemetry_rollups.flush(force=True) == 0
@@ -0,0 +1,30 @@
+# server/tests/test_udp_receiver.py
+import time
+import uuid
+
+from app.services.telemetry_protocol import encode_status_datagram
+from app.services.udp_receiver import UdpTelemetryReceiver
+
+
+def test_receiver_requires_hmac_key(app, monkeypatch, caplog):
+    monkeypatch.setitem(app.config, 'UDP_HMAC_KEY', None)
+    receiver = UdpTelemetryReceiver()
+    receiver.init_app(app)
+    receiver.start()
+    assert receiver._thread is None
+    assert "UDP_HMAC_KEY is not set" in caplog.text
+
+
+def test_device_api_key_does_not_sign_datagrams(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'UDP_HMAC_KEY', 'udp-test-key')
+    receiver = UdpTelemetryReceiver()
+    receiver.init_app(app)
+    device_id = uuid.uuid4()
+    signed_with_api_key = encode_status_datagram(app.config['DEVICE_API_KEY'].encode('utf-8'), device_id, 1,
+                                                 time.time(), status='ONLINE')
+    receiver.handle_datagram(signed_with_api_key, ('127.0.0.1', 5005))
+    assert receiver.stats['rejected'] == 1 and receiver._pending == []
+
+    receiver.handle_datagram(encode_status_datagram(b'udp-test-key', device_id, 2, time.time(), status='ONLINE'),
+                             ('127.0.0.1', 5005))
+    assert len(receiver._pending) == 1